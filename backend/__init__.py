@@ -206,6 +206,7 @@ def add_api_endpoints(app):
     from backend.api.projects.resources import (
         ProjectsRestAPI,
         ProjectsAllAPI,
+        ProjectsQueriesMapResultsAPI,
         ProjectsQueriesBboxAPI,
         ProjectsQueriesOwnerAPI,
         ProjectsQueriesTouchedAPI,
@@ -240,6 +241,7 @@ def add_api_endpoints(app):
         ProjectsActionsUnFeatureAPI,
         ProjectsActionsSetInterestsAPI,
         ProjectActionsIntersectingTilesAPI,
+        ProjectActionsSquareGridAPI,
     )
 
     from backend.api.projects.favorites import ProjectsFavoritesAPI
@@ -252,6 +254,8 @@ def add_api_endpoints(app):
         TasksQueriesGpxAPI,
         TasksQueriesAoiAPI,
         TasksQueriesMappedAPI,
+        TasksQueriesChangesAPI,
+        TasksQueriesEventsAPI,
         TasksQueriesOwnInvalidatedAPI,
     )
     from backend.api.tasks.actions import (
@@ -260,6 +264,7 @@ def add_api_endpoints(app):
         TasksActionsMappingUnlockAPI,
         TasksActionsMappingUndoAPI,
         TasksActionsValidationLockAPI,
+        TasksActionsLockNextAPI,
         TasksActionsValidationStopAPI,
         TasksActionsValidationUnlockAPI,
         TasksActionsMapAllAPI,
@@ -397,6 +402,9 @@ def add_api_endpoints(app):
 
     # Projects queries endoints (TODO: Refactor them into the REST endpoints)
     api.add_resource(ProjectsQueriesBboxAPI, format_url("projects/queries/bbox/"))
+    api.add_resource(
+        ProjectsQueriesMapResultsAPI, format_url("projects/queries/map-results/")
+    )
     api.add_resource(
         ProjectsQueriesOwnerAPI, format_url("projects/queries/myself/owner/")
     )
@@ -524,6 +532,12 @@ def add_api_endpoints(app):
         methods=["POST"],
     )
 
+    api.add_resource(
+        ProjectActionsSquareGridAPI,
+        format_url("projects/actions/square-grid/"),
+        methods=["POST"],
+    )
+
     api.add_resource(
         UsersActionsSetInterestsAPI,
         format_url("users/me/actions/set-interests/"),
@@ -573,6 +587,14 @@ def add_api_endpoints(app):
         TasksQueriesMappedAPI,
         format_url("projects/<int:project_id>/tasks/queries/mapped/"),
     )
+    api.add_resource(
+        TasksQueriesChangesAPI,
+        format_url("projects/<int:project_id>/tasks/changes/"),
+    )
+    api.add_resource(
+        TasksQueriesEventsAPI,
+        format_url("projects/<int:project_id>/tasks/events/"),
+    )
     api.add_resource(
         TasksQueriesOwnInvalidatedAPI,
         format_url("projects/<string:username>/tasks/queries/own/invalidated/"),
@@ -611,6 +633,10 @@ def add_api_endpoints(app):
         TasksActionsValidationLockAPI,
         format_url("projects/<int:project_id>/tasks/actions/lock-for-validation/"),
     )
+    api.add_resource(
+        TasksActionsLockNextAPI,
+        format_url("projects/<int:project_id>/tasks/actions/lock-next/"),
+    )
     api.add_resource(
         TasksActionsValidationStopAPI,
         format_url("projects/<int:project_id>/tasks/actions/stop-validation/"),
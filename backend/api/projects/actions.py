@@ -4,7 +4,7 @@ from flask_restful import Resource, request, current_app
 from schematics.exceptions import DataError
 
 from backend.models.dtos.message_dto import MessageDTO
-from backend.models.dtos.grid_dto import GridDTO
+from backend.models.dtos.grid_dto import GridDTO, SquareGridDTO
 from backend.services.project_service import ProjectService
 from backend.services.project_admin_service import (
     ProjectAdminService,
@@ -14,7 +14,7 @@ from backend.services.grid.grid_service import GridService
 from backend.services.messaging.message_service import MessageService
 from backend.services.users.authentication_service import token_auth, tm
 from backend.services.interests_service import InterestService
-from backend.models.postgis.utils import InvalidGeoJson
+from backend.models.postgis.utils import InvalidData, InvalidGeoJson
 
 from shapely import GEOSException
 from shapely.errors import TopologicalError
@@ -404,3 +404,84 @@ class ProjectActionsIntersectingTilesAPI(Resource):
                     "SubCode": "SelfIntersectingAOI",
                 }, 400
             return {"error": str(wrapped), "SubCode": "InternalServerError"}
+
+
+class ProjectActionsSquareGridAPI(Resource):
+    @tm.pm_only()
+    @token_auth.login_required
+    def post(self):
+        """
+        Generates the square task grid of the aoi
+        ---
+        tags:
+            - grid
+        produces:
+            - application/json
+        parameters:
+            - in: header
+              name: Authorization
+              description: Base64 encoded session token
+              required: true
+              type: string
+              default: Token sessionTokenHere==
+            - in: body
+              name: body
+              required: true
+              description: JSON object containing the aoi, the zoom level or area in square kilometres of the tasks
+                and bool flag for controlling clip grid to aoi
+              schema:
+                  properties:
+                      clipToAoi:
+                        type: boolean
+                        default: true
+                      zoom:
+                        type: integer
+                        default: 16
+                      taskArea:
+                        type: number
+                      areaOfInterest:
+                          schema:
+                              properties:
+                                  type:
+                                      type: string
+                                      default: FeatureCollection
+                                  features:
+                                      type: array
+                                      items:
+                                          schema:
+                                              $ref: "#/definitions/GeoJsonFeature"
+        responses:
+            200:
+                description: Task grid generated successfully
+            400:
+                description: Client Error - Invalid Request
+            500:
+                description: Internal Server Error
+        """
+        try:
+            grid_dto = SquareGridDTO(request.get_json())
+            grid_dto.validate()
+        except DataError as e:
+            current_app.logger.error(f"error validating request: {str(e)}")
+            return {"Error": str(e), "SubCode": "InvalidData"}, 400
+
+        try:
+            grid = GridService.create_square_grid(
+                grid_dto.area_of_interest,
+                grid_dto.zoom,
+                grid_dto.task_area,
+                grid_dto.clip_to_aoi,
+            )
+            return grid, 200
+        except (InvalidGeoJson, InvalidData) as e:
+            return {"Error": str(e).split("-")[1], "SubCode": str(e).split("-")[0]}, 400
+        except GEOSException as wrapped:
+            if (
+                isinstance(wrapped.args[0], str)
+                and "Self-intersection" in wrapped.args[0]
+            ):
+                return {
+                    "error": "Invalid geometry. Polygon is self intersecting",
+                    "SubCode": "SelfIntersectingAOI",
+                }, 400
+            return {"error": str(wrapped), "SubCode": "InternalServerError"}, 500
@@ -1,6 +1,6 @@
 import geojson
 import io
-from flask import send_file
+from flask import send_file, Response
 from flask_restful import Resource, current_app, request
 from schematics.exceptions import DataError
 from distutils.util import strtobool
@@ -21,14 +21,15 @@ from backend.services.project_service import (
     NotFound,
 )
 from backend.services.users.user_service import UserService
+from backend.api.utils import json_dumps_with_raw_member
 from backend.services.organisation_service import OrganisationService
 from backend.services.users.authentication_service import token_auth
 from backend.services.project_admin_service import (
     ProjectAdminService,
     ProjectAdminServiceError,
     InvalidGeoJson,
-    InvalidData,
 )
+from backend.models.postgis.utils import InvalidData
 from backend.services.recommendation_service import ProjectRecommendationService
 
 
@@ -98,19 +99,30 @@ class ProjectsRestAPI(Resource):
                 authenticated_user_id,
                 request.environ.get("HTTP_ACCEPT_LANGUAGE"),
                 abbreviated,
+                include_tasks=abbreviated,
             )
 
             if project_dto:
                 project_dto = project_dto.to_primitive()
+                if not abbreviated:
+                    # The task layer is serialised by the database and spliced in unparsed
+                    project_json = json_dumps_with_raw_member(
+                        project_dto,
+                        "tasks",
+                        ProjectService.get_project_tasks_geojson_text(project_id, None),
+                    )
+                else:
+                    project_json = geojson.dumps(project_dto)
+
                 if as_file:
                     return send_file(
-                        io.BytesIO(geojson.dumps(project_dto).encode("utf-8")),
+                        io.BytesIO(project_json.encode("utf-8")),
                         mimetype="application/json",
                         as_attachment=True,
                         download_name=f"project_{str(project_id)}.json",
                     )
 
-                return project_dto, 200
+                return Response(project_json, mimetype="application/json", status=200)
             else:
                 return {
                     "Error": "User not permitted: Private Project",
@@ -118,12 +130,6 @@ class ProjectsRestAPI(Resource):
                 }, 403
         except ProjectServiceError as e:
             return {"Error": str(e).split("-")[1], "SubCode": str(e).split("-")[0]}, 403
-        finally:
-            # this will try to unlock tasks that have been locked too long
-            try:
-                ProjectService.auto_unlock_tasks(project_id)
-            except Exception as e:
-                current_app.logger.critical(str(e))
 
     @token_auth.login_required
     def post(self):
@@ -481,6 +487,13 @@ class ProjectSearchBase(Resource):
         search_dto.last_updated_lte = request.args.get("lastUpdatedTo")
         search_dto.created_gte = request.args.get("createdFrom")
         search_dto.created_lte = request.args.get("createdTo")
+        search_dto.keyset_pagination = strtobool(
+            request.args.get("keysetPagination", "false")
+        )
+        search_dto.cursor = request.args.get("cursor")
+        search_dto.estimate_total = strtobool(
+            request.args.get("estimateTotal", "false")
+        )
 
         # See https://github.com/hotosm/tasking-manager/pull/922 for more info
         try:
@@ -550,7 +563,8 @@ class ProjectsAllAPI(ProjectSearchBase):
               name: orderBy
               type: string
               default: priority
-              enum: [id,difficulty,priority,status,last_updated,due_date]
+              enum: [id,difficulty,priority,status,last_updated,due_date,relevance]
+              description: relevance ranks the matches of textSearch, best first
             - in: query
               name: orderByType
               type: string
@@ -583,7 +597,7 @@ class ProjectsAllAPI(ProjectSearchBase):
               default: 1
             - in: query
               name: textSearch
-              description: Text to search
+              description: Text to search in project names and descriptions, tolerating typos in names
               type: string
             - in: query
               name: country
@@ -655,6 +669,24 @@ class ProjectsAllAPI(ProjectSearchBase):
               type: boolean
               description: If true, it will not return the project centroid's geometries.
               default: false
+            - in: query
+              name: keysetPagination
+              type: boolean
+              description:
+                If true, results are paginated with a cursor instead of page numbers.
+                The cursor of the next page is returned in cursorPagination.nextCursor
+              default: false
+            - in: query
+              name: cursor
+              type: string
+              description: Cursor returned with the previous page, implies keysetPagination
+            - in: query
+              name: estimateTotal
+              type: boolean
+              description:
+                With keysetPagination, return the total estimated by the query planner
+                instead of counting the results
+              default: false
         responses:
             200:
                 description: Projects found
@@ -669,8 +701,8 @@ class ProjectsAllAPI(ProjectSearchBase):
             if user_id:
                 user = UserService.get_user_by_id(user_id)
             search_dto = self.setup_search_dto()
-            results_dto = ProjectSearchService.search_projects(search_dto, user)
-            return results_dto.to_primitive(), 200
+            results = ProjectSearchService.get_cached_search_results(search_dto, user)
+            return results, 200
         except NotFound:
             return {"mapResults": {}, "results": []}, 200
         except (KeyError, ValueError) as e:
@@ -678,6 +710,53 @@ class ProjectsAllAPI(ProjectSearchBase):
             return {"Error": error_msg}, 400
 
 
+class ProjectsQueriesMapResultsAPI(ProjectSearchBase):
+    @token_auth.login_required(optional=True)
+    def get(self):
+        """
+        Get the map layer of a project search as packed binary records
+        ---
+        tags:
+            - projects
+        produces:
+            - application/octet-stream
+        description:
+            Accepts the same filters as the project search. Each matching project is returned as a
+            16 bytes little endian record made of its centroid longitude and latitude (float32),
+            followed by its id and priority (uint32).
+        parameters:
+            - in: header
+              name: Authorization
+              description: Base64 encoded session token
+              type: string
+              default: Token sessionTokenHere==
+            - in: header
+              name: Accept-Language
+              description: Language user is requesting
+              type: string
+              required: true
+              default: en
+        responses:
+            200:
+                description: Packed centroids of the projects found
+            400:
+                description: Client Error - Invalid Request
+            500:
+                description: Internal Server Error
+        """
+        try:
+            user = None
+            user_id = token_auth.current_user()
+            if user_id:
+                user = UserService.get_user_by_id(user_id)
+            search_dto = self.setup_search_dto()
+            points = ProjectSearchService.get_map_results_binary(search_dto, user)
+            return Response(points, mimetype="application/octet-stream", status=200)
+        except (KeyError, ValueError) as e:
+            error_msg = f"Projects map results GET - {str(e)}"
+            return {"Error": error_msg}, 400
+
+
 class ProjectsQueriesBboxAPI(Resource):
     @token_auth.login_required
     def get(self):
@@ -954,12 +1033,6 @@ class ProjectsQueriesNoGeometriesAPI(Resource):
             return project_dto, 200
         except ProjectServiceError as e:
             return {"Error": str(e).split("-")[1], "SubCode": str(e).split("-")[0]}, 403
-        finally:
-            # this will try to unlock tasks that have been locked too long
-            try:
-                ProjectService.auto_unlock_tasks(project_id)
-            except Exception as e:
-                current_app.logger.critical(str(e))
 
 
 class ProjectsQueriesNoTasksAPI(Resource):
@@ -6,6 +6,7 @@ from flask_swagger import swagger
 from backend.services.settings_service import SettingsService
 from backend.services.messaging.smtp_service import SMTPService
 from backend.models.postgis.release_version import ReleaseVersion
+from backend.services.task_geometry_cache import task_geometry_cache
 
 
 class SystemDocsAPI(Resource):
@@ -161,7 +162,11 @@ class SystemHeartbeatAPI(Resource):
                 "version": release.tag_name,
                 "published_at": str(release.published_at),
             }
-        return {"status": "healthy", "release": release}, 200
+        return {
+            "status": "healthy",
+            "release": release,
+            "taskGeometryCache": task_geometry_cache.info(),
+        }, 200
 
 
 class SystemLanguagesAPI(Resource):
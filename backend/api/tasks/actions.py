@@ -1,7 +1,9 @@
+from distutils.util import strtobool
+
 from flask_restful import Resource, current_app, request
 from schematics.exceptions import DataError
 
-from backend.exceptions import NotFound
+from backend.exceptions import Conflict, NotFound
 from backend.models.dtos.grid_dto import SplitTaskDTO
 from backend.models.postgis.utils import InvalidGeoJson
 from backend.services.grid.split_service import SplitService, SplitServiceError
@@ -76,7 +78,7 @@ class TasksActionsMappingLockAPI(Resource):
             404:
                 description: Task not found
             409:
-                description: User has not accepted license terms of project
+                description: User has not accepted license terms of project, or task is being locked by another user
             500:
                 description: Internal Server Error
         """
@@ -102,6 +104,12 @@ class TasksActionsMappingLockAPI(Resource):
                 "Error": "User not accepted license terms",
                 "SubCode": "UserLicenseError",
             }, 409
+        except Conflict as e:
+            return {
+                "Error": "Task is being locked by another user",
+                "SubCode": "TaskLockConflict",
+                "taskIds": e.kwargs["task_ids"],
+            }, 409
 
 
 class TasksActionsMappingStopAPI(Resource):
@@ -385,7 +393,7 @@ class TasksActionsValidationLockAPI(Resource):
             404:
                 description: Task not found
             409:
-                description: User has not accepted license terms of project
+                description: User has not accepted license terms of project, or tasks are being locked by another user
             500:
                 description: Internal Server Error
         """
@@ -410,6 +418,106 @@ class TasksActionsValidationLockAPI(Resource):
                 "Error": "User not accepted license terms",
                 "SubCode": "UserLicenseError",
             }, 409
+        except Conflict as e:
+            return {
+                "Error": "Tasks are being locked by another user",
+                "SubCode": "TaskLockConflict",
+                "taskIds": e.kwargs["task_ids"],
+            }, 409
+
+
+class TasksActionsLockNextAPI(Resource):
+    @token_auth.login_required
+    def post(self, project_id):
+        """
+        Locks a task picked at random among the tasks available for mapping or validation
+        ---
+        tags:
+            - tasks
+        produces:
+            - application/json
+        parameters:
+            - in: header
+              name: Authorization
+              description: Base64 encoded session token
+              required: true
+              type: string
+              default: Token sessionTokenHere==
+            - in: header
+              name: Accept-Language
+              description: Language user is requesting
+              type: string
+              required: true
+              default: en
+            - name: project_id
+              in: path
+              description: Project ID the task is associated with
+              required: true
+              type: integer
+              default: 1
+            - in: query
+              name: action
+              description: Whether the task is locked for mapping or for validation
+              type: string
+              enum: [mapping, validation]
+              default: mapping
+            - in: query
+              name: preferPriorityAreas
+              description: Pick tasks in the priority areas of the project first
+              type: boolean
+              default: false
+        responses:
+            200:
+                description: Task locked
+            400:
+                description: Client Error
+            401:
+                description: Unauthorized - Invalid credentials
+            403:
+                description: Forbidden
+            404:
+                description: No task available
+            409:
+                description: User has not accepted license terms of project
+            500:
+                description: Internal Server Error
+        """
+        action = request.args.get("action", "mapping")
+        if action not in ["mapping", "validation"]:
+            return {
+                "Error": "Action must be mapping or validation",
+                "SubCode": "InvalidData",
+            }, 400
+        try:
+            prefer_priority_areas = strtobool(
+                request.args.get("preferPriorityAreas", "false")
+            )
+        except ValueError:
+            return {
+                "Error": "preferPriorityAreas must be a boolean",
+                "SubCode": "InvalidData",
+            }, 400
+
+        ProjectService.exists(project_id)  # Check if project exists
+        user_id = token_auth.current_user()
+        preferred_locale = request.environ.get("HTTP_ACCEPT_LANGUAGE")
+        try:
+            if action == "mapping":
+                task = MappingService.lock_next_task_for_mapping(
+                    project_id, user_id, preferred_locale, prefer_priority_areas
+                )
+            else:
+                task = ValidatorService.lock_next_task_for_validation(
+                    project_id, user_id, preferred_locale, prefer_priority_areas
+                )
+            return task.to_primitive(), 200
+        except (MappingServiceError, ValidatorServiceError) as e:
+            return {"Error": str(e).split("-")[1], "SubCode": str(e).split("-")[0]}, 403
+        except UserLicenseError:
+            return {
+                "Error": "User not accepted license terms",
+                "SubCode": "UserLicenseError",
+            }, 409
 
 
 class TasksActionsValidationStopAPI(Resource):
@@ -14,6 +14,7 @@ from backend.services.validator_service import ValidatorService
 
 from backend.services.project_service import ProjectService, ProjectServiceError
 from backend.services.grid.grid_service import GridService
+from backend.services.task_event_broker import task_event_broker
 from backend.models.postgis.statuses import UserRole
 from backend.models.postgis.utils import InvalidGeoJson
 
@@ -104,18 +105,19 @@ class TasksQueriesJsonAPI(Resource):
                 else True
             )
 
-            tasks_json = ProjectService.get_project_tasks(int(project_id), tasks)
+            tasks_json = ProjectService.get_project_tasks_geojson_text(
+                int(project_id), tasks
+            )
 
             if as_file:
-                tasks_json = str(tasks_json).encode("utf-8")
                 return send_file(
-                    io.BytesIO(tasks_json),
+                    io.BytesIO(tasks_json.encode("utf-8")),
                     mimetype="application/json",
                     as_attachment=True,
                     download_name=f"{str(project_id)}-tasks.geojson",
                 )
 
-            return tasks_json, 200
+            return Response(tasks_json, mimetype="application/json", status=200)
         except ProjectServiceError as e:
             return {"Error": str(e)}, 403
 
@@ -402,6 +404,79 @@ class TasksQueriesMappedAPI(Resource):
         return mapped_tasks.to_primitive(), 200
 
 
+class TasksQueriesChangesAPI(Resource):
+    def get(self, project_id):
+        """
+        Get the tasks whose status, lock or mapper changed since a cursor
+        ---
+        tags:
+            - tasks
+        produces:
+            - application/json
+        parameters:
+            - name: project_id
+              in: path
+              description: Unique project ID
+              required: true
+              type: integer
+              default: 1
+            - in: query
+              name: since
+              type: string
+              description: Cursor returned by the previous call, all tasks are returned when omitted
+        responses:
+            200:
+                description: Changed tasks returned, with the cursor to pass to the next call
+            400:
+                description: Invalid cursor
+            404:
+                description: Project not found
+            500:
+                description: Internal Server Error
+        """
+        try:
+            changes = ProjectService.get_task_state_changes(
+                project_id, request.args.get("since")
+            )
+            return changes, 200
+        except ValueError as e:
+            return {"Error": str(e), "SubCode": "InvalidCursor"}, 400
+
+
+class TasksQueriesEventsAPI(Resource):
+    def get(self, project_id):
+        """
+        Stream lock, unlock, state change and split events of the project tasks
+        ---
+        tags:
+            - tasks
+        produces:
+            - text/event-stream
+        parameters:
+            - name: project_id
+              in: path
+              description: Unique project ID
+              required: true
+              type: integer
+              default: 1
+        responses:
+            200:
+                description: Server-sent events stream. A resync event asks the client to reload the tasks
+            404:
+                description: Project not found
+            500:
+                description: Internal Server Error
+        """
+        ProjectService.get_project_by_id(project_id)
+        # Subscribe before responding so that no event committed meanwhile is missed
+        subscriber = task_event_broker.subscribe(project_id)
+        return Response(
+            task_event_broker.stream(subscriber),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+
 class TasksQueriesOwnInvalidatedAPI(Resource):
     @tm.pm_only(False)
     @token_auth.login_required
@@ -1,3 +1,4 @@
+import json
 from functools import wraps
 from datetime import date, datetime
 
@@ -34,3 +35,13 @@ def validate_date_input(input_date):
         return input_date
     except (TypeError, ValueError):
         raise ValueError("InvalidDateValue- Invalid date value")
+
+
+def json_dumps_with_raw_member(document: dict, name: str, raw_json: str) -> str:
+    """
+    Serialises a dict and adds a member whose value is already serialised JSON, so that large
+    values built by the database are not parsed and dumped again
+    """
+    body = json.dumps(document)
+    separator = ", " if document else ""
+    return f"{body[:-1]}{separator}{json.dumps(name)}: {raw_json}}}"
@@ -91,6 +91,8 @@ class EnvironmentConfig:
 
     # Time to wait until task auto-unlock (e.g. '2h' or '7d' or '30m' or '1h30m')
     TASK_AUTOUNLOCK_AFTER = os.getenv("TM_TASK_AUTOUNLOCK_AFTER", "2h")
+    # Seconds between two sweeps of the task expiry sweeper (flask task_expiry_sweeper)
+    TASK_EXPIRY_SWEEP_INTERVAL = int(os.getenv("TM_TASK_EXPIRY_SWEEP_INTERVAL", 300))
 
     # Configuration for sending emails
     MAIL_SERVER = os.getenv("TM_SMTP_HOST", None)
@@ -234,6 +236,33 @@ class EnvironmentConfig:
         IMAGE_UPLOAD_API_KEY = _params.get("IMAGE_UPLOAD_API_KEY", None)
         IMAGE_UPLOAD_API_URL = _params.get("IMAGE_UPLOAD_API_URL", None)
 
+    # Project search results cache. "local" keeps an LRU cache in each worker, "shared" keeps results
+    # in the redis store at TM_SEARCH_CACHE_URL so workers share entries and invalidations
+    SEARCH_CACHE_BACKEND = os.getenv("TM_SEARCH_CACHE_BACKEND", "local")
+    SEARCH_CACHE_URL = os.getenv("TM_SEARCH_CACHE_URL", None)
+    SEARCH_CACHE_TTL = int(os.getenv("TM_SEARCH_CACHE_TTL", 300))
+    SEARCH_CACHE_MAXSIZE = int(os.getenv("TM_SEARCH_CACHE_MAXSIZE", 1024))
+
+    # In-memory project catalogue used to filter and order project searches without querying
+    # Postgres, fully reloaded every TM_PROJECT_CATALOGUE_REFRESH seconds
+    PROJECT_CATALOGUE_ENABLED = bool(
+        int(os.getenv("TM_PROJECT_CATALOGUE_ENABLED", False))
+    )
+    PROJECT_CATALOGUE_REFRESH = int(os.getenv("TM_PROJECT_CATALOGUE_REFRESH", 60))
+
+    # Interval in seconds after which the centroids of the search map layer are fully reloaded
+    PROJECT_CENTROIDS_REFRESH = int(os.getenv("TM_PROJECT_CENTROIDS_REFRESH", 300))
+
+    # Memory in MB each worker may use to cache serialised task geometries, 0 disables the cache
+    TASK_GEOMETRY_CACHE_MB = int(os.getenv("TM_TASK_GEOMETRY_CACHE_MB", 64))
+
+    # Most OSM tile grid squares the server tests when generating the square task grid of an AOI
+    GRID_MAX_TILES = int(os.getenv("TM_GRID_MAX_TILES", 250000))
+
+    # Broker of the live task event streams. "postgres" delivers events to all workers through
+    # LISTEN/NOTIFY, "local" only to the streams of the worker committing the change
+    TASK_EVENTS_BROKER = os.getenv("TM_TASK_EVENTS_BROKER", "postgres")
+
     # Sentry backend DSN
     SENTRY_BACKEND_DSN = os.getenv("TM_SENTRY_BACKEND_DSN", None)
 
@@ -1,4 +1,4 @@
-from schematics.types import BaseType, BooleanType, IntType, StringType
+from schematics.types import BaseType, BooleanType, FloatType, IntType, StringType
 from schematics import Model
 
 
@@ -10,6 +10,15 @@ class GridDTO(Model):
     clip_to_aoi = BooleanType(required=True, serialized_name="clipToAoi")
 
 
+class SquareGridDTO(Model):
+    """Describes JSON model used for generating square task grids"""
+
+    area_of_interest = BaseType(required=True, serialized_name="areaOfInterest")
+    zoom = IntType()
+    task_area = FloatType(serialized_name="taskArea")
+    clip_to_aoi = BooleanType(default=False, serialized_name="clipToAoi")
+
+
 class SplitTaskDTO(Model):
     """DTO used to split a task"""
 
@@ -143,6 +143,10 @@ class DraftProjectDTO(Model):
     area_of_interest = BaseType(required=True, serialized_name="areaOfInterest")
     tasks = BaseType(required=False)
     has_arbitrary_tasks = BooleanType(required=True, serialized_name="arbitraryTasks")
+    # Size of the square task grid generated from the aoi when no tasks are supplied
+    zoom = IntType()
+    task_area = FloatType(serialized_name="taskArea")
+    clip_to_aoi = BooleanType(default=False, serialized_name="clipToAoi")
     user_id = IntType(required=True)
 
 
@@ -330,6 +334,9 @@ class ProjectSearchDTO(Model):
     last_updated_gte = StringType(required=False)
     created_lte = StringType(required=False)
     created_gte = StringType(required=False)
+    keyset_pagination = BooleanType(required=False)
+    cursor = StringType(required=False)
+    estimate_total = BooleanType(required=False)
 
     def __hash__(self):
         """Make object hashable so we can cache user searches"""
@@ -403,6 +410,16 @@ class ListSearchResultDTO(Model):
     country = StringType(serialize_when_none=False)
 
 
+class CursorPagination(Model):
+    """Properties for paginating search results with a cursor rather than a page number"""
+
+    has_next = BooleanType(serialized_name="hasNext")
+    next_cursor = StringType(serialized_name="nextCursor")
+    per_page = IntType(serialized_name="perPage")
+    total = IntType()
+    total_is_estimate = BooleanType(serialized_name="totalIsEstimate")
+
+
 class ProjectSearchResultsDTO(Model):
     """Contains all results for the search criteria"""
 
@@ -415,6 +432,9 @@ class ProjectSearchResultsDTO(Model):
     map_results = BaseType(serialized_name="mapResults")
     results = ListType(ModelType(ListSearchResultDTO))
     pagination = ModelType(Pagination)
+    cursor_pagination = ModelType(
+        CursorPagination, serialized_name="cursorPagination", serialize_when_none=False
+    )
 
 
 class LockedTasksForUser(Model):
@@ -2,14 +2,14 @@ import json
 import re
 from typing import Optional
 from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
 
 import geojson
-import datetime
 from flask import current_app
 from geoalchemy2 import Geometry
 from geoalchemy2.shape import to_shape
-from sqlalchemy.sql.expression import cast, or_
-from sqlalchemy import desc, func, Time, orm, literal
+from sqlalchemy.sql.expression import or_
+from sqlalchemy import desc, func, orm, literal, distinct, event, inspect
 from shapely.geometry import shape
 from sqlalchemy.dialects.postgresql import ARRAY
 import requests
@@ -48,7 +48,12 @@ from backend.models.postgis.statuses import (
     ValidationPermission,
     ProjectDifficulty,
 )
-from backend.models.postgis.task import Task, TaskHistory
+from backend.models.postgis.task import (
+    Task,
+    TaskHistory,
+    TaskInvalidationHistory,
+    TaskMappingIssue,
+)
 from backend.models.postgis.team import Team
 from backend.models.postgis.user import User
 from backend.models.postgis.campaign import Campaign, campaign_projects
@@ -78,6 +83,22 @@ project_allowed_users = db.Table(
     db.Column("user_id", db.BigInteger, db.ForeignKey("users.id")),
 )
 
+# Normalised country names of projects, mirrors Project.country so countries can be filtered
+# and listed with index lookups instead of unnesting the array of every project
+project_countries = db.Table(
+    "project_countries",
+    db.metadata,
+    db.Column(
+        "project_id",
+        db.Integer,
+        db.ForeignKey("projects.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    db.Column("country", db.String, primary_key=True),
+    # Lowercase country name used for case insensitive filtering
+    db.Column("country_key", db.String, nullable=False, index=True),
+)
+
 
 class ProjectTeams(db.Model):
     __tablename__ = "project_teams"
@@ -160,6 +181,10 @@ class Project(db.Model):
     task_creation_mode = db.Column(
         db.Integer, default=TaskCreationMode.GRID.value, nullable=False
     )
+    # Bumped whenever task geometries of the project change, e.g. on split or task deletion
+    tasking_version = db.Column(
+        db.Integer, default=0, server_default="0", nullable=False
+    )
 
     organisation_id = db.Column(
         db.Integer,
@@ -298,6 +323,32 @@ class Project(db.Model):
         """Save changes to db"""
         db.session.commit()
 
+    @staticmethod
+    def bump_tasking_version(project_id: int):
+        """Marks task geometries of the project as changed, committed by the caller"""
+        project = db.session.get(Project, project_id)
+        # Updated through the ORM so the project caches are invalidated, the SQL expression keeps
+        # concurrent changes from being lost
+        project.tasking_version = Project.tasking_version + 1
+
+    @staticmethod
+    def record_split(project_id: int, new_task_count: int):
+        """Counts the tasks replacing a split task and marks the task geometries as changed, committed by
+        the caller"""
+        project = db.session.get(Project, project_id)
+        # Updated through the ORM so the project caches are invalidated, the SQL expressions keep
+        # concurrent splits from losing tasks
+        project.total_tasks = Project.total_tasks + new_task_count - 1
+        project.tasking_version = Project.tasking_version + 1
+
+    @staticmethod
+    def get_tasking_version(project_id: int) -> Optional[int]:
+        return (
+            db.session.query(Project.tasking_version)
+            .filter(Project.id == project_id)
+            .scalar()
+        )
+
     @staticmethod
     def clone(project_id: int, author_id: int):
         """Clone project"""
@@ -531,6 +582,19 @@ class Project(db.Model):
 
     def delete(self):
         """Deletes the current model from the DB"""
+        # Task history outlives split tasks, so it is deleted with the project rather than with its tasks
+        project_history_ids = db.session.query(TaskHistory.id).filter(
+            TaskHistory.project_id == self.id
+        )
+        db.session.query(TaskMappingIssue).filter(
+            TaskMappingIssue.task_history_id.in_(project_history_ids.scalar_subquery())
+        ).delete(synchronize_session=False)
+        db.session.query(TaskInvalidationHistory).filter(
+            TaskInvalidationHistory.project_id == self.id
+        ).delete(synchronize_session=False)
+        db.session.query(TaskHistory).filter(TaskHistory.project_id == self.id).delete(
+            synchronize_session=False
+        )
         db.session.delete(self)
         db.session.commit()
 
@@ -624,11 +688,7 @@ class Project(db.Model):
         stats_dto.total_time_spent = 0
 
         total_mapping_time = (
-            db.session.query(
-                func.sum(
-                    cast(func.to_timestamp(TaskHistory.action_text, "HH24:MI:SS"), Time)
-                )
-            )
+            db.session.query(func.sum(TaskHistory.duration_seconds))
             .filter(
                 or_(
                     TaskHistory.action == "LOCKED_FOR_MAPPING",
@@ -637,17 +697,16 @@ class Project(db.Model):
             )
             .filter(TaskHistory.user_id == user_id)
             .filter(TaskHistory.project_id == self.id)
+            .scalar()
         )
-        for time in total_mapping_time:
-            total_mapping_time = time[0]
-            if total_mapping_time:
-                stats_dto.time_spent_mapping = total_mapping_time.total_seconds()
-                stats_dto.total_time_spent += stats_dto.time_spent_mapping
+        if total_mapping_time:
+            stats_dto.time_spent_mapping = total_mapping_time
+            stats_dto.total_time_spent += stats_dto.time_spent_mapping
 
         query = (
             TaskHistory.query.with_entities(
                 func.date_trunc("minute", TaskHistory.action_date).label("trn"),
-                func.max(TaskHistory.action_text).label("tm"),
+                func.max(TaskHistory.duration_seconds).label("tm"),
             )
             .filter(TaskHistory.user_id == user_id)
             .filter(TaskHistory.project_id == self.id)
@@ -655,15 +714,10 @@ class Project(db.Model):
             .group_by("trn")
             .subquery()
         )
-        total_validation_time = db.session.query(
-            func.sum(cast(func.to_timestamp(query.c.tm, "HH24:MI:SS"), Time))
-        ).all()
-
-        for time in total_validation_time:
-            total_validation_time = time[0]
-            if total_validation_time:
-                stats_dto.time_spent_validating = total_validation_time.total_seconds()
-                stats_dto.total_time_spent += stats_dto.time_spent_validating
+        total_validation_time = db.session.query(func.sum(query.c.tm)).scalar()
+        if total_validation_time:
+            stats_dto.time_spent_validating = total_validation_time
+            stats_dto.total_time_spent += stats_dto.time_spent_validating
 
         return stats_dto
 
@@ -700,10 +754,8 @@ class Project(db.Model):
 
         total_mapping_time, total_mapping_tasks = (
             db.session.query(
-                func.sum(
-                    cast(func.to_timestamp(TaskHistory.action_text, "HH24:MI:SS"), Time)
-                ),
-                func.count(TaskHistory.action),
+                func.sum(TaskHistory.duration_seconds),
+                func.count(TaskHistory.duration_seconds),
             )
             .filter(
                 or_(
@@ -716,7 +768,6 @@ class Project(db.Model):
         )
 
         if total_mapping_tasks > 0:
-            total_mapping_time = total_mapping_time.total_seconds()
             project_stats.total_mapping_time = total_mapping_time
             project_stats.average_mapping_time = (
                 total_mapping_time / total_mapping_tasks
@@ -725,10 +776,8 @@ class Project(db.Model):
 
         total_validation_time, total_validation_tasks = (
             db.session.query(
-                func.sum(
-                    cast(func.to_timestamp(TaskHistory.action_text, "HH24:MI:SS"), Time)
-                ),
-                func.count(TaskHistory.action),
+                func.sum(TaskHistory.duration_seconds),
+                func.count(TaskHistory.duration_seconds),
             )
             .filter(
                 or_(
@@ -741,7 +790,6 @@ class Project(db.Model):
         )
 
         if total_validation_tasks > 0:
-            total_validation_time = total_validation_time.total_seconds()
             project_stats.total_validation_time = total_validation_time
             project_stats.average_validation_time = (
                 total_validation_time / total_validation_tasks
@@ -772,9 +820,7 @@ class Project(db.Model):
             TaskHistory.query.with_entities(
                 Task.zoom,
                 TaskHistory.action,
-                (
-                    cast(func.to_timestamp(TaskHistory.action_text, "HH24:MI:SS"), Time)
-                ).label("ts"),
+                TaskHistory.duration_seconds.label("duration"),
             )
             .filter(Task.is_square == is_square)
             .filter(TaskHistory.project_id == Task.project_id)
@@ -787,36 +833,32 @@ class Project(db.Model):
         sq = sq.subquery()
 
         nz = (
-            db.session.query(sq.c.zoom, sq.c.action, sq.c.ts)
-            .filter(sq.c.ts > datetime.time(0))
+            db.session.query(sq.c.zoom, sq.c.action, sq.c.duration)
+            .filter(sq.c.duration > 0)
             .limit(10000)
             .subquery()
         )
 
         if project_stats.average_mapping_time <= 0:
             mapped_avg = (
-                db.session.query(nz.c.zoom, (func.avg(nz.c.ts)).label("avg"))
+                db.session.query(nz.c.zoom, (func.avg(nz.c.duration)).label("avg"))
                 .filter(nz.c.action == TaskStatus.LOCKED_FOR_MAPPING.name)
                 .group_by(nz.c.zoom)
                 .all()
             )
             if len(mapped_avg) != 0:
-                mapping_time = sum([t.avg.total_seconds() for t in mapped_avg]) / len(
-                    mapped_avg
-                )
+                mapping_time = sum([float(t.avg) for t in mapped_avg]) / len(mapped_avg)
                 project_stats.average_mapping_time = mapping_time
 
         if project_stats.average_validation_time <= 0:
             val_avg = (
-                db.session.query(nz.c.zoom, (func.avg(nz.c.ts)).label("avg"))
+                db.session.query(nz.c.zoom, (func.avg(nz.c.duration)).label("avg"))
                 .filter(nz.c.action == TaskStatus.LOCKED_FOR_VALIDATION.name)
                 .group_by(nz.c.zoom)
                 .all()
             )
             if len(val_avg) != 0:
-                validation_time = sum([t.avg.total_seconds() for t in val_avg]) / len(
-                    val_avg
-                )
+                validation_time = sum([float(t.avg) for t in val_avg]) / len(val_avg)
                 project_stats.average_validation_time = validation_time
 
         time_to_finish_mapping = (
@@ -939,17 +981,23 @@ class Project(db.Model):
         return project_info.name
 
     @staticmethod
-    def get_project_total_contributions(project_id: int) -> int:
+    def get_total_contributions_for_projects(project_ids: list) -> dict:
+        """Get the number of contributors of several projects, keyed by project ID"""
         project_contributors_count = (
-            TaskHistory.query.with_entities(TaskHistory.user_id)
+            db.session.query(
+                TaskHistory.project_id, func.count(distinct(TaskHistory.user_id))
+            )
             .filter(
-                TaskHistory.project_id == project_id, TaskHistory.action != "COMMENT"
+                TaskHistory.project_id.in_(project_ids),
+                TaskHistory.action != "COMMENT",
             )
-            .distinct(TaskHistory.user_id)
-            .count()
+            .group_by(TaskHistory.project_id)
+            .all()
         )
+        contributions = {project_id: 0 for project_id in project_ids}
+        contributions.update(dict(project_contributors_count))
 
-        return project_contributors_count
+        return contributions
 
     def get_aoi_geometry_as_geojson(self):
         """Helper which returns the AOI geometry as a geojson object"""
@@ -990,6 +1038,41 @@ class Project(db.Model):
             .count()
         )
 
+    @staticmethod
+    def get_active_mappers_for_projects(project_ids: list) -> dict:
+        """Get the active mappers count of several projects, keyed by project ID.
+        Shares active_mappers_cache with get_active_mappers so only uncached projects are queried
+        """
+        active_mappers = {}
+        uncached_ids = []
+        for project_id in project_ids:
+            count = active_mappers_cache.get(hashkey(project_id))
+            if count is None:
+                uncached_ids.append(project_id)
+            else:
+                active_mappers[project_id] = count
+
+        if uncached_ids:
+            query = (
+                db.session.query(Task.project_id, func.count(distinct(Task.locked_by)))
+                .filter(
+                    Task.task_status.in_(
+                        (
+                            TaskStatus.LOCKED_FOR_MAPPING.value,
+                            TaskStatus.LOCKED_FOR_VALIDATION.value,
+                        )
+                    )
+                )
+                .filter(Task.project_id.in_(uncached_ids))
+                .group_by(Task.project_id)
+            )
+            counts = dict(query.all())
+            for project_id in uncached_ids:
+                active_mappers[project_id] = counts.get(project_id, 0)
+                active_mappers_cache[hashkey(project_id)] = active_mappers[project_id]
+
+        return active_mappers
+
     def _get_project_and_base_dto(self):
         """Populates a project DTO with properties common to all roles"""
         base_dto = ProjectDTO()
@@ -1086,11 +1169,18 @@ class Project(db.Model):
         return self, base_dto
 
     def as_dto_for_mapping(
-        self, authenticated_user_id: int = None, locale: str = "en", abbrev: bool = True
+        self,
+        authenticated_user_id: int = None,
+        locale: str = "en",
+        abbrev: bool = True,
+        include_tasks: bool = True,
     ) -> Optional[ProjectDTO]:
         """Creates a Project DTO suitable for transmitting to mapper users"""
         project, project_dto = self._get_project_and_base_dto()
-        if abbrev is False:
+        if not include_tasks:
+            # The caller adds the task layer itself, see tasks_as_geojson_text
+            project_dto.tasks = None
+        elif abbrev is False:
             project_dto.tasks = Task.get_tasks_as_geojson_feature_collection(
                 self.id, None
             )
@@ -1120,12 +1210,20 @@ class Project(db.Model):
 
         return project_tasks
 
+    def tasks_as_geojson_text(
+        self, task_ids_str: str, order_by=None, order_by_type="ASC", status=None
+    ) -> str:
+        """Creates the geojson of all areas as JSON text built by the database"""
+        return Task.get_tasks_as_geojson_text(
+            self.id, task_ids_str, order_by, order_by_type, status
+        )
+
     @staticmethod
     def get_all_countries():
         query = (
-            db.session.query(func.unnest(Project.country).label("country"))
+            db.session.query(project_countries.c.country)
             .distinct()
-            .order_by("country")
+            .order_by(project_countries.c.country)
             .all()
         )
         tags_dto = TagsDTO()
@@ -1180,22 +1278,50 @@ class Project(db.Model):
         db.session.commit()
 
     @staticmethod
-    def get_project_campaigns(project_id: int):
+    def get_campaigns_for_projects(project_ids: list) -> dict:
+        """Get the campaigns of several projects as CampaignDTO lists, keyed by project ID"""
         query = (
-            Campaign.query.join(campaign_projects)
-            .filter(campaign_projects.c.project_id == project_id)
+            db.session.query(campaign_projects.c.project_id, Campaign.id, Campaign.name)
+            .join(Campaign, Campaign.id == campaign_projects.c.campaign_id)
+            .filter(campaign_projects.c.project_id.in_(project_ids))
+            .order_by(Campaign.id)
             .all()
         )
-        campaign_list = []
-        for campaign in query:
+        campaigns = {project_id: [] for project_id in project_ids}
+        for project_id, campaign_id, campaign_name in query:
             campaign_dto = CampaignDTO()
-            campaign_dto.id = campaign.id
-            campaign_dto.name = campaign.name
-
-            campaign_list.append(campaign_dto)
+            campaign_dto.id = campaign_id
+            campaign_dto.name = campaign_name
+            campaigns[project_id].append(campaign_dto)
 
-        return campaign_list
+        return campaigns
 
 
 # Add index on project geometry
 db.Index("idx_geometry", Project.geometry, postgresql_using="gist")
+
+
+@event.listens_for(Project, "after_insert")
+@event.listens_for(Project, "after_update")
+def _sync_project_countries(mapper, connection, target):
+    """Keeps project_countries in step with Project.country, within the same flush"""
+    country_history = inspect(target).attrs.country.history
+    if not country_history.has_changes():
+        return
+
+    connection.execute(
+        project_countries.delete().where(project_countries.c.project_id == target.id)
+    )
+    countries = [country for country in dict.fromkeys(target.country or []) if country]
+    if countries:
+        connection.execute(
+            project_countries.insert(),
+            [
+                {
+                    "project_id": target.id,
+                    "country": country,
+                    "country_key": country.lower(),
+                }
+                for country in countries
+            ],
+        )
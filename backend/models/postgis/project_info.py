@@ -1,6 +1,7 @@
 from flask import current_app
+from sqlalchemy import DDL, event
 from sqlalchemy.dialects.postgresql import TSVECTOR
-from typing import List
+from typing import Dict, List
 from backend import db
 from backend.models.dtos.project_dto import ProjectInfoDTO
 
@@ -19,12 +20,19 @@ class ProjectInfo(db.Model):
     project_id_str = db.Column(db.String)
     text_searchable = db.Column(
         TSVECTOR
-    )  # This contains searchable text and is populated by a DB Trigger
+    )  # Weighted name, id and descriptions, populated by a DB Trigger
     per_task_instructions = db.Column(db.String)
 
     __table_args__ = (
         db.Index("idx_project_info_composite", "locale", "project_id"),
         db.Index("textsearch_idx", "text_searchable"),
+        # Trigram index used by the substring and typo tolerant matching of project names
+        db.Index(
+            "idx_project_info_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
         {},
     )
 
@@ -91,6 +99,47 @@ class ProjectInfo(db.Model):
         # Pass thru default_locale in case of partial translation
         return project_info.get_dto(default_locale)
 
+    @staticmethod
+    def get_dtos_for_locale(projects, locale) -> Dict[int, ProjectInfoDTO]:
+        """
+        Batched version of get_dto_for_locale, resolves the info of several projects with a single query
+        :param projects: iterable of (project_id, default_locale) pairs
+        :param locale: locale requested by user
+        :raises: ValueError if no info found for Default Locale
+        :return: dict of ProjectInfoDTO keyed by project ID
+        """
+        default_locales = dict(projects)
+        if not default_locales:
+            return {}
+
+        locales = set(default_locales.values())
+        locales.add(locale)
+        project_infos = ProjectInfo.query.filter(
+            ProjectInfo.project_id.in_(default_locales.keys()),
+            ProjectInfo.locale.in_(locales),
+        ).all()
+        infos_by_key = {(info.project_id, info.locale): info for info in project_infos}
+
+        dtos = {}
+        for project_id, default_locale in default_locales.items():
+            project_info = infos_by_key.get((project_id, locale))
+            default_info = infos_by_key.get((project_id, default_locale))
+            if default_info is None:
+                error_message = (
+                    f"BAD DATA: no info for project {project_id}, locale: {locale}, "
+                    f"default {default_locale}"
+                )
+                current_app.logger.critical(error_message)
+                raise ValueError(error_message)
+
+            if project_info is None or locale == default_locale:
+                dtos[project_id] = default_info.get_dto()
+            else:
+                # Pass thru default_locale in case of partial translation
+                dtos[project_id] = project_info.get_dto(default_info)
+
+        return dtos
+
     def get_dto(self, default_locale=ProjectInfoDTO()) -> ProjectInfoDTO:
         """
         Get DTO for current ProjectInfo
@@ -128,3 +177,11 @@ class ProjectInfo(db.Model):
             project_info_dtos.append(project_info_dto)
 
         return project_info_dtos
+
+
+# gin_trgm_ops is provided by the pg_trgm extension, which has to exist before the table is created
+event.listen(
+    ProjectInfo.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"),
+)
@@ -2,17 +2,34 @@ import bleach
 import datetime
 import geojson
 import json
+import numpy as np
+import random
+import shapely
+import shapely.geometry
 from enum import Enum
 from flask import current_app
-from sqlalchemy.types import Float, Text
-from sqlalchemy import desc, cast, func, distinct
+from sqlalchemy.types import BigInteger, Float, Integer, Text, JSON
+from sqlalchemy import (
+    DDL,
+    desc,
+    cast,
+    func,
+    distinct,
+    case,
+    event,
+    extract,
+    insert,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
 from sqlalchemy.orm.exc import NoResultFound, MultipleResultsFound
-from sqlalchemy.orm.session import make_transient
 from geoalchemy2 import Geometry
 from typing import List
 
 from backend import db
-from backend.exceptions import NotFound
+from backend.exceptions import Conflict, NotFound
 from backend.models.dtos.mapping_dto import TaskDTO, TaskHistoryDTO
 from backend.models.dtos.validator_dto import MappedTasksByUser, MappedTasks
 from backend.models.dtos.project_dto import (
@@ -24,14 +41,17 @@ from backend.models.dtos.mapping_issues_dto import TaskMappingIssueDTO
 from backend.models.postgis.statuses import TaskStatus, MappingLevel
 from backend.models.postgis.user import User
 from backend.models.postgis.utils import (
+    CopyStream,
     InvalidData,
     InvalidGeoJson,
     ST_GeomFromGeoJSON,
     ST_SetSRID,
+    copy_text_value,
     timestamp,
     parse_duration,
 )
 from backend.models.postgis.task_annotation import TaskAnnotation
+from backend.models.postgis.priority_area import PriorityArea, project_priority_areas
 
 
 class TaskAction(Enum):
@@ -47,6 +67,27 @@ class TaskAction(Enum):
     EXTENDED_FOR_VALIDATION = 8
 
 
+# Lock actions of a task that are still open while they have no action text
+OPEN_LOCK_ACTIONS = [
+    TaskAction.LOCKED_FOR_MAPPING.name,
+    TaskAction.LOCKED_FOR_VALIDATION.name,
+    TaskAction.EXTENDED_FOR_MAPPING.name,
+    TaskAction.EXTENDED_FOR_VALIDATION.name,
+]
+
+# Statuses of the tasks that can be handed out for each lock action
+AVAILABLE_TASK_STATUSES = {
+    TaskAction.LOCKED_FOR_MAPPING: [
+        TaskStatus.READY.value,
+        TaskStatus.INVALIDATED.value,
+    ],
+    TaskAction.LOCKED_FOR_VALIDATION: [
+        TaskStatus.MAPPED.value,
+        TaskStatus.BADIMAGERY.value,
+    ],
+}
+
+
 class TaskInvalidationHistory(db.Model):
     """Describes the most recent history of task invalidation and subsequent validation"""
 
@@ -165,6 +206,80 @@ class TaskInvalidationHistory(db.Model):
         entry.is_closed = True
         entry.updated_date = timestamp()
 
+    @staticmethod
+    def record_invalidations(project_id: int, invalidator_id: int, histories):
+        """
+        Same as record_invalidation for many tasks with one statement each, committed by the caller
+        :param histories: id, task_id and action_date of the invalidating state changes
+        """
+        task_ids = [history.task_id for history in histories]
+        TaskInvalidationHistory.query.filter(
+            TaskInvalidationHistory.project_id == project_id,
+            TaskInvalidationHistory.task_id.in_(task_ids),
+            TaskInvalidationHistory.is_closed.is_(False),
+        ).update({"is_closed": True}, synchronize_session=False)
+
+        last_mapped = TaskHistory.get_last_mapped_actions(project_id, task_ids)
+        entries = [
+            dict(
+                project_id=project_id,
+                task_id=history.task_id,
+                is_closed=False,
+                invalidation_history_id=history.id,
+                mapper_id=last_mapped[history.task_id].user_id,
+                mapped_date=last_mapped[history.task_id].action_date,
+                invalidator_id=invalidator_id,
+                invalidated_date=history.action_date,
+                updated_date=timestamp(),
+            )
+            for history in histories
+            if history.task_id in last_mapped
+        ]
+        if entries:
+            db.session.execute(insert(TaskInvalidationHistory), entries)
+
+    @staticmethod
+    def record_validations(project_id: int, validator_id: int, histories):
+        """
+        Same as record_validation for many tasks with one statement each, committed by the caller
+        :param histories: id, task_id and action_date of the validating state changes
+        """
+        validated_dates = {
+            history.task_id: history.action_date for history in histories
+        }
+        open_entries = (
+            db.session.query(
+                TaskInvalidationHistory.id, TaskInvalidationHistory.task_id
+            )
+            .filter(
+                TaskInvalidationHistory.project_id == project_id,
+                TaskInvalidationHistory.task_id.in_(validated_dates.keys()),
+                TaskInvalidationHistory.is_closed.is_(False),
+            )
+            .all()
+        )
+        # If no open invalidation to update, then nothing to do
+        if not open_entries:
+            return
+
+        last_mapped = TaskHistory.get_last_mapped_actions(
+            project_id, [entry.task_id for entry in open_entries]
+        )
+        entries = []
+        for entry in open_entries:
+            values = dict(
+                id=entry.id,
+                validator_id=validator_id,
+                validated_date=validated_dates[entry.task_id],
+                is_closed=True,
+                updated_date=timestamp(),
+            )
+            if entry.task_id in last_mapped:
+                values["mapper_id"] = last_mapped[entry.task_id].user_id
+                values["mapped_date"] = last_mapped[entry.task_id].action_date
+            entries.append(values)
+        db.session.execute(update(TaskInvalidationHistory), entries)
+
 
 class TaskMappingIssue(db.Model):
     """Describes an issue (along with an occurrence count) with a
@@ -216,6 +331,8 @@ class TaskHistory(db.Model):
     action = db.Column(db.String, nullable=False)
     action_text = db.Column(db.String)
     action_date = db.Column(db.DateTime, nullable=False, default=timestamp)
+    # Whole seconds a lock lasted, set with the action text when the lock action is closed
+    duration_seconds = db.Column(db.Integer)
     user_id = db.Column(
         db.BigInteger,
         db.ForeignKey("users.id", name="fk_users"),
@@ -229,12 +346,30 @@ class TaskHistory(db.Model):
     actioned_by = db.relationship(User)
     task_mapping_issues = db.relationship(TaskMappingIssue, cascade="all")
 
+    # The history of a split task outlives it, the tasks split from it read it through their lineage,
+    # so task_id has no foreign key to the tasks
     __table_args__ = (
-        db.ForeignKeyConstraint(
-            [task_id, project_id], ["tasks.id", "tasks.project_id"], name="fk_tasks"
-        ),
         db.Index("idx_task_history_composite", "task_id", "project_id"),
         db.Index("idx_task_history_project_id_user_id", "user_id", "project_id"),
+        # Open lock actions are few, the auto-unlock sweep reads them by age
+        db.Index(
+            "idx_task_history_open_locks",
+            "action_date",
+            "project_id",
+            "task_id",
+            postgresql_where=db.and_(
+                action_text.is_(None), action.in_(OPEN_LOCK_ACTIONS)
+            ),
+        ),
+        # Time spent statistics sum the durations of the closed lock actions
+        db.Index(
+            "idx_task_history_lock_durations",
+            "project_id",
+            "action",
+            "user_id",
+            postgresql_include=["duration_seconds"],
+            postgresql_where=duration_seconds.isnot(None),
+        ),
         {},
     )
 
@@ -280,6 +415,26 @@ class TaskHistory(db.Model):
         db.session.delete(self)
         db.session.commit()
 
+    @staticmethod
+    def delete_for_tasks(project_id: int, task_ids: list):
+        """
+        Deletes the history of deleted tasks, with its mapping issues and invalidation history, committed by
+        the caller. The history of split tasks is kept for their lineage and deleted with the project
+        """
+        task_history_ids = db.session.query(TaskHistory.id).filter(
+            TaskHistory.project_id == project_id, TaskHistory.task_id.in_(task_ids)
+        )
+        db.session.query(TaskMappingIssue).filter(
+            TaskMappingIssue.task_history_id.in_(task_history_ids.scalar_subquery())
+        ).delete(synchronize_session=False)
+        db.session.query(TaskInvalidationHistory).filter(
+            TaskInvalidationHistory.project_id == project_id,
+            TaskInvalidationHistory.task_id.in_(task_ids),
+        ).delete(synchronize_session=False)
+        db.session.query(TaskHistory).filter(
+            TaskHistory.project_id == project_id, TaskHistory.task_id.in_(task_ids)
+        ).delete(synchronize_session=False)
+
     @staticmethod
     def update_task_locked_with_duration(
         task_id: int, project_id: int, lock_action, user_id: int, local_session=None
@@ -334,15 +489,22 @@ class TaskHistory(db.Model):
             return
 
         duration_task_locked = datetime.datetime.utcnow() - last_locked.action_date
-        # Cast duration to isoformat for later transmission via api
-        last_locked.action_text = (
-            (datetime.datetime.min + duration_task_locked).time().isoformat()
+        last_locked.duration_seconds = int(duration_task_locked.total_seconds())
+        last_locked.action_text = TaskHistory.lock_duration_text(
+            last_locked.duration_seconds
         )
         if local_session:
             local_session.commit()
         else:
             db.session.commit()
 
+    @staticmethod
+    def lock_duration_text(duration_seconds: int) -> str:
+        """Lock duration recorded as the text of a lock action, as HH:MM:SS with hours beyond a day kept"""
+        minutes, seconds = divmod(duration_seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
     @staticmethod
     def remove_duplicate_task_history_rows(
         task_id: int, project_id: int, lock_action: TaskStatus, user_id: int
@@ -366,43 +528,108 @@ class TaskHistory(db.Model):
 
     @staticmethod
     def update_expired_and_locked_actions(
-        project_id: int, task_id: int, expiry_date: datetime, action_text: str
+        expiry_date: datetime,
+        action_text: str,
+        duration_seconds: int,
+        project_id: int = None,
     ):
         """
-        Sets auto unlock state to all not finished actions, that are older then the expiry date.
-        Action is considered as a not finished, when it is in locked state and doesn't have action text
-        :param project_id: Project ID in scope
-        :param task_id: Task in scope
+        Sets auto unlock state to all not finished actions of locked tasks, that are older then the expiry
+        date, in a single statement. Action is considered as a not finished, when it is in locked state and
+        doesn't have action text
         :param expiry_date: Action created before this date is treated as expired
         :param action_text: Text which will be set for all changed actions
-        :return:
+        :param duration_seconds: Lock duration which will be set for all changed actions
+        :param project_id: Project ID in scope, all projects if None
+        :return: (project_id, task_id) of the changed actions, committed by the caller
         """
-        all_expired = TaskHistory.query.filter(
-            TaskHistory.task_id == task_id,
-            TaskHistory.project_id == project_id,
+        filters = [
             TaskHistory.action_text.is_(None),
-            TaskHistory.action.in_(
+            TaskHistory.action.in_(OPEN_LOCK_ACTIONS),
+            TaskHistory.action_date <= expiry_date,
+            Task.id == TaskHistory.task_id,
+            Task.project_id == TaskHistory.project_id,
+            Task.task_status.in_(
                 [
-                    TaskAction.LOCKED_FOR_VALIDATION.name,
-                    TaskAction.LOCKED_FOR_MAPPING.name,
-                    TaskAction.EXTENDED_FOR_MAPPING.name,
-                    TaskAction.EXTENDED_FOR_VALIDATION.name,
+                    TaskStatus.LOCKED_FOR_MAPPING.value,
+                    TaskStatus.LOCKED_FOR_VALIDATION.value,
                 ]
             ),
-            TaskHistory.action_date <= expiry_date,
-        ).all()
-
-        for task_history in all_expired:
-            unlock_action = (
-                TaskAction.AUTO_UNLOCKED_FOR_MAPPING
-                if task_history.action in ["LOCKED_FOR_MAPPING", "EXTENDED_FOR_MAPPING"]
-                else TaskAction.AUTO_UNLOCKED_FOR_VALIDATION
+        ]
+        if project_id is not None:
+            filters.append(TaskHistory.project_id == project_id)
+
+        return db.session.execute(
+            update(TaskHistory)
+            .where(*filters)
+            .values(
+                action=TaskHistory.auto_unlock_action(),
+                action_text=action_text,
+                duration_seconds=duration_seconds,
             )
+            .returning(TaskHistory.project_id, TaskHistory.task_id)
+            .execution_options(synchronize_session=False)
+        ).all()
 
-            task_history.set_auto_unlock_action(unlock_action)
-            task_history.action_text = action_text
+    @staticmethod
+    def auto_unlock_action():
+        """SQL expression of the auto unlock action closing an open lock action"""
+        return case(
+            (
+                TaskHistory.action.in_(
+                    [
+                        TaskAction.LOCKED_FOR_MAPPING.name,
+                        TaskAction.EXTENDED_FOR_MAPPING.name,
+                    ]
+                ),
+                TaskAction.AUTO_UNLOCKED_FOR_MAPPING.name,
+            ),
+            else_=TaskAction.AUTO_UNLOCKED_FOR_VALIDATION.name,
+        )
 
-        db.session.commit()
+    @staticmethod
+    def close_open_lock_actions(
+        project_id: int,
+        task_ids: list,
+        closed_date: datetime.datetime,
+        auto_unlock_after: datetime.timedelta = None,
+    ):
+        """
+        Closes the open lock actions of the supplied tasks in a single statement, committed by the caller
+        :param project_id: Project ID in scope
+        :param task_ids: Tasks in scope
+        :param closed_date: Date the locks ended, the duration of each lock is recorded with its action
+        :param auto_unlock_after: If supplied, the locks are recorded as auto unlocked after this long instead
+        """
+        if auto_unlock_after is None:
+            duration = closed_date - TaskHistory.action_date
+            duration_seconds = func.floor(extract("epoch", duration))
+            values = dict(
+                # Same text as lock_duration_text, hours are not wrapped into days
+                action_text=func.to_char(
+                    func.make_interval(0, 0, 0, 0, 0, 0, duration_seconds),
+                    "HH24:MI:SS",
+                ),
+                duration_seconds=cast(duration_seconds, Integer),
+            )
+        else:
+            duration_seconds = int(auto_unlock_after.total_seconds())
+            values = dict(
+                action=TaskHistory.auto_unlock_action(),
+                action_text=TaskHistory.lock_duration_text(duration_seconds),
+                duration_seconds=duration_seconds,
+            )
+        db.session.execute(
+            update(TaskHistory)
+            .where(
+                TaskHistory.project_id == project_id,
+                TaskHistory.task_id.in_(task_ids),
+                TaskHistory.action_text.is_(None),
+                TaskHistory.action.in_(OPEN_LOCK_ACTIONS),
+            )
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
 
     @staticmethod
     def get_all_comments(project_id: int) -> ProjectCommentsDTO:
@@ -437,25 +664,20 @@ class TaskHistory(db.Model):
     @staticmethod
     def get_last_status(project_id: int, task_id: int, for_undo: bool = False):
         """Get the status the task was set to the last time the task had a STATUS_CHANGE"""
-        result = (
-            db.session.query(TaskHistory.action_text)
-            .filter(
-                TaskHistory.project_id == project_id,
-                TaskHistory.task_id == task_id,
-                TaskHistory.action == TaskAction.STATE_CHANGE.name,
-            )
-            .order_by(TaskHistory.action_date.desc())
-            .all()
+        heads = (
+            db.session.query(Task.last_status, Task.previous_status)
+            .filter(Task.project_id == project_id, Task.id == task_id)
+            .one_or_none()
         )
 
-        if not result:
+        if heads is None or heads.last_status is None:
             return TaskStatus.READY  # No result so default to ready status
 
-        if len(result) == 1 and for_undo:
+        if for_undo and heads.previous_status is None:
             # We're looking for the previous status, however, there isn't any so we'll return Ready
             return TaskStatus.READY
 
-        if for_undo and result[0][0] in [
+        if for_undo and heads.last_status in [
             TaskStatus.MAPPED.name,
             TaskStatus.BADIMAGERY.name,
         ]:
@@ -464,20 +686,38 @@ class TaskHistory(db.Model):
 
         if for_undo:
             # Return the second last status which was status the task was previously set to
-            return TaskStatus[result[1][0]]
+            return TaskStatus[heads.previous_status]
         else:
-            return TaskStatus[result[0][0]]
+            return TaskStatus[heads.last_status]
+
+    @staticmethod
+    def get_last_statuses(project_id: int, task_ids: list) -> dict:
+        """Same as get_last_status for many tasks with one query, keyed by task id"""
+        last_statuses = db.session.query(Task.id, Task.last_status).filter(
+            Task.project_id == project_id,
+            Task.id.in_(task_ids),
+            Task.last_status.isnot(None),
+        )
+        statuses = dict.fromkeys(task_ids, TaskStatus.READY)
+        statuses.update(
+            (task.id, TaskStatus[task.last_status]) for task in last_statuses.all()
+        )
+        return statuses
+
+    @staticmethod
+    def get_head(project_id: int, task_id: int, head):
+        """Gets the task history record the supplied head column of the task points to"""
+        head_id = (
+            select(head)
+            .where(Task.project_id == project_id, Task.id == task_id)
+            .scalar_subquery()
+        )
+        return TaskHistory.query.filter(TaskHistory.id == head_id).one_or_none()
 
     @staticmethod
     def get_last_action(project_id: int, task_id: int):
         """Gets the most recent task history record for the task"""
-        return (
-            TaskHistory.query.filter(
-                TaskHistory.project_id == project_id, TaskHistory.task_id == task_id
-            )
-            .order_by(TaskHistory.action_date.desc())
-            .first()
-        )
+        return TaskHistory.get_head(project_id, task_id, Task.last_history_id)
 
     @staticmethod
     def get_last_action_of_type(
@@ -496,7 +736,10 @@ class TaskHistory(db.Model):
 
     @staticmethod
     def get_last_locked_action(project_id: int, task_id: int):
-        """Gets the most recent task history record with locked action for the task"""
+        """Gets the open lock action of the task, or the most recent locked action if no lock is open"""
+        open_lock = TaskHistory.get_head(project_id, task_id, Task.open_lock_history_id)
+        if open_lock is not None:
+            return open_lock
         return TaskHistory.get_last_action_of_type(
             project_id,
             task_id,
@@ -520,21 +763,22 @@ class TaskHistory(db.Model):
             ],
         )
 
+    @staticmethod
     def get_last_mapped_action(project_id: int, task_id: int):
         """Gets the most recent mapped action, if any, in the task history"""
-        return (
-            db.session.query(TaskHistory)
-            .filter(
-                TaskHistory.project_id == project_id,
-                TaskHistory.task_id == task_id,
-                TaskHistory.action == TaskAction.STATE_CHANGE.name,
-                TaskHistory.action_text.in_(
-                    [TaskStatus.BADIMAGERY.name, TaskStatus.MAPPED.name]
-                ),
+        return TaskHistory.get_head(project_id, task_id, Task.last_mapped_history_id)
+
+    @staticmethod
+    def get_last_mapped_actions(project_id: int, task_ids: list) -> dict:
+        """Same as get_last_mapped_action for many tasks with one query, keyed by task id"""
+        last_mapped = (
+            db.session.query(
+                TaskHistory.task_id, TaskHistory.user_id, TaskHistory.action_date
             )
-            .order_by(TaskHistory.action_date.desc())
-            .first()
+            .join(Task, Task.last_mapped_history_id == TaskHistory.id)
+            .filter(Task.project_id == project_id, Task.id.in_(task_ids))
         )
+        return {action.task_id: action for action in last_mapped.all()}
 
 
 class Task(db.Model):
@@ -564,10 +808,49 @@ class Task(db.Model):
     validated_by = db.Column(
         db.BigInteger, db.ForeignKey("users.id", name="fk_users_validator"), index=True
     )
+    # Id of the transaction that last changed the status, lock or mapper, set by the tasks_change_xid trigger
+    change_xid = db.Column(db.BigInteger, server_default="0", nullable=False)
+    # Heads of the task history, kept up to date by the task_history_heads triggers
+    last_history_id = db.Column(db.Integer)
+    last_action_date = db.Column(db.DateTime)
+    last_status = db.Column(db.String)
+    previous_status = db.Column(db.String)
+    open_lock_history_id = db.Column(db.Integer)
+    last_mapped_history_id = db.Column(db.Integer)
+    # Ids of the tasks this task was split from, parent first
+    lineage = db.Column(ARRAY(db.Integer))
+
+    __table_args__ = (
+        db.Index("idx_tasks_project_id_change_xid", "project_id", "change_xid", "id"),
+        # Tasks the lock-next allocator can hand out, scanned from a random id
+        db.Index(
+            "idx_tasks_available_for_mapping",
+            "project_id",
+            "id",
+            postgresql_where=task_status.in_(
+                AVAILABLE_TASK_STATUSES[TaskAction.LOCKED_FOR_MAPPING]
+            ),
+        ),
+        db.Index(
+            "idx_tasks_available_for_validation",
+            "project_id",
+            "id",
+            postgresql_where=task_status.in_(
+                AVAILABLE_TASK_STATUSES[TaskAction.LOCKED_FOR_VALIDATION]
+            ),
+        ),
+        {},
+    )
 
     # Mapped objects
+    # History is deleted with the project rather than its tasks, see Project.delete
     task_history = db.relationship(
-        TaskHistory, cascade="all", order_by=desc(TaskHistory.action_date)
+        TaskHistory,
+        primaryjoin="and_(Task.id == foreign(TaskHistory.task_id), "
+        "Task.project_id == foreign(TaskHistory.project_id))",
+        cascade="save-update, merge, refresh-expire, expunge",
+        passive_deletes="all",
+        order_by=desc(TaskHistory.action_date),
     )
     task_annotations = db.relationship(TaskAnnotation, cascade="all")
     lock_holder = db.relationship(User, foreign_keys=[locked_by])
@@ -586,17 +869,18 @@ class Task(db.Model):
             db.session.commit()
 
     def delete(self):
-        """Deletes the current model from the DB"""
+        """Deletes the current model from the DB, with its history"""
+        TaskHistory.delete_for_tasks(self.project_id, [self.id])
         db.session.delete(self)
         db.session.commit()
 
-    @classmethod
-    def from_geojson_feature(cls, task_id, task_feature):
+    @staticmethod
+    def validate_geojson_feature(task_feature) -> dict:
         """
-        Constructs and validates a task from a GeoJson feature object
-        :param task_id: Unique ID for the task
+        Validates a GeoJson feature object of a task
         :param task_feature: A geojson feature object
         :raises InvalidGeoJson, InvalidData
+        :return: Columns of the task set from the feature properties
         """
         if type(task_feature) is not geojson.Feature:
             raise InvalidGeoJson("MustBeFeature- Invalid GeoJson should be a feature")
@@ -611,28 +895,113 @@ class Task(db.Model):
                 "InvalidMultiPolygon - " + ", ".join(task_geometry.errors())
             )
 
-        task = cls()
+        return Task.columns_from_properties(task_feature.properties)
+
+    @staticmethod
+    def columns_from_properties(properties: dict) -> dict:
+        """
+        Columns of a task set from the properties of its GeoJson feature
+        :raises InvalidData: if an expected property is missing, or x, y or zoom is not an integer
+        """
         try:
-            task.x = task_feature.properties["x"]
-            task.y = task_feature.properties["y"]
-            task.zoom = task_feature.properties["zoom"]
-            task.is_square = task_feature.properties["isSquare"]
+            columns = dict(
+                x=properties["x"],
+                y=properties["y"],
+                zoom=properties["zoom"],
+                is_square=properties["isSquare"],
+            )
         except KeyError as e:
             raise InvalidData(
                 f"PropertyNotFound: Expected property not found: {str(e)}"
             )
 
-        if "extra_properties" in task_feature.properties:
-            task.extra_properties = json.dumps(
-                task_feature.properties["extra_properties"]
-            )
+        # Written as they are by COPY, where 12.0 is not a valid integer
+        for name in ("x", "y", "zoom"):
+            value = columns[name]
+            if value is None:
+                continue
+            try:
+                integral = float(value).is_integer()
+            except (TypeError, ValueError):
+                integral = False
+            if not integral:
+                raise InvalidData(
+                    f"InvalidProperty: Property {name} must be an integer: {value}"
+                )
+            columns[name] = int(float(value))
 
-        task.id = task_id
-        task_geojson = geojson.dumps(task_geometry)
+        if "extra_properties" in properties:
+            columns["extra_properties"] = json.dumps(properties["extra_properties"])
+
+        return columns
+
+    @classmethod
+    def from_geojson_feature(cls, task_id, task_feature):
+        """
+        Constructs and validates a task from a GeoJson feature object
+        :param task_id: Unique ID for the task
+        :param task_feature: A geojson feature object
+        :raises InvalidGeoJson, InvalidData
+        """
+        task = cls(id=task_id, **cls.validate_geojson_feature(task_feature))
+        task_geojson = geojson.dumps(task_feature.geometry)
         task.geometry = ST_SetSRID(ST_GeomFromGeoJSON(task_geojson), 4326)
 
         return task
 
+    @staticmethod
+    def copy_from_geojson_features(project_id: int, task_features):
+        """
+        Loads the tasks of a new project with one COPY, numbered from 1 in the order of the features. Rows
+        are built as the database reads them, so only a few features are held in memory at a time
+        :param project_id: ID of the project the tasks belong to
+        :param task_features: Iterable of the GeoJson features of the tasks as dicts, validated beforehand
+            with validate_geojson_feature, so they are not validated again
+        """
+        cursor = db.session.connection().connection.cursor()
+        cursor.copy_expert(
+            "COPY tasks (project_id, id, x, y, zoom, is_square, extra_properties, task_status, geometry) "
+            "FROM STDIN",
+            CopyStream(
+                Task.copy_row(
+                    project_id,
+                    task_id,
+                    Task.columns_from_properties(task_feature["properties"]),
+                    task_feature["geometry"],
+                )
+                for task_id, task_feature in enumerate(task_features, start=1)
+            ),
+        )
+
+    @staticmethod
+    def copy_row(project_id: int, task_id: int, columns: dict, geometry: dict) -> str:
+        """
+        Line of COPY data of a task of a new project, with the geometry as hex EWKB. Coordinates are rounded
+        as geojson rounds them for tasks created with from_geojson_feature
+        :param columns: Columns of the task set from the feature properties
+        :param geometry: GeoJson MultiPolygon of the task
+        """
+        task_geometry = shapely.transform(
+            shapely.geometry.shape(geometry),
+            lambda coordinates: np.round(
+                coordinates, geojson.geometry.DEFAULT_PRECISION
+            ),
+        )
+        values = [
+            project_id,
+            task_id,
+            columns["x"],
+            columns["y"],
+            columns["zoom"],
+            columns["is_square"],
+            columns.get("extra_properties"),
+            TaskStatus.READY.value,
+            shapely.to_wkb(
+                shapely.set_srid(task_geometry, 4326), hex=True, include_srid=True
+            ),
+        ]
+        return "\t".join(copy_text_value(value) for value in values) + "\n"
+
     @staticmethod
     def get(task_id: int, project_id: int, local_session=None):
         """
@@ -674,54 +1043,49 @@ class Task(db.Model):
         return parse_duration(current_app.config["TASK_AUTOUNLOCK_AFTER"])
 
     @staticmethod
-    def auto_unlock_tasks(project_id: int):
-        """Unlock all tasks locked for longer than the auto-unlock delta"""
+    def auto_unlock_tasks(project_id: int = None) -> list:
+        """
+        Unlock all tasks locked for longer than the auto-unlock delta, of all projects if no project is
+        supplied. Expired lock actions are closed and the tasks set back to their last status with one
+        statement each, committed by the caller.
+        :return: project_id, id, task_status, locked_by and mapped_by of the unlocked tasks
+        """
         expiry_delta = Task.auto_unlock_delta()
-        lock_duration = (datetime.datetime.min + expiry_delta).time().isoformat()
+        duration_seconds = int(expiry_delta.total_seconds())
+        lock_duration = TaskHistory.lock_duration_text(duration_seconds)
         expiry_date = datetime.datetime.utcnow() - expiry_delta
 
-        old_tasks = (
-            db.session.query(Task.id)
-            .filter(Task.id == TaskHistory.task_id)
-            .filter(Task.project_id == TaskHistory.project_id)
-            .filter(Task.task_status.in_([1, 3]))
-            .filter(
-                TaskHistory.action.in_(
-                    [
-                        "EXTENDED_FOR_MAPPING",
-                        "EXTENDED_FOR_VALIDATION",
-                        "LOCKED_FOR_VALIDATION",
-                        "LOCKED_FOR_MAPPING",
-                    ]
-                )
-            )
-            .filter(TaskHistory.action_text.is_(None))
-            .filter(Task.project_id == project_id)
-            .filter(TaskHistory.action_date <= str(expiry_date))
-        )
-
-        if old_tasks.count() == 0:
-            # no tasks older than the delta found, return without further processing
-            return
-
-        for old_task in old_tasks:
-            task = Task.get(old_task[0], project_id)
-            task.auto_unlock_expired_tasks(expiry_date, lock_duration)
-
-    def auto_unlock_expired_tasks(self, expiry_date, lock_duration):
-        """Unlock all tasks locked before expiry date. Clears task lock if needed"""
-        TaskHistory.update_expired_and_locked_actions(
-            self.project_id, self.id, expiry_date, lock_duration
-        )
-
-        last_action = TaskHistory.get_last_locked_or_auto_unlocked_action(
-            self.project_id, self.id
+        expired = TaskHistory.update_expired_and_locked_actions(
+            expiry_date, lock_duration, duration_seconds, project_id
         )
-        if last_action.action in [
-            "AUTO_UNLOCKED_FOR_MAPPING",
-            "AUTO_UNLOCKED_FOR_VALIDATION",
-        ]:
-            self.clear_lock()
+        if not expired:
+            return []
+
+        return db.session.execute(
+            update(Task)
+            .where(
+                tuple_(Task.project_id, Task.id).in_({tuple(row) for row in expired}),
+                # A task stays locked if it was locked again after the expired action
+                Task.open_lock_history_id.is_(None),
+            )
+            .values(
+                # Same as TaskHistory.get_last_status, READY if the task never changed state
+                task_status=case(
+                    {status.name: status.value for status in TaskStatus},
+                    value=Task.last_status,
+                    else_=TaskStatus.READY.value,
+                ),
+                locked_by=None,
+            )
+            .returning(
+                Task.project_id,
+                Task.id,
+                Task.task_status,
+                Task.locked_by,
+                Task.mapped_by,
+            )
+            .execution_options(synchronize_session=False)
+        ).all()
 
     def is_mappable(self):
         """Determines if task in scope is in suitable state for mapping"""
@@ -782,14 +1146,129 @@ class Task(db.Model):
         self.locked_by = user_id
         self.update()
 
+    @staticmethod
+    def lock_tasks(project_id: int, tasks: list, user_id: int, lock_action: TaskAction):
+        """
+        Locks the supplied tasks, already checked by the caller, in one transaction. The task rows are locked
+        with SELECT ... FOR UPDATE SKIP LOCKED, so a task being locked by another transaction, or whose status
+        or lock changed since it was checked, is a conflict and none of the tasks are locked.
+        :param project_id: Project ID in scope
+        :param tasks: Tasks in scope, as they were checked
+        :param user_id: ID of user locking the tasks
+        :param lock_action: Either LOCKED_FOR_MAPPING or LOCKED_FOR_VALIDATION
+        :raises Conflict: With the ids of the conflicting tasks
+        :return: The locked tasks
+        """
+        checked = {task.id: (task.task_status, task.locked_by) for task in tasks}
+        locked_tasks = (
+            Task.query.filter(
+                Task.project_id == project_id, Task.id.in_(checked.keys())
+            )
+            .order_by(Task.id)
+            .with_for_update(skip_locked=True)
+            .populate_existing()
+            .all()
+        )
+        unchanged = {
+            task.id
+            for task in locked_tasks
+            if (task.task_status, task.locked_by) == checked[task.id]
+        }
+        conflicts = sorted(set(checked) - unchanged)
+        if conflicts:
+            db.session.rollback()
+            raise Conflict(sub_code="TASKS_LOCK_CONFLICT", task_ids=conflicts)
+
+        # Using a slightly evil side effect of Actions and Statuses having the same name here :)
+        lock_status = TaskStatus[lock_action.name]
+        for task in locked_tasks:
+            task.set_task_history(lock_action, user_id)
+            task.task_status = lock_status.value
+            task.locked_by = user_id
+        db.session.commit()
+        return locked_tasks
+
+    @staticmethod
+    def lock_next(
+        project_id: int,
+        user_id: int,
+        lock_action: TaskAction,
+        excluded_mapper: int = None,
+        prefer_priority_areas: bool = False,
+    ):
+        """
+        Picks an available task at random and locks it in one transaction. Available tasks are scanned in id
+        order from a random id, wrapping around once, and tasks other transactions are locking are skipped,
+        so concurrent requests get different tasks without waiting on each other.
+        :param project_id: Project ID in scope
+        :param user_id: ID of user locking the task
+        :param lock_action: Either LOCKED_FOR_MAPPING or LOCKED_FOR_VALIDATION
+        :param excluded_mapper: Tasks mapped by this user are not handed out
+        :param prefer_priority_areas: Hand out tasks intersecting the priority areas of the project first
+        :return: The locked task, None if no task is available
+        """
+        max_task_id = (
+            db.session.query(func.max(Task.id))
+            .filter(Task.project_id == project_id)
+            .scalar()
+        )
+        if max_task_id is None:
+            return None
+
+        filters = [
+            Task.project_id == project_id,
+            Task.task_status.in_(AVAILABLE_TASK_STATUSES[lock_action]),
+        ]
+        if excluded_mapper is not None:
+            filters.append(
+                db.or_(Task.mapped_by.is_(None), Task.mapped_by != excluded_mapper)
+            )
+        candidates = [filters]
+        if prefer_priority_areas:
+            in_priority_area = (
+                select(project_priority_areas.c.project_id)
+                .join(
+                    PriorityArea,
+                    PriorityArea.id == project_priority_areas.c.priority_area_id,
+                )
+                .where(
+                    project_priority_areas.c.project_id == Task.project_id,
+                    func.ST_Intersects(PriorityArea.geometry, Task.geometry),
+                )
+                .exists()
+            )
+            candidates.insert(0, filters + [in_priority_area])
+
+        start_id = random.randint(1, max_task_id)
+        for candidate_filters in candidates:
+            for id_filter in [Task.id >= start_id, Task.id < start_id]:
+                task = (
+                    Task.query.filter(*candidate_filters, id_filter)
+                    .order_by(Task.id)
+                    .limit(1)
+                    .with_for_update(skip_locked=True)
+                    .populate_existing()
+                    .one_or_none()
+                )
+                if task is None:
+                    continue
+                if lock_action == TaskAction.LOCKED_FOR_MAPPING:
+                    task.lock_task_for_mapping(user_id)
+                else:
+                    task.lock_task_for_validating(user_id)
+                return task
+
+        db.session.rollback()
+        return None
+
     def reset_task(self, user_id: int):
-        expiry_delta = Task.auto_unlock_delta()
-        lock_duration = (datetime.datetime.min + expiry_delta).time().isoformat()
+        duration_seconds = int(Task.auto_unlock_delta().total_seconds())
+        lock_duration = TaskHistory.lock_duration_text(duration_seconds)
         if TaskStatus(self.task_status) in [
             TaskStatus.LOCKED_FOR_MAPPING,
             TaskStatus.LOCKED_FOR_VALIDATION,
         ]:
-            self.record_auto_unlock(lock_duration)
+            self.record_auto_unlock(lock_duration, duration_seconds)
 
         self.set_task_history(TaskAction.STATE_CHANGE, user_id, None, TaskStatus.READY)
         self.mapped_by = None
@@ -811,12 +1290,74 @@ class Task(db.Model):
         # Set locked_by to null and status to last status on task
         self.clear_lock()
 
-    def record_auto_unlock(self, lock_duration):
+    def split_into(self, new_tasks: list, user_id: int) -> list:
+        """
+        Replaces the task with the tasks split from it in a handful of statements, committed by the caller.
+        The history of the task is kept, the new tasks point at it through their lineage.
+        :param new_tasks: Tasks built from the split geometries, with their ids set
+        :param user_id: ID of user splitting the task
+        :return: The new tasks
+        """
+        action_date = timestamp()
+        TaskHistory.close_open_lock_actions(self.project_id, [self.id], action_date)
+
+        lineage = [self.id] + (self.lineage or [])
+        new_task_ids = [task.id for task in new_tasks]
+        db.session.execute(
+            insert(Task).values(
+                [
+                    dict(
+                        id=task.id,
+                        project_id=self.project_id,
+                        x=task.x,
+                        y=task.y,
+                        zoom=task.zoom,
+                        is_square=task.is_square,
+                        extra_properties=task.extra_properties,
+                        geometry=task.geometry,
+                        task_status=TaskStatus.READY.value,
+                        lineage=lineage,
+                    )
+                    for task in new_tasks
+                ]
+            )
+        )
+        db.session.execute(
+            insert(TaskHistory),
+            [
+                dict(
+                    project_id=self.project_id,
+                    task_id=task_id,
+                    action=TaskAction.STATE_CHANGE.name,
+                    action_text=status.name,
+                    action_date=action_date,
+                    user_id=user_id,
+                )
+                for status in [TaskStatus.SPLIT, TaskStatus.READY]
+                for task_id in new_task_ids
+            ],
+        )
+
+        # The invalidation history refers to the task, unlike its history
+        TaskInvalidationHistory.query.filter_by(
+            project_id=self.project_id, task_id=self.id
+        ).delete(synchronize_session=False)
+        db.session.delete(self)
+
+        return (
+            Task.query.filter(
+                Task.project_id == self.project_id, Task.id.in_(new_task_ids)
+            )
+            .order_by(Task.id)
+            .all()
+        )
+
+    def record_auto_unlock(self, lock_duration, duration_seconds: int = None):
         locked_user = self.locked_by
         last_action = TaskHistory.get_last_locked_action(self.project_id, self.id)
         next_action = (
             TaskAction.AUTO_UNLOCKED_FOR_MAPPING
-            if last_action.action == "LOCKED_FOR_MAPPING"
+            if last_action.action in ["LOCKED_FOR_MAPPING", "EXTENDED_FOR_MAPPING"]
             else TaskAction.AUTO_UNLOCKED_FOR_VALIDATION
         )
 
@@ -825,6 +1366,7 @@ class Task(db.Model):
         # Add AUTO_UNLOCKED action in the task history
         auto_unlocked = self.set_task_history(action=next_action, user_id=locked_user)
         auto_unlocked.action_text = lock_duration
+        auto_unlocked.duration_seconds = duration_seconds
         self.update()
 
     def unlock_task(
@@ -950,51 +1492,9 @@ class Task(db.Model):
             # subquery,
         )
 
-        filters = [Task.project_id == project_id]
-
-        if task_ids_str:
-            task_ids = list(map(int, task_ids_str.split(",")))
-            tasks = Task.get_tasks(project_id, task_ids)
-            if not tasks or len(tasks) == 0:
-                raise NotFound(
-                    sub_code="TASKS_NOT_FOUND", tasks=task_ids, project_id=project_id
-                )
-            else:
-                tasks_filters = [task.id for task in tasks]
-            filters = [Task.project_id == project_id, Task.id.in_(tasks_filters)]
-        else:
-            tasks = Task.get_all_tasks(project_id)
-            if not tasks or len(tasks) == 0:
-                raise NotFound(sub_code="TASKS_NOT_FOUND", project_id=project_id)
-
-        if status:
-            filters.append(Task.task_status == status)
-
-        if order_by == "effort_prediction":
-            query = query.outerjoin(TaskAnnotation).filter(*filters)
-            if order_by_type == "DESC":
-                query = query.order_by(
-                    desc(
-                        cast(
-                            cast(TaskAnnotation.properties["building_area_diff"], Text),
-                            Float,
-                        )
-                    )
-                )
-            else:
-                query = query.order_by(
-                    cast(
-                        cast(TaskAnnotation.properties["building_area_diff"], Text),
-                        Float,
-                    )
-                )
-        # elif order_by == "last_updated":
-        #     if order_by_type == "DESC":
-        #         query = query.filter(*filters).order_by(desc("update_date"))
-        #     else:
-        #         query = query.filter(*filters).order_by("update_date")
-        else:
-            query = query.filter(*filters)
+        query = Task.filter_tasks_for_geojson(
+            query, project_id, task_ids_str, order_by, order_by_type, status
+        )
 
         project_tasks = query.all()
 
@@ -1019,6 +1519,150 @@ class Task(db.Model):
 
         return geojson.FeatureCollection(tasks_features)
 
+    @staticmethod
+    def effort_prediction():
+        """Effort prediction of a task from its annotation, the project task layers can be sorted by"""
+        return cast(cast(TaskAnnotation.properties["building_area_diff"], Text), Float)
+
+    @staticmethod
+    def filter_tasks_for_geojson(
+        query, project_id, task_ids_str, order_by, order_by_type, status
+    ):
+        """
+        Applies the filters and ordering of the project task layers to a query of tasks
+        :raises NotFound: if the project has none of the requested tasks
+        """
+        filters = [Task.project_id == project_id]
+        task_ids = None
+        if task_ids_str:
+            task_ids = list(map(int, task_ids_str.split(",")))
+            filters.append(Task.id.in_(task_ids))
+
+        if not db.session.query(
+            db.session.query(Task.id).filter(*filters).exists()
+        ).scalar():
+            if task_ids:
+                raise NotFound(
+                    sub_code="TASKS_NOT_FOUND", tasks=task_ids, project_id=project_id
+                )
+            raise NotFound(sub_code="TASKS_NOT_FOUND", project_id=project_id)
+
+        if status:
+            filters.append(Task.task_status == status)
+
+        if order_by == "effort_prediction":
+            effort_prediction = Task.effort_prediction()
+            if order_by_type == "DESC":
+                effort_prediction = desc(effort_prediction)
+            query = (
+                query.outerjoin(TaskAnnotation)
+                .filter(*filters)
+                .order_by(effort_prediction, Task.id)
+            )
+        else:
+            query = query.filter(*filters).order_by(Task.id)
+
+        return query
+
+    @staticmethod
+    def get_tasks_as_geojson_text(
+        project_id,
+        task_ids_str: str = None,
+        order_by: str = None,
+        order_by_type: str = "ASC",
+        status: int = None,
+    ) -> str:
+        """
+        Same FeatureCollection as get_tasks_as_geojson_feature_collection, assembled by the database as
+        JSON text so that it can be sent as is without building a Python object per task
+        """
+        feature = func.json_build_object(
+            "type",
+            "Feature",
+            "geometry",
+            cast(Task.geometry.ST_AsGeoJSON(), JSON),
+            "properties",
+            func.json_build_object(
+                "taskId",
+                Task.id,
+                "taskX",
+                Task.x,
+                "taskY",
+                Task.y,
+                "taskZoom",
+                Task.zoom,
+                "taskIsSquare",
+                Task.is_square,
+                "taskStatus",
+                case(
+                    {state.value: state.name for state in TaskStatus},
+                    value=Task.task_status,
+                ),
+                "lockedBy",
+                Task.locked_by,
+                "mappedBy",
+                Task.mapped_by,
+            ),
+        ).label("feature")
+        # The sort keys are selected so that the features are ordered by json_agg itself
+        columns = [feature, Task.id.label("task_id")]
+        if order_by == "effort_prediction":
+            columns.append(Task.effort_prediction().label("effort_prediction"))
+        features = (
+            Task.filter_tasks_for_geojson(
+                db.session.query(*columns),
+                project_id,
+                task_ids_str,
+                order_by,
+                order_by_type,
+                status,
+            )
+            .order_by(None)
+            .subquery()
+        )
+        sort_keys = [features.c.task_id]
+        if order_by == "effort_prediction":
+            effort_prediction = features.c.effort_prediction
+            if order_by_type == "DESC":
+                effort_prediction = desc(effort_prediction)
+            sort_keys.insert(0, effort_prediction)
+
+        feature_collection = func.json_build_object(
+            "type",
+            "FeatureCollection",
+            "features",
+            func.coalesce(
+                func.json_agg(aggregate_order_by(features.c.feature, *sort_keys)),
+                cast("[]", JSON),
+            ),
+        )
+        return db.session.query(cast(feature_collection, Text)).scalar()
+
+    @staticmethod
+    def get_state_changes(project_id: int, after=None, limit: int = None):
+        """
+        Returns the tasks of the project whose status, lock or mapper changed after the (change_xid, id)
+        cursor, oldest change first. Changes of transactions that were still running when the query
+        started are held back, so resuming from the last returned task never skips a later commit.
+        """
+        snapshot_xmin = select(
+            cast(
+                cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), Text),
+                BigInteger,
+            )
+        ).scalar_subquery()
+        query = db.session.query(
+            Task.change_xid,
+            Task.id,
+            Task.task_status,
+            Task.locked_by,
+            Task.mapped_by,
+        ).filter(Task.project_id == project_id, Task.change_xid < snapshot_xmin)
+        if after is not None:
+            query = query.filter(tuple_(Task.change_xid, Task.id) > tuple_(*after))
+
+        return query.order_by(Task.change_xid, Task.id).limit(limit).all()
+
     @staticmethod
     def get_tasks_as_geojson_feature_collection_no_geom(project_id):
         """
@@ -1094,7 +1738,8 @@ class Task(db.Model):
 
     @staticmethod
     def get_max_task_id_for_project(project_id: int):
-        """Gets the nights task id currently in use on a project"""
+        """Gets the highest task id used on a project, including split tasks whose history is kept for
+        their lineage, so that new tasks never take over the history of a split task"""
         result = (
             db.session.query(func.max(Task.id))
             .filter(Task.project_id == project_id)
@@ -1102,8 +1747,13 @@ class Task(db.Model):
         )
         if result.count() == 0:
             raise NotFound(sub_code="TASKS_NOT_FOUND", project_id=project_id)
+        max_history_task_id = (
+            db.session.query(func.max(TaskHistory.task_id))
+            .filter(TaskHistory.project_id == project_id)
+            .scalar()
+        )
         for row in result:
-            return row[0]
+            return max(row[0], max_history_task_id or 0)
 
     def as_dto(
         self,
@@ -1126,7 +1776,7 @@ class Task(db.Model):
     def as_dto_with_instructions(self, preferred_locale: str = "en") -> TaskDTO:
         """Get dto with any task instructions"""
         task_history = []
-        for action in self.task_history:
+        for action in self.get_task_history():
             history = TaskHistoryDTO()
             history.history_id = action.id
             history.action = action.action
@@ -1202,17 +1852,19 @@ class Task(db.Model):
             pass
         return instructions
 
-    def copy_task_history(self) -> list:
-        copies = []
-        for entry in self.task_history:
-            db.session.expunge(entry)
-            make_transient(entry)
-            entry.id = None
-            entry.task_id = None
-            db.session.add(entry)
-            copies.append(entry)
+    def get_task_history(self) -> list:
+        """Gets the history of the task and of the tasks it was split from, newest first"""
+        if not self.lineage:
+            return self.task_history
 
-        return copies
+        return (
+            TaskHistory.query.filter(
+                TaskHistory.project_id == self.project_id,
+                TaskHistory.task_id.in_([self.id] + self.lineage),
+            )
+            .order_by(desc(TaskHistory.action_date), desc(TaskHistory.id))
+            .all()
+        )
 
     def get_locked_tasks_for_user(user_id: int):
         """Gets tasks on project owned by specified user id"""
@@ -1231,3 +1883,117 @@ class Task(db.Model):
         locked_tasks = [task for task in tasks]
 
         return locked_tasks
+
+
+# Stamps tasks with the id of the transaction changing them, read by the task state change feed
+tasks_change_xid_trigger = DDL(
+    """
+    CREATE OR REPLACE FUNCTION tasks_change_xid_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.change_xid := pg_current_xact_id()::text::bigint;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE TRIGGER tasks_change_xid BEFORE INSERT OR UPDATE OF task_status, locked_by, mapped_by
+    ON tasks FOR EACH ROW EXECUTE FUNCTION tasks_change_xid_update();
+    """
+)
+event.listen(Task.__table__, "after_create", tasks_change_xid_trigger)
+
+
+# Columns of the task history heads, aggregated over a set of task history rows ordered newest first
+TASK_HISTORY_HEADS = """
+    (array_agg(id ORDER BY action_date DESC, id DESC))[1] AS last_history_id,
+    max(action_date) AS last_action_date,
+    count(*) FILTER (WHERE action = 'STATE_CHANGE') AS state_changes,
+    (array_agg(action_text ORDER BY action_date DESC, id DESC)
+        FILTER (WHERE action = 'STATE_CHANGE'))[1] AS last_status,
+    (array_agg(action_text ORDER BY action_date DESC, id DESC)
+        FILTER (WHERE action = 'STATE_CHANGE'))[2] AS previous_status,
+    max(id) FILTER (
+        WHERE action_text IS NULL AND action IN (
+            'LOCKED_FOR_MAPPING', 'LOCKED_FOR_VALIDATION', 'EXTENDED_FOR_MAPPING', 'EXTENDED_FOR_VALIDATION'
+        )
+    ) AS open_lock_history_id,
+    (array_agg(id ORDER BY action_date DESC, id DESC)
+        FILTER (WHERE action = 'STATE_CHANGE' AND action_text IN ('MAPPED', 'BADIMAGERY')))[1]
+        AS last_mapped_history_id
+"""
+
+# Keeps the task history heads of the tasks up to date with one statement per task history statement,
+# so that reading the last status, open lock or last mapped action of a task does not scan its history
+task_history_heads_triggers = DDL(
+    f"""
+    CREATE OR REPLACE FUNCTION task_history_heads_insert() RETURNS trigger AS $$
+    BEGIN
+        UPDATE tasks SET
+            last_history_id = heads.last_history_id,
+            last_action_date = heads.last_action_date,
+            last_status = COALESCE(heads.last_status, tasks.last_status),
+            previous_status = CASE heads.state_changes
+                WHEN 0 THEN tasks.previous_status
+                WHEN 1 THEN tasks.last_status
+                ELSE heads.previous_status
+            END,
+            open_lock_history_id = COALESCE(heads.open_lock_history_id, tasks.open_lock_history_id),
+            last_mapped_history_id = COALESCE(heads.last_mapped_history_id, tasks.last_mapped_history_id)
+        FROM (
+            SELECT project_id, task_id, {TASK_HISTORY_HEADS}
+            FROM inserted_history
+            GROUP BY project_id, task_id
+        ) heads
+        WHERE tasks.project_id = heads.project_id AND tasks.id = heads.task_id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION task_history_heads_update() RETURNS trigger AS $$
+    BEGIN
+        -- Lock actions are closed by setting their action text
+        UPDATE tasks SET open_lock_history_id = NULL
+        FROM updated_history
+        WHERE tasks.project_id = updated_history.project_id
+            AND tasks.id = updated_history.task_id
+            AND tasks.open_lock_history_id = updated_history.id
+            AND updated_history.action_text IS NOT NULL;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION task_history_heads_delete() RETURNS trigger AS $$
+    BEGIN
+        -- Deleting history is rare, the heads of the tasks are aggregated again
+        UPDATE tasks SET
+            last_history_id = heads.last_history_id,
+            last_action_date = heads.last_action_date,
+            last_status = heads.last_status,
+            previous_status = heads.previous_status,
+            open_lock_history_id = heads.open_lock_history_id,
+            last_mapped_history_id = heads.last_mapped_history_id
+        FROM (
+            SELECT affected.project_id, affected.task_id, {TASK_HISTORY_HEADS}
+            FROM (SELECT DISTINCT project_id, task_id FROM deleted_history) affected
+            LEFT JOIN task_history
+                ON task_history.project_id = affected.project_id AND task_history.task_id = affected.task_id
+            GROUP BY affected.project_id, affected.task_id
+        ) heads
+        WHERE tasks.project_id = heads.project_id AND tasks.id = heads.task_id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE TRIGGER task_history_heads_insert AFTER INSERT ON task_history
+    REFERENCING NEW TABLE AS inserted_history
+    FOR EACH STATEMENT EXECUTE FUNCTION task_history_heads_insert();
+
+    CREATE TRIGGER task_history_heads_update AFTER UPDATE ON task_history
+    REFERENCING NEW TABLE AS updated_history
+    FOR EACH STATEMENT EXECUTE FUNCTION task_history_heads_update();
+
+    CREATE TRIGGER task_history_heads_delete AFTER DELETE ON task_history
+    REFERENCING OLD TABLE AS deleted_history
+    FOR EACH STATEMENT EXECUTE FUNCTION task_history_heads_delete();
+    """
+)
+event.listen(TaskHistory.__table__, "after_create", task_history_heads_triggers)
@@ -4,6 +4,8 @@ import re
 from flask import current_app
 from geoalchemy2 import Geometry
 from geoalchemy2.functions import GenericFunction
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
 
 
 class NotFound(Exception):
@@ -130,11 +132,66 @@ class ST_Y(GenericFunction):
     type = Geometry
 
 
+class ExplainJson(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a statement, compiled and bound as the statement itself would be"""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(ExplainJson)
+def compile_explain_json(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
 def timestamp():
     """Used in SQL Alchemy models to ensure we refresh timestamp when new models initialised"""
     return datetime.datetime.utcnow()
 
 
+def copy_text_value(value) -> str:
+    """Formats a value as a column of a row of COPY data in text format"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class CopyStream:
+    """
+    File like object serving the lines of an iterator as the data of a COPY FROM STDIN, so the lines are
+    only built as the database reads them
+    """
+
+    def __init__(self, lines):
+        self.lines = iter(lines)
+        self.pending = ""
+
+    def read(self, size=-1) -> str:
+        chunks = [self.pending]
+        length = len(self.pending)
+        while size < 0 or length < size:
+            line = next(self.lines, None)
+            if line is None:
+                break
+            chunks.append(line)
+            length += len(line)
+        data = "".join(chunks)
+        if size < 0:
+            size = len(data)
+        self.pending = data[size:]
+        return data[:size]
+
+
 # Based on https://stackoverflow.com/a/51916936
 duration_regex = re.compile(
     r"^((?P<days>[\.\d]+?)d)?((?P<hours>[\.\d]+?)h)?((?P<minutes>[\.\d]+?)m)?((?P<seconds>[\.\d]+?)s)?$"
@@ -1,11 +1,21 @@
 import geojson
 import json
+import numpy as np
 from shapely.geometry import MultiPolygon, mapping
 from shapely.ops import unary_union
 import shapely.geometry
 from flask import current_app
 from backend.models.dtos.grid_dto import GridDTO
-from backend.models.postgis.utils import InvalidGeoJson
+from backend.models.postgis.utils import InvalidData, InvalidGeoJson
+from backend.services.grid.web_mercator import (
+    tile_range,
+    tile_rings,
+    tile_zoom_for_area,
+)
+
+# Zoom levels of the square task grids generated by the server
+MIN_GRID_ZOOM = 1
+MAX_GRID_ZOOM = 20
 
 
 class GridServiceError(Exception):
@@ -25,38 +35,175 @@ class GridService:
         :param grid_dto: the dto containing
         :return: geojson.FeatureCollection trimmed task grid
         """
-        # get items out of the dto
-        grid = geojson.loads(geojson.dumps(grid_dto.grid))
-        aoi = geojson.loads(geojson.dumps(grid_dto.area_of_interest))
+        features = grid_dto.grid["features"]
         clip_to_aoi = grid_dto.clip_to_aoi
 
         # create a shapely shape from the aoi
         aoi_multi_polygon_geojson = GridService.merge_to_multi_polygon(
-            aoi, dissolve=True
+            grid_dto.area_of_interest, dissolve=True
         )
-
         aoi_multi_polygon = shapely.geometry.shape(aoi_multi_polygon_geojson)
+
+        # Coordinates are rounded as geojson does with the aoi, so that squares sharing an edge with the
+        # aoi are not kept for a sliver
+        tiles = shapely.transform(
+            shapely.from_geojson(
+                [json.dumps(feature["geometry"]) for feature in features]
+            ),
+            lambda coordinates: np.round(
+                coordinates, geojson.geometry.DEFAULT_PRECISION
+            ),
+        )
+        within, intersections = GridService._intersect_tiles(aoi_multi_polygon, tiles)
+
+        intersecting = GridService._intersecting_indexes(within, intersections)
         intersecting_features = []
-        for feature in grid["features"]:
-            # create a shapely shape for the tile
-            tile = shapely.geometry.shape(feature["geometry"])
-            if aoi_multi_polygon.contains(tile):
-                # tile is completely within aoi, use as is
-                intersecting_features.append(feature)
-            else:
-                intersection = aoi_multi_polygon.intersection(tile)
-                if intersection.is_empty or intersection.geom_type not in [
-                    "Polygon",
-                    "MultiPolygon",
-                ]:
-                    continue  # this intersections which are not polygons or which are completely outside aoi
+        for index, geometry in zip(
+            intersecting.tolist(), shapely.to_geojson(tiles[intersecting])
+        ):
+            feature = dict(features[index], geometry=json.loads(geometry))
+            if index in intersections:
                 # tile is partially intersecting the aoi
-                clipped_feature = GridService._update_feature(
-                    clip_to_aoi, feature, intersection
+                feature = GridService._update_feature(
+                    clip_to_aoi, feature, intersections[index]
                 )
-                intersecting_features.append(clipped_feature)
+            intersecting_features.append(feature)
         return geojson.FeatureCollection(intersecting_features)
 
+    @staticmethod
+    def _intersect_tiles(aoi: MultiPolygon, tiles: np.ndarray) -> tuple:
+        """
+        Finds the grid squares intersecting the aoi. The squares are tested against the prepared aoi at once,
+        and only the squares crossing the aoi outline are intersected, with the aoi polygons they intersect
+        :param aoi: dissolved aoi
+        :param tiles: array of the grid squares
+        :return: mask of the squares within the aoi, and intersection with the aoi of each square partially
+            intersecting it, by index. Intersections which are not polygons are left out
+        """
+        shapely.prepare(aoi)
+        within = shapely.contains(aoi, tiles)
+        boundary = np.flatnonzero(~within & shapely.intersects(aoi, tiles))
+
+        polygons = shapely.get_parts(aoi)
+        tile_indexes, polygon_indexes = shapely.STRtree(polygons).query(
+            tiles[boundary], predicate="intersects"
+        )
+        # Pairs are ordered by square, each square is intersected with the aoi polygons it intersects
+        squares, nearby = np.unique(tile_indexes, return_inverse=True)
+        intersections = shapely.intersection(
+            shapely.multipolygons(polygons[polygon_indexes], indices=nearby),
+            tiles[boundary[squares]],
+        )
+        polygonal = np.isin(
+            shapely.get_type_id(intersections),
+            [shapely.GeometryType.POLYGON, shapely.GeometryType.MULTIPOLYGON],
+        )
+        return within, dict(
+            zip(boundary[squares[polygonal]].tolist(), intersections[polygonal])
+        )
+
+    @staticmethod
+    def _intersecting_indexes(within: np.ndarray, intersections: dict) -> np.ndarray:
+        """Sorted integer indexes of the squares within or partially intersecting the aoi"""
+        return np.union1d(
+            np.flatnonzero(within),
+            np.fromiter(intersections, dtype=np.int64, count=len(intersections)),
+        )
+
+    @staticmethod
+    def create_square_grid(
+        area_of_interest,
+        zoom: int = None,
+        task_area: float = None,
+        clip_to_aoi: bool = False,
+    ) -> geojson.FeatureCollection:
+        """
+        Creates the task squares of the OSM tile grid intersecting the aoi. Only the squares within the
+        bounding boxes of the aoi polygons are enumerated, and tested against the prepared aoi at once.
+        Optionally clips partially intersecting task squares exactly to the AOI outline
+        :param area_of_interest: geojson feature collection of the aoi, in EPSG:4326
+        :param zoom: zoom level of the task squares
+        :param task_area: if no zoom is supplied, area of the task squares in square kilometres, the zoom
+            level with the closest area at the latitude of the aoi is used
+        :param clip_to_aoi: flag for clipping the task squares to the aoi
+        :raises InvalidGeoJson, InvalidData
+        :return: geojson.FeatureCollection task grid
+        """
+        aoi = shapely.geometry.shape(
+            GridService.merge_to_multi_polygon(area_of_interest, dissolve=True)
+        )
+        if zoom is None:
+            if task_area is None or task_area <= 0:
+                raise InvalidData(
+                    "MissingGridSize- A zoom level or a positive task area is required"
+                )
+            zoom = tile_zoom_for_area(task_area * 1e6, aoi.centroid.y)
+            zoom = min(max(zoom, MIN_GRID_ZOOM), MAX_GRID_ZOOM)
+        elif not MIN_GRID_ZOOM <= zoom <= MAX_GRID_ZOOM:
+            raise InvalidData(
+                f"InvalidZoom- Zoom level must be between {MIN_GRID_ZOOM} and {MAX_GRID_ZOOM}"
+            )
+
+        xs, ys = GridService._tiles_in_bounding_boxes(aoi, zoom)
+        # Rounded as geojson rounds the aoi, so that squares sharing an edge with the aoi are not kept for a
+        # sliver
+        rings = tile_rings(xs, ys, zoom, geojson.geometry.DEFAULT_PRECISION)
+        tiles = shapely.polygons(rings)
+
+        within, intersections = GridService._intersect_tiles(aoi, tiles)
+
+        features = []
+        for index in GridService._intersecting_indexes(within, intersections):
+            feature = {
+                "type": "Feature",
+                "geometry": {
+                    "type": "MultiPolygon",
+                    "coordinates": [[rings[index].tolist()]],
+                },
+                "properties": {
+                    "x": int(xs[index]),
+                    "y": int(ys[index]),
+                    "zoom": zoom,
+                    "isSquare": True,
+                },
+            }
+            if index in intersections:
+                feature = GridService._update_feature(
+                    clip_to_aoi, feature, intersections[index]
+                )
+            features.append(feature)
+        return geojson.FeatureCollection(features)
+
+    @staticmethod
+    def _tiles_in_bounding_boxes(aoi: MultiPolygon, zoom: int) -> tuple:
+        """
+        Enumerates the OSM tile grid squares covering the bounding boxes of the aoi polygons
+        :param aoi: aoi in EPSG:4326
+        :param zoom: zoom level of the squares
+        :raises InvalidData: if there are more squares than GRID_MAX_TILES
+        :return: arrays of the x and y of the squares, each square once
+        """
+        x_min, y_min, x_max, y_max = tile_range(
+            *shapely.bounds(shapely.get_parts(aoi)).T, zoom
+        )
+        widths = x_max - x_min + 1
+        counts = widths * (y_max - y_min + 1)
+        if counts.sum() > current_app.config["GRID_MAX_TILES"]:
+            raise InvalidData(
+                "GridTooLarge- Too many tasks, choose a lower zoom level or a larger task area"
+            )
+
+        # Position of each square within the bounding box of its polygon
+        polygons = np.repeat(np.arange(len(counts)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+        xs = x_min[polygons] + offsets % widths[polygons]
+        ys = y_min[polygons] + offsets // widths[polygons]
+        # Bounding boxes of the polygons may overlap
+        tiles = np.unique(np.stack([xs, ys], axis=-1), axis=0)
+        return tiles[:, 0], tiles[:, 1]
+
     @staticmethod
     def tasks_from_aoi_features(feature_collection: str) -> geojson.FeatureCollection:
         """
@@ -141,8 +288,12 @@ class GridService:
             if new_shape.geom_type == "Polygon":
                 # shapely may return a POLYGON rather than a MULTIPOLYGON if there is just one intersection area
                 new_shape = MultiPolygon([new_shape])
-            feature["geometry"] = mapping(new_shape)
-            feature["properties"]["isSquare"] = False
+            # the grid of the request is left as is
+            feature = dict(
+                feature,
+                geometry=mapping(new_shape),
+                properties=dict(feature["properties"], isSquare=False),
+            )
         return feature
 
     @staticmethod
@@ -1,5 +1,7 @@
+import json
+
 import geojson
-from shapely.geometry import Polygon, MultiPolygon, LineString, shape as shapely_shape
+from shapely.geometry import MultiPolygon, LineString, mapping, shape as shapely_shape
 from shapely.ops import split
 from backend import db
 from flask import current_app
@@ -8,10 +10,12 @@ from geoalchemy2 import shape
 from backend.exceptions import NotFound
 from backend.models.dtos.grid_dto import SplitTaskDTO
 from backend.models.dtos.mapping_dto import TaskDTOs
-from backend.models.postgis.utils import ST_Transform, ST_Area, ST_GeogFromWKB
-from backend.models.postgis.task import Task, TaskStatus, TaskAction
+from backend.models.postgis.utils import ST_Area, ST_GeogFromWKB
+from backend.models.postgis.task import Task, TaskStatus
 from backend.models.postgis.project import Project
 from backend.models.postgis.utils import InvalidGeoJson
+from backend.services.grid.web_mercator import tile_rings
+from backend.services.task_event_broker import TaskEventBroker
 
 
 class SplitServiceError(Exception):
@@ -37,64 +41,28 @@ class SplitService:
 
         try:
             split_geoms = []
-            for i in range(0, 2):
-                for j in range(0, 2):
-                    new_x = x * 2 + i
-                    new_y = y * 2 + j
-                    new_zoom = zoom + 1
-                    new_square = SplitService._create_square(new_x, new_y, new_zoom)
-                    feature = geojson.Feature()
-                    feature.geometry = new_square
-                    feature.properties = {
-                        "x": new_x,
-                        "y": new_y,
-                        "zoom": new_zoom,
-                        "isSquare": True,
-                    }
-
-                    if len(feature.geometry.coordinates) > 0:
-                        split_geoms.append(feature)
+            new_xs = [x * 2 + i for i in range(0, 2) for j in range(0, 2)]
+            new_ys = [y * 2 + j for i in range(0, 2) for j in range(0, 2)]
+            new_zoom = zoom + 1
+            # Squares of the four tiles at the next zoom level, transformed in one pass
+            new_squares = tile_rings(new_xs, new_ys, new_zoom)
+            for new_x, new_y, new_square in zip(new_xs, new_ys, new_squares):
+                feature = geojson.Feature()
+                feature.geometry = geojson.MultiPolygon([[new_square.tolist()]])
+                feature.properties = {
+                    "x": new_x,
+                    "y": new_y,
+                    "zoom": new_zoom,
+                    "isSquare": True,
+                }
+
+                if len(feature.geometry.coordinates) > 0:
+                    split_geoms.append(feature)
 
             return split_geoms
         except Exception as e:
             raise SplitServiceError(f"unhandled error splitting tile: {str(e)}")
 
-    @staticmethod
-    def _create_square(x, y, zoom) -> geojson.MultiPolygon:
-        """
-        Function for creating a geojson.MultiPolygon square representing a single OSM tile grid square
-        :param x: osm tile grid x
-        :param y: osm tile grid y
-        :param zoom: osm tile grid zoom level
-        :return: geojson.MultiPolygon in EPSG:4326
-        """
-        # Maximum resolution
-        MAXRESOLUTION = 156543.0339
-
-        # X/Y axis limit
-        max = MAXRESOLUTION * 256 / 2
-
-        # calculate extents
-        step = max / (2 ** (zoom - 1))
-        xmin = x * step - max
-        ymin = y * step - max
-        xmax = (x + 1) * step - max
-        ymax = (y + 1) * step - max
-
-        # make a shapely multipolygon
-        multipolygon = MultiPolygon(
-            [Polygon([(xmin, ymin), (xmax, ymin), (xmax, ymax), (xmin, ymax)])]
-        )
-
-        # use the database to transform the geometry from 3857 to 4326
-        transformed_geometry = ST_Transform(shape.from_shape(multipolygon, 3857), 4326)
-
-        # use DB to get the geometry as geojson
-        with db.engine.connect() as conn:
-            return geojson.loads(
-                conn.execute(transformed_geometry.ST_AsGeoJSON()).scalar()
-            )
-
     @staticmethod
     def _create_split_tasks_from_geometry(task) -> list:
         """
@@ -102,11 +70,9 @@ class SplitService:
         an OSM tile identified by x, y, zoom
         :return: list of {geojson.Feature}
         """
-        # Load the task's geometry and calculate its centroid and bbox
-        query = db.session.query(
-            Task.id, Task.geometry.ST_AsGeoJSON().label("geometry")
-        ).filter(Task.id == task.id, Task.project_id == task.project_id)
-        task_geojson = geojson.loads(query[0].geometry)
+        # Load the task's geometry through GeoJSON, at the precision of the split features, and
+        # calculate its centroid and bbox
+        task_geojson = geojson.loads(json.dumps(mapping(shape.to_shape(task.geometry))))
         geometry = shapely_shape(task_geojson)
         centroid = geometry.centroid
         minx, miny, maxx, maxy = geometry.bounds
@@ -128,12 +94,8 @@ class SplitService:
         split_features = []
         for split_geometry in split_geometries:
             feature = geojson.Feature()
-            # Tasks expect multipolygons. Convert and use the database to get as GeoJSON
-            multipolygon_geometry = shape.from_shape(split_geometry, 4326)
-            with db.engine.connect() as conn:
-                feature.geometry = geojson.loads(
-                    conn.execute(multipolygon_geometry.ST_AsGeoJSON()).scalar()
-                )
+            # Tasks expect multipolygons
+            feature.geometry = geojson.loads(json.dumps(mapping(split_geometry)))
             feature.properties["x"] = None
             feature.properties["y"] = None
             feature.properties["zoom"] = None
@@ -178,10 +140,9 @@ class SplitService:
         original_geometry = shape.to_shape(original_task.geometry)
 
         # Fetch the task geometry in meters
-        with db.engine.connect() as conn:
-            original_task_area_m = conn.execute(
-                ST_Area(ST_GeogFromWKB(original_task.geometry))
-            ).scalar()
+        original_task_area_m = db.session.scalar(
+            ST_Area(ST_GeogFromWKB(original_task.geometry))
+        )
 
         if (
             original_task.zoom and original_task.zoom >= 18
@@ -210,7 +171,6 @@ class SplitService:
         # create new tasks from the new geojson
         i = Task.get_max_task_id_for_project(split_task_dto.project_id)
         new_tasks = []
-        new_tasks_dto = []
         for new_task_geojson in new_tasks_geojson:
             # Sanity check: ensure the new task geometry intersects the original task geometry
             new_geometry = shapely_shape(new_task_geojson.geometry)
@@ -219,47 +179,30 @@ class SplitService:
                     "SplitGeoJsonError- New split task does not intersect original task"
                 )
 
-            # insert new tasks into database
             i = i + 1
             new_task = Task.from_geojson_feature(i, new_task_geojson)
             new_task.project_id = split_task_dto.project_id
-            new_task.task_status = TaskStatus.READY.value
-            new_task.create()
-            new_task.task_history.extend(original_task.copy_task_history())
-            if new_task.task_history:
-                new_task.clear_task_lock()  # since we just copied the lock
-            new_task.set_task_history(
-                TaskAction.STATE_CHANGE, split_task_dto.user_id, None, TaskStatus.SPLIT
-            )
-            new_task.set_task_history(
-                TaskAction.STATE_CHANGE, split_task_dto.user_id, None, TaskStatus.READY
-            )
-            new_task.task_status = TaskStatus.READY.value
             new_tasks.append(new_task)
-            new_task.update()
-            new_tasks_dto.append(
-                new_task.as_dto_with_instructions(split_task_dto.preferred_locale)
-            )
 
-        # delete original task from the database
+        # insert the new tasks and delete the original task in one transaction
         try:
-            original_task.delete()
+            new_tasks = original_task.split_into(new_tasks, split_task_dto.user_id)
+            # The original task is locked for mapping, so only the total task count changes
+            Project.record_split(split_task_dto.project_id, len(new_tasks))
+            TaskEventBroker.publish_split(
+                split_task_dto.project_id,
+                split_task_dto.task_id,
+                [new_task.id for new_task in new_tasks],
+            )
+            db.session.commit()
         except Exception:
             db.session.rollback()
-            # Ensure the new tasks are cleaned up
-            for new_task in new_tasks:
-                new_task.delete()
-            db.session.commit()
             raise
 
-        # update project task counts
-        project = Project.get(split_task_dto.project_id)
-        project.total_tasks = project.tasks.count()
-        # update bad imagery because we may have split a bad imagery tile
-        project.tasks_bad_imagery = project.tasks.filter(
-            Task.task_status == TaskStatus.BADIMAGERY.value
-        ).count()
-        project.save()
+        new_tasks_dto = [
+            new_task.as_dto_with_instructions(split_task_dto.preferred_locale)
+            for new_task in new_tasks
+        ]
 
         # return the new tasks in a DTO
         task_dtos = TaskDTOs()
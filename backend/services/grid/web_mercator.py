@@ -0,0 +1,123 @@
+import math
+
+import numpy as np
+from shapely.geometry.base import BaseGeometry
+from shapely.ops import transform
+
+# Radius of the sphere used by EPSG:3857, in metres
+EARTH_RADIUS = 6378137.0
+
+# Half the width of the OSM tile grid in EPSG:3857, from the zoom 0 resolution the task grid is built with
+MAX_RESOLUTION = 156543.0339
+GRID_EXTENT = MAX_RESOLUTION * 256 / 2
+
+# Decimal digits kept in coordinates, the default of ST_AsGeoJSON
+GEOJSON_PRECISION = 9
+
+# Latitude where the OSM tile grid ends, the EPSG:3857 square spans +/- GRID_EXTENT
+MAX_LATITUDE = 85.0511287798066
+
+
+def lonlat_to_mercator(lon, lat):
+    """Projects EPSG:4326 coordinates to EPSG:3857, accepts scalars or arrays"""
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    x = EARTH_RADIUS * np.radians(lon)
+    y = EARTH_RADIUS * np.log(np.tan(np.pi / 4 + np.radians(lat) / 2))
+    return x, y
+
+
+def mercator_to_lonlat(x, y):
+    """Projects EPSG:3857 coordinates to EPSG:4326, accepts scalars or arrays"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    lon = np.degrees(x / EARTH_RADIUS)
+    lat = np.degrees(2 * np.arctan(np.exp(y / EARTH_RADIUS)) - np.pi / 2)
+    return lon, lat
+
+
+def to_mercator(geometry: BaseGeometry) -> BaseGeometry:
+    """Transforms a shapely geometry from EPSG:4326 to EPSG:3857, vertex by vertex like ST_Transform"""
+    return transform(lonlat_to_mercator, geometry)
+
+
+def to_lonlat(geometry: BaseGeometry) -> BaseGeometry:
+    """Transforms a shapely geometry from EPSG:3857 to EPSG:4326, vertex by vertex like ST_Transform"""
+    return transform(mercator_to_lonlat, geometry)
+
+
+def tile_bounds(x, y, zoom):
+    """
+    EPSG:3857 bounds of OSM tile grid squares, accepts scalars or arrays. Rows are counted from the south,
+    as in the task grid
+    :return: xmin, ymin, xmax, ymax
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    step = GRID_EXTENT / 2.0 ** (np.asarray(zoom, dtype=np.float64) - 1)
+    return (
+        x * step - GRID_EXTENT,
+        y * step - GRID_EXTENT,
+        (x + 1) * step - GRID_EXTENT,
+        (y + 1) * step - GRID_EXTENT,
+    )
+
+
+def tile_lonlat_bounds(x, y, zoom):
+    """
+    EPSG:4326 bounds of OSM tile grid squares, accepts scalars or arrays
+    :return: min lon, min lat, max lon, max lat
+    """
+    xmin, ymin, xmax, ymax = tile_bounds(x, y, zoom)
+    lon_min, lat_min = mercator_to_lonlat(xmin, ymin)
+    lon_max, lat_max = mercator_to_lonlat(xmax, ymax)
+    return lon_min, lat_min, lon_max, lat_max
+
+
+def tile_range(lon_min, lat_min, lon_max, lat_max, zoom):
+    """
+    Columns and rows of the OSM tile grid squares covering EPSG:4326 bounds, accepts scalars or arrays
+    :return: x min, y min, x max, y max, inclusive
+    """
+    xmin, ymin = lonlat_to_mercator(
+        lon_min, np.clip(lat_min, -MAX_LATITUDE, MAX_LATITUDE)
+    )
+    xmax, ymax = lonlat_to_mercator(
+        lon_max, np.clip(lat_max, -MAX_LATITUDE, MAX_LATITUDE)
+    )
+    step = GRID_EXTENT / 2.0 ** (zoom - 1)
+
+    def index(coordinate):
+        return np.clip(
+            np.floor((coordinate + GRID_EXTENT) / step), 0, 2**zoom - 1
+        ).astype(np.int64)
+
+    return index(xmin), index(ymin), index(xmax), index(ymax)
+
+
+def tile_zoom_for_area(area: float, lat: float) -> int:
+    """Zoom of the OSM tile grid squares whose area at the latitude is closest to the area in square metres"""
+    side = 2 * GRID_EXTENT * math.cos(math.radians(lat))
+    return round(math.log2(side / math.sqrt(area)))
+
+
+def tile_rings(x, y, zoom, precision: int = GEOJSON_PRECISION) -> np.ndarray:
+    """
+    Exterior rings of OSM tile grid squares in EPSG:4326, the same coordinates as ST_AsGeoJSON of the
+    ST_Transform of each square
+    :return: array of shape (number of tiles, 5, 2)
+    """
+    lon_min, lat_min, lon_max, lat_max = (
+        np.round(np.atleast_1d(bound), precision)
+        for bound in tile_lonlat_bounds(x, y, zoom)
+    )
+    return np.stack(
+        [
+            np.stack([lon_min, lat_min], axis=-1),
+            np.stack([lon_max, lat_min], axis=-1),
+            np.stack([lon_max, lat_max], axis=-1),
+            np.stack([lon_min, lat_max], axis=-1),
+            np.stack([lon_min, lat_min], axis=-1),
+        ],
+        axis=1,
+    )
@@ -3,6 +3,7 @@ import xml.etree.ElementTree as ET
 
 from flask import current_app
 from geoalchemy2 import shape
+from sqlalchemy import case
 
 from backend.exceptions import NotFound
 from backend.models.dtos.mapping_dto import (
@@ -19,6 +20,7 @@ from backend.models.postgis.utils import UserLicenseError
 from backend.services.messaging.message_service import MessageService
 from backend.services.project_service import ProjectService
 from backend.services.stats_service import StatsService
+from backend.services.task_transition_service import TaskTransitionService
 
 
 class MappingServiceError(Exception):
@@ -92,32 +94,65 @@ class MappingService:
                     "InvalidTaskState- Task in invalid state for mapping"
                 )
 
-            user_can_map, error_reason = ProjectService.is_user_permitted_to_map(
+            MappingService._check_user_can_map(
                 lock_task_dto.project_id, lock_task_dto.user_id
             )
-            if not user_can_map:
-                if error_reason == MappingNotAllowed.USER_NOT_ACCEPTED_LICENSE:
-                    raise UserLicenseError("User must accept license to map this task")
-                elif error_reason == MappingNotAllowed.USER_NOT_ON_ALLOWED_LIST:
-                    raise MappingServiceError(
-                        "UserNotAllowed- User not on allowed list"
-                    )
-                elif error_reason == MappingNotAllowed.PROJECT_NOT_PUBLISHED:
-                    raise MappingServiceError(
-                        "ProjectNotPublished- Project is not published"
-                    )
-                elif error_reason == MappingNotAllowed.USER_ALREADY_HAS_TASK_LOCKED:
-                    raise MappingServiceError(
-                        "UserAlreadyHasTaskLocked- User already has task locked"
-                    )
-                else:
-                    raise MappingServiceError(
-                        f"{error_reason}- Mapping not allowed because: {error_reason}"
-                    )
 
-        task.lock_task_for_mapping(lock_task_dto.user_id)
+        # Unless another user got to the task first
+        [task] = Task.lock_tasks(
+            lock_task_dto.project_id,
+            [task],
+            lock_task_dto.user_id,
+            TaskAction.LOCKED_FOR_MAPPING,
+        )
         return task.as_dto_with_instructions(lock_task_dto.preferred_locale)
 
+    @staticmethod
+    def lock_next_task_for_mapping(
+        project_id: int,
+        user_id: int,
+        preferred_locale: str = "en",
+        prefer_priority_areas: bool = False,
+    ) -> TaskDTO:
+        """
+        Locks a task picked at random among the tasks available for mapping
+        :raises MappingServiceError, NotFound
+        """
+        MappingService._check_user_can_map(project_id, user_id)
+        task = Task.lock_next(
+            project_id,
+            user_id,
+            TaskAction.LOCKED_FOR_MAPPING,
+            prefer_priority_areas=prefer_priority_areas,
+        )
+        if task is None:
+            raise NotFound(sub_code="AVAILABLE_TASK_NOT_FOUND", project_id=project_id)
+        return task.as_dto_with_instructions(preferred_locale)
+
+    @staticmethod
+    def _check_user_can_map(project_id: int, user_id: int):
+        """Raises an error explaining why the user is not permitted to map on the project, if not permitted"""
+        user_can_map, error_reason = ProjectService.is_user_permitted_to_map(
+            project_id, user_id
+        )
+        if not user_can_map:
+            if error_reason == MappingNotAllowed.USER_NOT_ACCEPTED_LICENSE:
+                raise UserLicenseError("User must accept license to map this task")
+            elif error_reason == MappingNotAllowed.USER_NOT_ON_ALLOWED_LIST:
+                raise MappingServiceError("UserNotAllowed- User not on allowed list")
+            elif error_reason == MappingNotAllowed.PROJECT_NOT_PUBLISHED:
+                raise MappingServiceError(
+                    "ProjectNotPublished- Project is not published"
+                )
+            elif error_reason == MappingNotAllowed.USER_ALREADY_HAS_TASK_LOCKED:
+                raise MappingServiceError(
+                    "UserAlreadyHasTaskLocked- User already has task locked"
+                )
+            else:
+                raise MappingServiceError(
+                    f"{error_reason}- Mapping not allowed because: {error_reason}"
+                )
+
     @staticmethod
     def unlock_task_after_mapping(mapped_task: MappedTaskDTO) -> TaskDTO:
         """Unlocks the task and sets the task history appropriately"""
@@ -385,50 +420,37 @@ class MappingService:
     @staticmethod
     def map_all_tasks(project_id: int, user_id: int):
         """Marks all tasks on a project as mapped"""
-        tasks_to_map = Task.query.filter(
-            Task.project_id == project_id,
-            Task.task_status.notin_(
-                [
-                    TaskStatus.BADIMAGERY.value,
-                    TaskStatus.MAPPED.value,
-                    TaskStatus.VALIDATED.value,
-                ]
-            ),
-        ).all()
-
-        for task in tasks_to_map:
-            if TaskStatus(task.task_status) not in [
-                TaskStatus.LOCKED_FOR_MAPPING,
-                TaskStatus.LOCKED_FOR_VALIDATION,
-            ]:
-                # Only lock tasks that are not already locked to avoid double lock issue
-                task.lock_task_for_mapping(user_id)
-
-            task.unlock_task(user_id, new_state=TaskStatus.MAPPED)
-
-        # Set counters to fully mapped
         project = ProjectService.get_project_by_id(project_id)
-        project.tasks_mapped = (
-            project.total_tasks - project.tasks_bad_imagery - project.tasks_validated
+        done_statuses = [TaskStatus.BADIMAGERY, TaskStatus.MAPPED, TaskStatus.VALIDATED]
+        TaskTransitionService.transition_tasks(
+            project,
+            user_id,
+            [status for status in TaskStatus if status not in done_statuses],
+            TaskStatus.MAPPED,
+            lock_action=TaskAction.LOCKED_FOR_MAPPING,
+            values=dict(
+                # Don't set mapped if state being set back to mapped after validation
+                mapped_by=case(
+                    (
+                        Task.task_status == TaskStatus.LOCKED_FOR_VALIDATION.value,
+                        Task.mapped_by,
+                    ),
+                    else_=user_id,
+                )
+            ),
         )
-        project.save()
 
     @staticmethod
     def reset_all_badimagery(project_id: int, user_id: int):
         """Marks all bad imagery tasks ready for mapping"""
-        badimagery_tasks = Task.query.filter(
-            Task.task_status == TaskStatus.BADIMAGERY.value,
-            Task.project_id == project_id,
-        ).all()
-
-        for task in badimagery_tasks:
-            task.lock_task_for_mapping(user_id)
-            task.unlock_task(user_id, new_state=TaskStatus.READY)
-
-        # Reset bad imagery counter
         project = ProjectService.get_project_by_id(project_id)
-        project.tasks_bad_imagery = 0
-        project.save()
+        TaskTransitionService.transition_tasks(
+            project,
+            user_id,
+            [TaskStatus.BADIMAGERY],
+            TaskStatus.READY,
+            lock_action=TaskAction.LOCKED_FOR_MAPPING,
+        )
 
     @staticmethod
     def lock_time_can_be_extended(project_id, task_id, user_id):
@@ -3,6 +3,7 @@ import threading
 import geojson
 from flask import current_app
 
+from backend import db
 from backend.exceptions import NotFound
 from backend.models.dtos.project_dto import (
     DraftProjectDTO,
@@ -12,15 +13,16 @@ from backend.models.dtos.project_dto import (
 )
 from backend.models.postgis.project import Project, Task, ProjectStatus
 from backend.models.postgis.statuses import TaskCreationMode, TeamRoles
-from backend.models.postgis.task import TaskHistory, TaskStatus, TaskAction
+from backend.models.postgis.task import TaskHistory, TaskStatus
 from backend.models.postgis.user import User
-from backend.models.postgis.utils import InvalidData, InvalidGeoJson
+from backend.models.postgis.utils import InvalidGeoJson
 from backend.services.grid.grid_service import GridService
 from backend.services.license_service import LicenseService
 from backend.services.messaging.message_service import MessageService
 from backend.services.users.user_service import UserService
 from backend.services.organisation_service import OrganisationService
 from backend.services.team_service import TeamService
+from backend.services.task_transition_service import TaskTransitionService
 
 
 class ProjectAdminServiceError(Exception):
@@ -77,12 +79,20 @@ class ProjectAdminService:
 
         draft_project.set_project_aoi(draft_project_dto)
 
-        # if arbitrary_tasks requested, create tasks from aoi otherwise use tasks in DTO
+        # if arbitrary_tasks requested, create tasks from aoi otherwise use tasks in DTO, or generate the
+        # square task grid of the aoi if no tasks are supplied
         if draft_project_dto.has_arbitrary_tasks:
             tasks = GridService.tasks_from_aoi_features(
                 draft_project_dto.area_of_interest
             )
             draft_project.task_creation_mode = TaskCreationMode.ARBITRARY.value
+        elif draft_project_dto.tasks is None:
+            tasks = GridService.create_square_grid(
+                draft_project_dto.area_of_interest,
+                draft_project_dto.zoom,
+                draft_project_dto.task_area,
+                draft_project_dto.clip_to_aoi,
+            )
         else:
             tasks = draft_project_dto.tasks
         ProjectAdminService._attach_tasks_to_project(draft_project, tasks)
@@ -180,23 +190,15 @@ class ProjectAdminService:
     @staticmethod
     def reset_all_tasks(project_id: int, user_id: int):
         """Resets all tasks on project, preserving history"""
-        tasks_to_reset = Task.query.filter(
-            Task.project_id == project_id,
-            Task.task_status != TaskStatus.READY.value,
-        ).all()
-
-        for task in tasks_to_reset:
-            task.set_task_history(
-                TaskAction.COMMENT, user_id, "Task reset", TaskStatus.READY
-            )
-            task.reset_task(user_id)
-
-        # Reset project counters
         project = ProjectAdminService._get_project_by_id(project_id)
-        project.tasks_mapped = 0
-        project.tasks_validated = 0
-        project.tasks_bad_imagery = 0
-        project.save()
+        TaskTransitionService.transition_tasks(
+            project,
+            user_id,
+            [status for status in TaskStatus if status != TaskStatus.READY],
+            TaskStatus.READY,
+            comment="Task reset",
+            values=dict(mapped_by=None, validated_by=None),
+        )
 
     @staticmethod
     def get_all_comments(project_id: int) -> ProjectCommentsDTO:
@@ -211,35 +213,37 @@ class ProjectAdminService:
     @staticmethod
     def _attach_tasks_to_project(draft_project: Project, tasks_geojson):
         """
-        Validates then iterates over the array of tasks and attach them to the draft project
+        Validates the array of tasks then loads them into the draft project with one COPY. The draft project
+        is flushed to get its id, and is committed by the caller
         :param draft_project: Draft project in scope
         :param tasks_geojson: GeoJSON feature collection of mapping tasks
         :raises InvalidGeoJson, InvalidData
         """
-        tasks = geojson.loads(json.dumps(tasks_geojson))
-
-        if type(tasks) is not geojson.FeatureCollection:
+        if (
+            not isinstance(tasks_geojson, dict)
+            or tasks_geojson.get("type") != "FeatureCollection"
+        ):
             raise InvalidGeoJson(
                 "MustBeFeatureCollection- Invalid: GeoJson must be FeatureCollection"
             )
 
-        if not tasks.is_valid:
-            raise InvalidGeoJson(
-                "InvalidFeatureCollection - " + ", ".join(tasks.errors())
-            )
+        features = tasks_geojson.get("features")
+        if not isinstance(features, list):
+            raise InvalidGeoJson("InvalidFeatureCollection - features must be an array")
 
-        task_count = 1
-        for feature in tasks["features"]:
-            try:
-                task = Task.from_geojson_feature(task_count, feature)
-            except (InvalidData, InvalidGeoJson) as e:
-                raise e
-
-            draft_project.tasks.append(task)
-            task_count += 1
+        # Every feature is validated before the COPY starts, one at a time to keep memory bounded
+        for feature in features:
+            task_feature = geojson.loads(json.dumps(feature))
+            if isinstance(task_feature, geojson.GeoJSON) and not task_feature.is_valid:
+                raise InvalidGeoJson(
+                    "InvalidFeatureCollection - " + ", ".join(task_feature.errors())
+                )
+            Task.validate_geojson_feature(task_feature)
 
-        task_count -= 1  # Remove last increment before falling out loop
-        draft_project.total_tasks = task_count
+        db.session.add(draft_project)
+        db.session.flush()
+        Task.copy_from_geojson_features(draft_project.id, features)
+        draft_project.total_tasks = len(features)
 
     @staticmethod
     def _validate_default_locale(default_locale, project_info_locales):
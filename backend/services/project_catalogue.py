@@ -0,0 +1,471 @@
+import threading
+import time
+
+import numpy as np
+from flask import current_app, has_app_context
+from flask_sqlalchemy.pagination import Pagination
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from backend import db
+from backend.api.utils import validate_date_input
+from backend.models.dtos.project_dto import ProjectSearchDTO
+from backend.models.postgis.campaign import Campaign, campaign_projects
+from backend.models.postgis.interests import project_interests
+from backend.models.postgis.organisation import Organisation
+from backend.models.postgis.project import Project, ProjectInfo, ProjectTeams
+from backend.models.postgis.statuses import (
+    MappingLevel,
+    MappingPermission,
+    MappingTypes,
+    ProjectDifficulty,
+    ProjectStatus,
+    TeamRoles,
+    UserRole,
+    ValidationPermission,
+)
+from backend.services.users.user_service import UserService
+
+# Key used by a session to collect the projects written until it commits
+PENDING_PROJECT_IDS = "project_catalogue_pending_ids"
+
+# Projects columns kept in the catalogue, with the dtype of their array
+SCALAR_COLUMNS = {
+    "status": np.int16,
+    "difficulty": np.int16,
+    "priority": np.int16,
+    "author_id": np.int64,
+    "organisation_id": np.int64,
+    "private": np.bool_,
+    "mapping_permission": np.int16,
+    "validation_permission": np.int16,
+    "mapping_types": np.int64,
+    "total_tasks": np.int64,
+    "tasks_mapped": np.int64,
+    "tasks_validated": np.int64,
+    "tasks_bad_imagery": np.int64,
+    "created": "datetime64[us]",
+    "last_updated": "datetime64[us]",
+    "due_date": "datetime64[us]",
+}
+
+# Set valued filters, each one maps a key (e.g. a campaign name) to the ids of its projects
+MEMBERSHIPS = ["country", "campaign", "interest", "team", "locale", "organisation_name"]
+
+ORDERABLE_COLUMNS = [
+    "id",
+    "difficulty",
+    "priority",
+    "status",
+    "last_updated",
+    "due_date",
+]
+
+
+def mapping_types_to_bitmask(mapping_types) -> int:
+    """Packs a list of MappingTypes values into an integer with one bit per type"""
+    bitmask = 0
+    for mapping_type in mapping_types or []:
+        bitmask |= 1 << mapping_type
+    return bitmask
+
+
+class CataloguePagination(Pagination):
+    """Paginates the ordered project ids answered by the catalogue, only the current page is loaded"""
+
+    def _query_items(self):
+        start = self._query_offset
+        end = start + self.per_page
+        page_ids = self._query_args["project_ids"][start:end]
+        return self._query_args["load_items"](page_ids.tolist())
+
+    def _query_count(self):
+        return len(self._query_args["project_ids"])
+
+
+class ProjectCatalogue:
+    """
+    In-process columnar snapshot of the filterable fields of all projects. Answers ProjectSearchDTO filters
+    and ordering with vectorised masks so that Postgres only has to load the display data of a page.
+    The snapshot is refreshed for the projects written by this worker once they are committed, and fully
+    reloaded every PROJECT_CATALOGUE_REFRESH seconds to pick up writes made by other workers.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ids = np.empty(0, dtype=np.int64)
+        self.columns = {
+            name: np.empty(0, dtype=dtype) for name, dtype in SCALAR_COLUMNS.items()
+        }
+        self.memberships = {name: {} for name in MEMBERSHIPS}
+        self.project_keys = {}
+        self.pending_ids = set()
+        self.loaded_at = None
+
+    @staticmethod
+    def can_answer(search_dto: ProjectSearchDTO) -> bool:
+        """Free text search still needs the Postgres full text index"""
+        return (
+            not search_dto.text_search
+            and (search_dto.order_by or "id") in ORDERABLE_COLUMNS
+        )
+
+    def mark_stale(self, project_ids):
+        with self.lock:
+            self.pending_ids.update(project_ids)
+
+    @staticmethod
+    def _load_records(project_ids=None) -> dict:
+        """Loads the catalogue fields of all projects, or only of the supplied ones"""
+        project_query = db.session.query(
+            Project.id,
+            *[getattr(Project, name) for name in SCALAR_COLUMNS],
+            Project.country,
+        )
+        campaign_query = db.session.query(
+            campaign_projects.c.project_id, Campaign.name
+        ).join(Campaign, Campaign.id == campaign_projects.c.campaign_id)
+        interest_query = db.session.query(
+            project_interests.c.project_id, project_interests.c.interest_id
+        )
+        team_query = db.session.query(ProjectTeams.project_id, ProjectTeams.team_id)
+        locale_query = db.session.query(ProjectInfo.project_id, ProjectInfo.locale)
+        organisation_query = db.session.query(Project.id, Organisation.name).join(
+            Organisation, Organisation.id == Project.organisation_id
+        )
+        if project_ids is not None:
+            project_query = project_query.filter(Project.id.in_(project_ids))
+            campaign_query = campaign_query.filter(
+                campaign_projects.c.project_id.in_(project_ids)
+            )
+            interest_query = interest_query.filter(
+                project_interests.c.project_id.in_(project_ids)
+            )
+            team_query = team_query.filter(ProjectTeams.project_id.in_(project_ids))
+            locale_query = locale_query.filter(ProjectInfo.project_id.in_(project_ids))
+            organisation_query = organisation_query.filter(Project.id.in_(project_ids))
+
+        records = {}
+        for row in project_query.all():
+            record = row._asdict()
+            for name, dtype in SCALAR_COLUMNS.items():
+                # Datetime columns keep NULLs as NaT, counters and flags default to 0
+                if record[name] is None and dtype != "datetime64[us]":
+                    record[name] = 0
+            record["organisation_id"] = record["organisation_id"] or -1
+            record["private"] = bool(record["private"])
+            record["mapping_types"] = mapping_types_to_bitmask(record["mapping_types"])
+            keys = {name: set() for name in MEMBERSHIPS}
+            keys["country"] = {
+                country.lower() for country in record.pop("country") or []
+            }
+            record["keys"] = keys
+            records[record["id"]] = record
+
+        for name, query in [
+            ("campaign", campaign_query),
+            ("interest", interest_query),
+            ("team", team_query),
+            ("locale", locale_query),
+            ("organisation_name", organisation_query),
+        ]:
+            for project_id, key in query.all():
+                if project_id in records:
+                    records[project_id]["keys"][name].add(key)
+
+        return records
+
+    def _build(self, records: dict):
+        ids = sorted(records)
+        self.ids = np.array(ids, dtype=np.int64)
+        self.columns = {
+            name: np.array([records[i][name] for i in ids], dtype=dtype)
+            for name, dtype in SCALAR_COLUMNS.items()
+        }
+        self.memberships = {name: {} for name in MEMBERSHIPS}
+        self.project_keys = {}
+        for project_id in ids:
+            self._add_keys(project_id, records[project_id]["keys"])
+
+    def _add_keys(self, project_id, keys):
+        self.project_keys[project_id] = keys
+        for name, values in keys.items():
+            for value in values:
+                self.memberships[name].setdefault(value, set()).add(project_id)
+
+    def _remove_keys(self, project_id):
+        for name, values in self.project_keys.pop(project_id, {}).items():
+            for value in values:
+                self.memberships[name].get(value, set()).discard(project_id)
+
+    def _apply(self, project_ids, records: dict):
+        """Updates the rows of the supplied projects in place, rebuilding the arrays on inserts or deletes"""
+        for project_id in project_ids:
+            self._remove_keys(project_id)
+        positions = np.searchsorted(self.ids, list(project_ids))
+        known = {
+            project_id
+            for project_id, position in zip(project_ids, positions)
+            if position < len(self.ids) and self.ids[position] == project_id
+        }
+        if known != set(project_ids) or len(records) != len(project_ids):
+            # Projects were created or deleted, rebuilding is simpler than shifting every array
+            keep = ~np.isin(self.ids, list(project_ids))
+            self.ids = self.ids[keep]
+            self.columns = {name: values[keep] for name, values in self.columns.items()}
+            new_ids = np.array(sorted(records), dtype=np.int64)
+            order = np.argsort(np.concatenate([self.ids, new_ids]), kind="stable")
+            self.ids = np.concatenate([self.ids, new_ids])[order]
+            self.columns = {
+                name: np.concatenate(
+                    [
+                        values,
+                        np.array(
+                            [records[i][name] for i in new_ids.tolist()],
+                            dtype=SCALAR_COLUMNS[name],
+                        ),
+                    ]
+                )[order]
+                for name, values in self.columns.items()
+            }
+        else:
+            for project_id, position in zip(project_ids, positions):
+                for name in SCALAR_COLUMNS:
+                    self.columns[name][position] = records[project_id][name]
+
+        for project_id, record in records.items():
+            self._add_keys(project_id, record["keys"])
+
+    def refresh(self):
+        """Brings the snapshot up to date, must be called within an app context"""
+        with self.lock:
+            max_age = current_app.config["PROJECT_CATALOGUE_REFRESH"]
+            if self.loaded_at is None or time.monotonic() - self.loaded_at > max_age:
+                self.pending_ids.clear()
+                self._build(ProjectCatalogue._load_records())
+                self.loaded_at = time.monotonic()
+            elif self.pending_ids:
+                project_ids = sorted(self.pending_ids)
+                self.pending_ids.clear()
+                self._apply(project_ids, ProjectCatalogue._load_records(project_ids))
+
+    def _member_mask(self, name: str, keys) -> np.ndarray:
+        project_ids = set()
+        for key in keys:
+            project_ids |= self.memberships[name].get(key, set())
+        return self._id_mask(project_ids)
+
+    def _id_mask(self, project_ids) -> np.ndarray:
+        return np.isin(self.ids, np.fromiter(project_ids, dtype=np.int64))
+
+    def _permission_mask(self, user, permission: str) -> np.ndarray:
+        """Vectorised equivalent of ProjectSearchService.filter_by_user_permission"""
+        if user is None or user.role == UserRole.ADMIN.value:
+            return np.ones(len(self.ids), dtype=bool)
+
+        if permission == "validation_permission":
+            permission_class = ValidationPermission
+            team_roles = [TeamRoles.VALIDATOR.value, TeamRoles.PROJECT_MANAGER.value]
+        else:
+            permission_class = MappingPermission
+            team_roles = [
+                TeamRoles.MAPPER.value,
+                TeamRoles.VALIDATOR.value,
+                TeamRoles.PROJECT_MANAGER.value,
+            ]
+        selection = self._id_mask(
+            {
+                team_project.project_id
+                for user_team in user.teams
+                for team_project in user_team.team.projects
+                if team_project.role in team_roles
+            }
+        )
+        permissions = self.columns[permission]
+        if user.mapping_level == MappingLevel.BEGINNER.value:
+            return (selection & (permissions == permission_class.TEAMS.value)) | (
+                permissions == permission_class.ANY.value
+            )
+        return selection | np.isin(
+            permissions, [permission_class.ANY.value, permission_class.LEVEL.value]
+        )
+
+    def _filter_mask(self, search_dto: ProjectSearchDTO, user) -> np.ndarray:
+        """Mirrors the filters applied by ProjectSearchService._filter_projects"""
+        columns = self.columns
+        mask = self._member_mask("locale", [search_dto.preferred_locale, "en"])
+
+        # Visibility of private projects, as in ProjectSearchService.create_search_query
+        if user is None:
+            mask &= ~columns["private"]
+        elif user.role != UserRole.ADMIN.value:
+            visible_ids = {p.project_id for t in user.teams for p in t.team.projects}
+            visible_ids |= {p.id for o in user.organisations for p in o.projects}
+            mask &= ~columns["private"] | self._id_mask(visible_ids)
+
+        if search_dto.project_statuses:
+            mask &= np.isin(
+                columns["status"],
+                [ProjectStatus[status].value for status in search_dto.project_statuses],
+            )
+        elif not search_dto.created_by:
+            mask &= columns["status"] == ProjectStatus.PUBLISHED.value
+
+        if search_dto.based_on_user_interests:
+            interests_user = UserService.get_user_by_id(
+                search_dto.based_on_user_interests
+            )
+            mask &= self._member_mask(
+                "interest", [interest.id for interest in interests_user.interests]
+            )
+        elif search_dto.interests:
+            mask &= self._member_mask("interest", search_dto.interests)
+
+        if search_dto.created_by:
+            mask &= columns["author_id"] == search_dto.created_by
+        if search_dto.mapped_by:
+            mask &= self._id_mask(UserService.get_projects_mapped(search_dto.mapped_by))
+        if search_dto.favorited_by:
+            mask &= self._id_mask({project.id for project in user.favorites})
+        if search_dto.difficulty and search_dto.difficulty.upper() != "ALL":
+            mask &= (
+                columns["difficulty"] == ProjectDifficulty[search_dto.difficulty].value
+            )
+
+        workable_tasks = columns["total_tasks"] - columns["tasks_bad_imagery"]
+        if search_dto.action == "map":
+            mask &= (
+                columns["tasks_mapped"] + columns["tasks_validated"] < workable_tasks
+            )
+            mask &= self._permission_mask(user, "mapping_permission")
+        elif search_dto.action == "validate":
+            mask &= columns["tasks_validated"] < workable_tasks
+            mask &= self._permission_mask(user, "validation_permission")
+
+        if search_dto.organisation_name:
+            mask &= self._member_mask(
+                "organisation_name", [search_dto.organisation_name]
+            )
+        if search_dto.organisation_id:
+            mask &= columns["organisation_id"] == search_dto.organisation_id
+        if search_dto.team_id:
+            mask &= self._member_mask("team", [search_dto.team_id])
+        if search_dto.campaign:
+            mask &= self._member_mask("campaign", [search_dto.campaign])
+
+        if search_dto.mapping_types:
+            requested = mapping_types_to_bitmask(
+                [MappingTypes[t].value for t in search_dto.mapping_types]
+            )
+            if search_dto.mapping_types_exact:
+                mask &= columns["mapping_types"] == requested
+            else:
+                mask &= (columns["mapping_types"] & requested) != 0
+
+        if search_dto.country:
+            mask &= self._member_mask("country", [search_dto.country.lower()])
+
+        for name, column, operator in [
+            ("last_updated_gte", "last_updated", np.greater_equal),
+            ("last_updated_lte", "last_updated", np.less_equal),
+            ("created_gte", "created", np.greater_equal),
+            ("created_lte", "created", np.less_equal),
+        ]:
+            if getattr(search_dto, name):
+                limit = np.datetime64(validate_date_input(getattr(search_dto, name)))
+                mask &= operator(columns[column], limit)
+
+        if search_dto.managed_by and user.role != UserRole.ADMIN.value:
+            managed_ids = {p.id for o in user.organisations for p in o.projects}
+            managed_ids |= {
+                p.project_id
+                for t in user.teams
+                for p in t.team.projects
+                if p.role == TeamRoles.PROJECT_MANAGER.value
+            }
+            mask &= self._id_mask(managed_ids)
+
+        return mask
+
+    def _sort_key(self, order_by: str, descending: bool) -> np.ndarray:
+        """Integer sort key reproducing Postgres ordering, where NULLs sort as the largest value"""
+        if order_by == "id":
+            key = self.ids.copy()
+        else:
+            values = self.columns[order_by]
+            key = values.view(np.int64).copy() if values.dtype.kind == "M" else values
+            key = key.astype(np.int64)
+            if values.dtype.kind == "M":
+                key[np.isnat(values)] = np.iinfo(np.int64).max
+        return -key if descending else key
+
+    def _cursor_key(self, order_by: str, value, descending: bool) -> int:
+        """Sort key of the order_by value of a pagination cursor, see _sort_key"""
+        if value is None:
+            key = np.iinfo(np.int64).max
+        elif order_by != "id" and self.columns[order_by].dtype.kind == "M":
+            key = int(np.datetime64(value, "us").astype(np.int64))
+        else:
+            key = int(value)
+        return -key if descending else key
+
+    def _ordered(self, search_dto: ProjectSearchDTO, user):
+        mask = self._filter_mask(search_dto, user)
+        order_by = search_dto.order_by or "id"
+        sort_key = self._sort_key(order_by, search_dto.order_by_type == "DESC")
+        # Ties are broken on the project id, like the DISTINCT ON of the SQL search
+        order = np.lexsort((self.ids[mask], sort_key[mask]))
+        return self.ids[mask][order], sort_key[mask][order]
+
+    def _ordered_ids(self, search_dto: ProjectSearchDTO, user) -> np.ndarray:
+        return self._ordered(search_dto, user)[0]
+
+    def search(self, search_dto: ProjectSearchDTO, user) -> np.ndarray:
+        """Returns the ordered ids of all projects matching the search"""
+        self.refresh()
+        with self.lock:
+            return self._ordered_ids(search_dto, user)
+
+    def search_after(self, search_dto: ProjectSearchDTO, user, after) -> tuple:
+        """
+        Returns the ordered ids of all projects matching the search, along with the position of the
+        first project following the (order_by value, project id) cursor
+        """
+        self.refresh()
+        with self.lock:
+            project_ids, sort_keys = self._ordered(search_dto, user)
+            if after is None:
+                return project_ids, 0
+
+            value, last_id = after
+            cursor_key = self._cursor_key(
+                search_dto.order_by or "id", value, search_dto.order_by_type == "DESC"
+            )
+        start = np.searchsorted(sort_keys, cursor_key, side="left")
+        end = np.searchsorted(sort_keys, cursor_key, side="right")
+        position = start + np.searchsorted(project_ids[start:end], last_id, "right")
+        return project_ids, int(position)
+
+
+project_catalogue = ProjectCatalogue()
+
+
+@event.listens_for(Project, "after_insert")
+@event.listens_for(Project, "after_update")
+@event.listens_for(Project, "after_delete")
+def _collect_project_write(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(PENDING_PROJECT_IDS, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _refresh_after_commit(session):
+    project_ids = session.info.pop(PENDING_PROJECT_IDS, None)
+    if project_ids and has_app_context():
+        project_catalogue.mark_stale(project_ids)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_writes(session, previous_transaction):
+    session.info.pop(PENDING_PROJECT_IDS, None)
@@ -0,0 +1,141 @@
+import json
+import threading
+import time
+
+import numpy as np
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from backend import db
+from backend.models.postgis.project import Project
+from backend.models.postgis.statuses import ProjectPriority
+
+# Key used by a session to collect the projects written until it commits
+PENDING_CENTROID_IDS = "project_centroid_pending_ids"
+
+# Record layout of the binary map layer, 16 bytes per project so that the frontend can read it
+# through Float32Array and Uint32Array views of the same buffer
+PACKED_CENTROID_DTYPE = np.dtype(
+    [("lon", "<f4"), ("lat", "<f4"), ("id", "<u4"), ("priority", "<u4")]
+)
+
+
+class ProjectCentroidLayer:
+    """
+    Per-worker layer of the project centroids shown on the search map, stored as ready to serialise
+    GeoJSON features and as packed points. Map results are assembled by id lookup so no geometry is
+    serialised while handling a search. Projects written by this worker are reloaded once committed,
+    projects created by other workers are loaded the first time they are requested and the whole layer
+    is reloaded every PROJECT_CENTROIDS_REFRESH seconds.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.features = {}
+        self.points = {}
+        self.pending_ids = set()
+        self.loaded_at = None
+
+    def mark_stale(self, project_ids):
+        with self.lock:
+            self.pending_ids.update(project_ids)
+
+    @staticmethod
+    def _load(project_ids=None) -> dict:
+        """Loads the centroid and priority of all projects, or only of the supplied ones"""
+        query = db.session.query(
+            Project.id,
+            Project.centroid.ST_AsGeoJSON().label("centroid"),
+            Project.priority,
+        )
+        if project_ids is not None:
+            query = query.filter(Project.id.in_(project_ids))
+
+        return {
+            project.id: (json.loads(project.centroid), project.priority)
+            for project in query.all()
+            if project.centroid is not None
+        }
+
+    def _store(self, project_ids, centroids: dict):
+        for project_id in project_ids:
+            self.features.pop(project_id, None)
+            self.points.pop(project_id, None)
+        for project_id, (centroid, priority) in centroids.items():
+            self.features[project_id] = {
+                "type": "Feature",
+                "geometry": centroid,
+                "properties": {
+                    "projectId": project_id,
+                    "priority": ProjectPriority(priority).name,
+                },
+            }
+            lon, lat = centroid["coordinates"][:2]
+            self.points[project_id] = (lon, lat, project_id, priority)
+
+    def refresh(self, project_ids=()):
+        """Brings the layer up to date and loads any of the supplied projects it does not know yet"""
+        with self.lock:
+            max_age = current_app.config["PROJECT_CENTROIDS_REFRESH"]
+            if self.loaded_at is None or time.monotonic() - self.loaded_at > max_age:
+                self.pending_ids.clear()
+                self.features = {}
+                self.points = {}
+                centroids = ProjectCentroidLayer._load()
+                self._store(centroids.keys(), centroids)
+                self.loaded_at = time.monotonic()
+                return
+
+            stale_ids = self.pending_ids | {
+                project_id
+                for project_id in project_ids
+                if project_id not in self.features
+            }
+            self.pending_ids.clear()
+            if stale_ids:
+                self._store(stale_ids, ProjectCentroidLayer._load(list(stale_ids)))
+
+    def get_feature_collection(self, project_ids) -> dict:
+        """Returns the map layer of the supplied projects as a GeoJSON FeatureCollection"""
+        project_ids = list(project_ids)
+        self.refresh(project_ids)
+        features = self.features
+        return {
+            "type": "FeatureCollection",
+            "features": [features[i] for i in project_ids if i in features],
+        }
+
+    def get_packed_points(self, project_ids) -> bytes:
+        """Returns the map layer of the supplied projects as little endian PACKED_CENTROID_DTYPE records"""
+        project_ids = list(project_ids)
+        self.refresh(project_ids)
+        points = self.points
+        return np.array(
+            [points[i] for i in project_ids if i in points],
+            dtype=PACKED_CENTROID_DTYPE,
+        ).tobytes()
+
+
+centroid_layer = ProjectCentroidLayer()
+
+
+@event.listens_for(Project, "after_insert")
+@event.listens_for(Project, "after_update")
+@event.listens_for(Project, "after_delete")
+def _collect_project_write(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(PENDING_CENTROID_IDS, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _refresh_after_commit(session):
+    project_ids = session.info.pop(PENDING_CENTROID_IDS, None)
+    if project_ids and has_app_context():
+        centroid_layer.mark_stale(project_ids)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_writes(session, previous_transaction):
+    session.info.pop(PENDING_CENTROID_IDS, None)
@@ -0,0 +1,224 @@
+import hashlib
+import json
+import threading
+import time
+
+from cachetools import TTLCache
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from backend.models.dtos.project_dto import ProjectSearchDTO
+from backend.models.postgis.project import Project
+from backend.models.postgis.statuses import UserRole
+
+# Key used by a session to remember it has pending project writes until it commits
+PENDING_INVALIDATION = "invalidate_project_search"
+
+
+class LocalSearchCacheBackend:
+    """In-process LRU backend. Entries and invalidations are only seen by the worker that holds them"""
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: str):
+        with self.lock:
+            return self.entries.get(key)
+
+    def set(self, key: str, value: dict):
+        with self.lock:
+            self.entries[key] = value
+
+    def get_generation(self) -> int:
+        return self.generation
+
+    def bump_generation(self):
+        with self.lock:
+            self.generation += 1
+            # Entries of older generations can never be hit again
+            self.entries.clear()
+
+
+class LocalSharedStore:
+    """Stand-in for a redis client, implementing the commands used by SharedSearchCacheBackend.
+    Used in tests and when no shared store URL is configured"""
+
+    def __init__(self):
+        self.values = {}
+        self.expiries = {}
+        self.lock = threading.Lock()
+
+    def _expire(self, name):
+        expiry = self.expiries.get(name)
+        if expiry is not None and expiry <= time.monotonic():
+            self.values.pop(name, None)
+            self.expiries.pop(name, None)
+
+    def get(self, name):
+        with self.lock:
+            self._expire(name)
+            return self.values.get(name)
+
+    def set(self, name, value, ex=None):
+        with self.lock:
+            self.values[name] = value
+            if ex:
+                self.expiries[name] = time.monotonic() + ex
+            else:
+                self.expiries.pop(name, None)
+        return True
+
+    def incr(self, name):
+        with self.lock:
+            self._expire(name)
+            self.values[name] = int(self.values.get(name) or 0) + 1
+            return self.values[name]
+
+
+class SharedSearchCacheBackend:
+    """Backend storing serialised results in a key-value store shared by all workers, so a single
+    invalidation is seen everywhere. Entries of older generations are left to expire with their TTL
+    """
+
+    def __init__(self, client, ttl: int, prefix: str = "tm:project-search:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.generation_key = f"{prefix}generation"
+
+    def get(self, key: str):
+        value = self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key: str, value: dict):
+        self.client.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+
+    def get_generation(self) -> int:
+        return int(self.client.get(self.generation_key) or 0)
+
+    def bump_generation(self):
+        self.client.incr(self.generation_key)
+
+
+class ProjectSearchCache:
+    """Caches serialised project search results keyed on the normalised filters and on the permission
+    class of the user, so that users who are allowed to see the same projects share entries
+    """
+
+    def __init__(self):
+        self.backend = None
+
+    def get_backend(self):
+        if self.backend is None:
+            self.backend = ProjectSearchCache.create_backend(current_app.config)
+        return self.backend
+
+    @staticmethod
+    def create_backend(config):
+        ttl = config["SEARCH_CACHE_TTL"]
+        if config["SEARCH_CACHE_BACKEND"] == "shared":
+            if config["SEARCH_CACHE_URL"]:
+                # redis is only required when a shared store is configured
+                import redis
+
+                client = redis.Redis.from_url(config["SEARCH_CACHE_URL"])
+            else:
+                current_app.logger.warning(
+                    "TM_SEARCH_CACHE_URL not set, search cache is not shared between workers"
+                )
+                client = LocalSharedStore()
+            return SharedSearchCacheBackend(client, ttl)
+
+        return LocalSearchCacheBackend(config["SEARCH_CACHE_MAXSIZE"], ttl)
+
+    @staticmethod
+    def get_filter_signature(search_dto: ProjectSearchDTO) -> str:
+        """Canonical representation of the search filters, ignoring unset values and list order"""
+        filters = {}
+        for name, value in search_dto.to_primitive().items():
+            if value is None or value == [] or value == "":
+                continue
+            if isinstance(value, list):
+                value = sorted(value)
+            filters[name] = value
+        if "country" in filters:
+            filters["country"] = filters["country"].lower()
+
+        return json.dumps(filters, sort_keys=True, default=str)
+
+    @staticmethod
+    def get_permission_class(search_dto: ProjectSearchDTO, user) -> str:
+        """Describes what the user is allowed to see, so users with the same visibility share results"""
+        if user is None:
+            return "anonymous"
+        if user.role == UserRole.ADMIN.value:
+            permission_class = "admin"
+        else:
+            # Private projects and managedByMe depend on the teams and organisations of the user
+            team_projects = sorted(
+                {(p.project_id, p.role) for t in user.teams for p in t.team.projects}
+            )
+            org_projects = sorted(
+                {p.id for o in user.organisations for p in o.projects}
+            )
+            if team_projects or org_projects:
+                digest = hashlib.sha1(
+                    json.dumps([team_projects, org_projects]).encode()
+                ).hexdigest()
+                permission_class = f"pm-of-{digest}"
+            else:
+                permission_class = "mapper"
+
+        if search_dto.action in ["map", "validate"]:
+            permission_class += f":level-{user.mapping_level}"
+        if search_dto.favorited_by:
+            # Favorites are read from the user, not from the filter
+            permission_class += f":user-{user.id}"
+
+        return permission_class
+
+    def make_key(self, search_dto: ProjectSearchDTO, user) -> str:
+        key = "|".join(
+            [
+                str(self.get_backend().get_generation()),
+                ProjectSearchCache.get_permission_class(search_dto, user),
+                ProjectSearchCache.get_filter_signature(search_dto),
+            ]
+        )
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    def get(self, key: str):
+        return self.get_backend().get(key)
+
+    def set(self, key: str, value: dict):
+        self.get_backend().set(key, value)
+
+    def invalidate(self):
+        """Invalidates all cached results, e.g. after a project was published or updated"""
+        self.get_backend().bump_generation()
+
+
+search_cache = ProjectSearchCache()
+
+
+@event.listens_for(Project, "after_insert")
+@event.listens_for(Project, "after_update")
+@event.listens_for(Project, "after_delete")
+def _flag_project_write(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info[PENDING_INVALIDATION] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop(PENDING_INVALIDATION, False) and has_app_context():
+        search_cache.invalidate()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_invalidation(session, previous_transaction):
+    session.info.pop(PENDING_INVALIDATION, None)
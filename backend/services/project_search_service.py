@@ -1,10 +1,14 @@
 from flask import current_app
+import base64
+import datetime
+import json
 import math
 import geojson
-from geoalchemy2 import shape
-from sqlalchemy import func, distinct, desc, or_, and_
+from cachetools import TTLCache
+from typing import List
+from sqlalchemy import func, desc, or_, and_, literal
+from sqlalchemy.orm import aliased
 from shapely.geometry import Polygon, box
-from cachetools import TTLCache, cached
 
 from backend import db
 from backend.exceptions import NotFound
@@ -14,9 +18,15 @@ from backend.models.dtos.project_dto import (
     ProjectSearchResultsDTO,
     ListSearchResultDTO,
     Pagination,
+    CursorPagination,
     ProjectSearchBBoxDTO,
 )
-from backend.models.postgis.project import Project, ProjectInfo, ProjectTeams
+from backend.models.postgis.project import (
+    Project,
+    ProjectInfo,
+    ProjectTeams,
+    project_countries,
+)
 from backend.models.postgis.statuses import (
     ProjectStatus,
     MappingLevel,
@@ -30,23 +40,32 @@ from backend.models.postgis.statuses import (
 )
 from backend.models.postgis.campaign import Campaign
 from backend.models.postgis.organisation import Organisation
-from backend.models.postgis.task import TaskHistory
-from backend.models.postgis.utils import (
-    ST_Intersects,
-    ST_MakeEnvelope,
-    ST_Transform,
-    ST_Area,
-)
+from backend.models.postgis.utils import ExplainJson, ST_Intersects, ST_MakeEnvelope
 from backend.models.postgis.interests import project_interests
 from backend.services.users.user_service import UserService
+from backend.services.grid.web_mercator import to_lonlat, to_mercator
+from backend.services.project_search_cache import search_cache
+from backend.services.project_centroid_layer import centroid_layer
+from backend.services.project_catalogue import (
+    CataloguePagination,
+    project_catalogue,
+)
 
 
-search_cache = TTLCache(maxsize=128, ttl=300)
-
 # max area allowed for passed in bbox, calculation shown to help future maintenance
 # client resolution (mpp)* arbitrary large map size on a large screen in pixels * 50% buffer, all squared
 MAX_AREA = math.pow(1250 * 4275 * 1.5, 2)
 
+# Approximate size of the map showing bbox results, geometries are simplified to about one pixel
+BBOX_MAP_SIZE_PIXELS = 1024
+
+# Number of projects in a page of search results
+SEARCH_PAGE_SIZE = 14
+
+# Total number of results of the searches paginated with a cursor, keyed on the search cache key so
+# that counts are dropped whenever the search cache is invalidated
+search_total_cache = TTLCache(maxsize=1024, ttl=300)
+
 
 class ProjectSearchServiceError(Exception):
     """Custom Exception to notify callers an error occurred when handling mapping"""
@@ -116,102 +135,306 @@ class ProjectSearchService:
         return query
 
     @staticmethod
-    def create_result_dto(project, preferred_locale, total_contributors):
-        project_info_dto = ProjectInfo.get_dto_for_locale(
-            project.id, preferred_locale, project.default_locale
-        )
-        project_obj = Project.get(project.id)
-        list_dto = ListSearchResultDTO()
-        list_dto.project_id = project.id
-        list_dto.locale = project_info_dto.locale
-        list_dto.name = project_info_dto.name
-        list_dto.priority = ProjectPriority(project.priority).name
-        list_dto.difficulty = ProjectDifficulty(project.difficulty).name
-        list_dto.short_description = project_info_dto.short_description
-        list_dto.last_updated = project.last_updated
-        list_dto.due_date = project.due_date
-        list_dto.percent_mapped = project_obj.calculate_tasks_percent(
-            "mapped",
+    def create_result_dtos(projects, preferred_locale) -> List[ListSearchResultDTO]:
+        """
+        Creates the result cards for a page of search rows. Locale info, campaigns, active mappers and
+        contributor counts are loaded for the whole page with set-based queries rather than per project.
+        :param projects: rows returned by a query built with create_search_query
+        :param preferred_locale: locale requested by user
+        """
+        project_ids = [project.id for project in projects]
+        if not project_ids:
+            return []
+
+        project_infos = ProjectInfo.get_dtos_for_locale(
+            [(project.id, project.default_locale) for project in projects],
+            preferred_locale,
         )
-        list_dto.percent_validated = project_obj.calculate_tasks_percent(
-            "validated",
-        )
-        list_dto.status = ProjectStatus(project.status).name
-        list_dto.active_mappers = Project.get_active_mappers(project.id)
-        list_dto.total_contributors = total_contributors
-        list_dto.country = project.country
-        list_dto.organisation_name = project.organisation_name
-        list_dto.organisation_logo = project.organisation_logo
-        list_dto.campaigns = Project.get_project_campaigns(project.id)
+        campaigns = Project.get_campaigns_for_projects(project_ids)
+        active_mappers = Project.get_active_mappers_for_projects(project_ids)
+        total_contributors = Project.get_total_contributions_for_projects(project_ids)
+
+        results = []
+        for project in projects:
+            project_info_dto = project_infos[project.id]
+            list_dto = ListSearchResultDTO()
+            list_dto.project_id = project.id
+            list_dto.locale = project_info_dto.locale
+            list_dto.name = project_info_dto.name
+            list_dto.priority = ProjectPriority(project.priority).name
+            list_dto.difficulty = ProjectDifficulty(project.difficulty).name
+            list_dto.short_description = project_info_dto.short_description
+            list_dto.last_updated = project.last_updated
+            list_dto.due_date = project.due_date
+            # Search rows carry the task counters, so there is no need to load the Project itself
+            list_dto.percent_mapped = Project.calculate_tasks_percent(project, "mapped")
+            list_dto.percent_validated = Project.calculate_tasks_percent(
+                project, "validated"
+            )
+            list_dto.status = ProjectStatus(project.status).name
+            list_dto.active_mappers = active_mappers[project.id]
+            list_dto.total_contributors = total_contributors[project.id]
+            list_dto.country = project.country
+            list_dto.organisation_name = project.organisation_name
+            list_dto.organisation_logo = project.organisation_logo
+            list_dto.campaigns = campaigns[project.id]
+            results.append(list_dto)
 
-        return list_dto
+        return results
 
     @staticmethod
-    def get_total_contributions(paginated_results):
-        paginated_projects_ids = [p.id for p in paginated_results]
-
-        # We need to make a join to return projects without contributors.
-        project_contributors_count = (
-            Project.query.with_entities(
-                Project.id, func.count(distinct(TaskHistory.user_id)).label("total")
-            )
-            .filter(Project.id.in_(paginated_projects_ids))
-            .outerjoin(
-                TaskHistory,
-                and_(
-                    TaskHistory.project_id == Project.id,
-                    TaskHistory.action != "COMMENT",
-                ),
-            )
-            .group_by(Project.id)
-            .all()
-        )
-
-        return [p.total for p in project_contributors_count]
+    def get_cached_search_results(search_dto: ProjectSearchDTO, user) -> dict:
+        """Returns the serialised search results, served from the search cache when possible"""
+        cache_key = search_cache.make_key(search_dto, user)
+        results = search_cache.get(cache_key)
+        if results is None:
+            results = ProjectSearchService.search_projects(
+                search_dto, user
+            ).to_primitive()
+            search_cache.set(cache_key, results)
+
+        return results
 
     @staticmethod
-    @cached(search_cache)
     def search_projects(search_dto: ProjectSearchDTO, user) -> ProjectSearchResultsDTO:
         """Searches all projects for matches to the criteria provided by the user"""
-        all_results, paginated_results = ProjectSearchService._filter_projects(
-            search_dto, user
-        )
+        if search_dto.keyset_pagination or search_dto.cursor:
+            return ProjectSearchService._search_projects_after_cursor(search_dto, user)
+
+        if current_app.config[
+            "PROJECT_CATALOGUE_ENABLED"
+        ] and project_catalogue.can_answer(search_dto):
+            map_ids, paginated_results = ProjectSearchService._catalogue_projects(
+                search_dto, user
+            )
+        else:
+            map_ids, paginated_results = ProjectSearchService._filter_projects(
+                search_dto, user
+            )
         if paginated_results.total == 0:
             raise NotFound(sub_code="PROJECTS_NOT_FOUND")
 
         dto = ProjectSearchResultsDTO()
-        dto.results = [
-            ProjectSearchService.create_result_dto(
-                p,
-                search_dto.preferred_locale,
-                Project.get_project_total_contributions(p[0]),
-            )
-            for p in paginated_results.items
-        ]
+        dto.results = ProjectSearchService.create_result_dtos(
+            paginated_results.items, search_dto.preferred_locale
+        )
         dto.pagination = Pagination(paginated_results)
         if search_dto.omit_map_results:
             return dto
 
-        features = []
-        for project in all_results:
-            # This loop creates a geojson feature collection so you can see all active projects on the map
-            properties = {
-                "projectId": project.id,
-                "priority": ProjectPriority(project.priority).name,
-            }
-            # centroid = project.centroid
-            feature = geojson.Feature(
-                geometry=geojson.loads(project.centroid), properties=properties
+        # Feature collection so you can see all active projects on the map
+        dto.map_results = centroid_layer.get_feature_collection(map_ids)
+
+        return dto
+
+    @staticmethod
+    def _search_projects_after_cursor(
+        search_dto: ProjectSearchDTO, user
+    ) -> ProjectSearchResultsDTO:
+        """
+        Searches projects with keyset pagination, the page starts right after the (order_by value,
+        project id) of the cursor so neither an OFFSET scan nor a count is needed for every page
+        """
+        if search_dto.order_by == "relevance":
+            raise ValueError("Ordering by relevance can't be paginated with a cursor")
+        after = ProjectSearchService.decode_cursor(search_dto)
+        total_is_estimate = False
+        if current_app.config[
+            "PROJECT_CATALOGUE_ENABLED"
+        ] and project_catalogue.can_answer(search_dto):
+            project_ids, start = project_catalogue.search_after(search_dto, user, after)
+            end = start + SEARCH_PAGE_SIZE + 1
+            page_ids = project_ids[start:end].tolist()
+            items = ProjectSearchService._load_page_rows(page_ids, user)
+            map_ids = project_ids.tolist()
+            total = len(map_ids)
+        else:
+            query = ProjectSearchService._create_filter_query(search_dto, user)
+            map_ids = []
+            if not search_dto.omit_map_results:
+                map_ids = ProjectSearchService._get_map_ids(query, search_dto)
+
+            page_query = query.order_by(Project.id)
+            if after is not None:
+                page_query = page_query.filter(
+                    ProjectSearchService._get_keyset_filter(search_dto, after)
+                )
+            items = page_query.limit(SEARCH_PAGE_SIZE + 1).all()
+            if search_dto.estimate_total:
+                total = ProjectSearchService._estimate_total(query)
+                total_is_estimate = True
+            else:
+                total = ProjectSearchService._get_cached_total(query, search_dto, user)
+
+        if not items:
+            raise NotFound(sub_code="PROJECTS_NOT_FOUND")
+
+        has_next = len(items) > SEARCH_PAGE_SIZE
+        items = items[:SEARCH_PAGE_SIZE]
+        dto = ProjectSearchResultsDTO()
+        dto.results = ProjectSearchService.create_result_dtos(
+            items, search_dto.preferred_locale
+        )
+        dto.cursor_pagination = CursorPagination()
+        dto.cursor_pagination.has_next = has_next
+        dto.cursor_pagination.per_page = SEARCH_PAGE_SIZE
+        dto.cursor_pagination.total = total
+        dto.cursor_pagination.total_is_estimate = total_is_estimate
+        if has_next:
+            dto.cursor_pagination.next_cursor = ProjectSearchService.encode_cursor(
+                search_dto, items[-1]
             )
-            features.append(feature)
-        feature_collection = geojson.FeatureCollection(features)
-        dto.map_results = feature_collection
+        if not search_dto.omit_map_results:
+            dto.map_results = centroid_layer.get_feature_collection(map_ids)
 
         return dto
 
+    @staticmethod
+    def encode_cursor(search_dto: ProjectSearchDTO, project) -> str:
+        """Opaque cursor pointing right after the supplied search result row"""
+        value = getattr(project, search_dto.order_by)
+        if isinstance(value, datetime.datetime):
+            value = value.isoformat()
+        cursor = [search_dto.order_by, search_dto.order_by_type, value, project.id]
+        return base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(search_dto: ProjectSearchDTO):
+        """Returns the (order_by value, project id) of the cursor, None for the first page"""
+        if not search_dto.cursor:
+            return None
+        try:
+            order_by, order_by_type, value, project_id = json.loads(
+                base64.urlsafe_b64decode(search_dto.cursor.encode())
+            )
+        except Exception:
+            raise ValueError("Invalid cursor")
+        if order_by != search_dto.order_by or order_by_type != search_dto.order_by_type:
+            raise ValueError("Cursor does not match the requested ordering")
+        if value is not None and order_by in ["last_updated", "due_date"]:
+            value = datetime.datetime.fromisoformat(value)
+
+        return value, int(project_id)
+
+    @staticmethod
+    def _get_keyset_filter(search_dto: ProjectSearchDTO, after):
+        """
+        Filter of the projects sorted after the cursor. Results are ordered on the order_by column,
+        with NULLs last in ascending and first in descending order as Postgres does, then on the id
+        """
+        value, last_id = after
+        column = getattr(Project, search_dto.order_by)
+        if search_dto.order_by == "id":
+            if search_dto.order_by_type == "DESC":
+                return Project.id < last_id
+            return Project.id > last_id
+
+        if search_dto.order_by_type == "DESC":
+            if value is None:
+                return or_(
+                    column.isnot(None), and_(column.is_(None), Project.id > last_id)
+                )
+            return or_(column < value, and_(column == value, Project.id > last_id))
+
+        if value is None:
+            return and_(column.is_(None), Project.id > last_id)
+        return or_(
+            column > value,
+            column.is_(None),
+            and_(column == value, Project.id > last_id),
+        )
+
+    @staticmethod
+    def _get_cached_total(query, search_dto: ProjectSearchDTO, user) -> int:
+        """Counts the results once per search, later pages reuse the count until projects change"""
+        filters = ProjectSearchDTO(search_dto.to_primitive())
+        filters.cursor = None
+        filters.page = 1
+        cache_key = search_cache.make_key(filters, user)
+        total = search_total_cache.get(cache_key)
+        if total is None:
+            total = query.order_by(None).count()
+            search_total_cache[cache_key] = total
+
+        return total
+
+    @staticmethod
+    def _estimate_total(query) -> int:
+        """Number of results estimated by the query planner, without running the query"""
+        plan = db.session.execute(ExplainJson(query.order_by(None).statement)).scalar()
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    @staticmethod
+    def get_map_results_binary(search_dto: ProjectSearchDTO, user) -> bytes:
+        """Returns the map layer of all projects matching the search as packed centroid records"""
+        if current_app.config[
+            "PROJECT_CATALOGUE_ENABLED"
+        ] and project_catalogue.can_answer(search_dto):
+            map_ids = project_catalogue.search(search_dto, user).tolist()
+        else:
+            query = ProjectSearchService._create_filter_query(search_dto, user)
+            map_ids = ProjectSearchService._get_map_ids(query, search_dto)
+
+        return centroid_layer.get_packed_points(map_ids)
+
+    @staticmethod
+    def _get_map_ids(query, search_dto: ProjectSearchDTO) -> list:
+        """Ids of all the projects matched by a search query, without loading their display columns"""
+        columns = [Project.id.label("id")]
+        if search_dto.order_by not in ["id", "relevance"]:
+            # DISTINCT ON and ORDER BY refer to the sort column by name
+            columns.append(getattr(Project, search_dto.order_by))
+
+        return [project.id for project in query.with_entities(*columns).all()]
+
+    @staticmethod
+    def _catalogue_projects(search_dto: ProjectSearchDTO, user):
+        """Filters and orders projects with the in-memory catalogue, only the rows of the page are loaded"""
+        project_ids = project_catalogue.search(search_dto, user)
+
+        paginated_results = CataloguePagination(
+            page=search_dto.page,
+            per_page=SEARCH_PAGE_SIZE,
+            error_out=True,
+            project_ids=project_ids,
+            load_items=lambda page_ids: ProjectSearchService._load_page_rows(
+                page_ids, user
+            ),
+        )
+
+        return project_ids.tolist(), paginated_results
+
+    @staticmethod
+    def _load_page_rows(page_ids: list, user) -> list:
+        """Loads the search rows of the supplied projects, in the order of the ids"""
+        if not page_ids:
+            return []
+        rows = (
+            ProjectSearchService.create_search_query(user)
+            .filter(Project.id.in_(page_ids))
+            .all()
+        )
+        rows_by_id = {row.id: row for row in rows}
+        return [rows_by_id[i] for i in page_ids if i in rows_by_id]
+
     @staticmethod
     def _filter_projects(search_dto: ProjectSearchDTO, user):
         """Filters all projects based on criteria provided by user"""
+        query = ProjectSearchService._create_filter_query(search_dto, user)
+
+        map_ids = []
+        if not search_dto.omit_map_results:
+            map_ids = ProjectSearchService._get_map_ids(query, search_dto)
+
+        paginated_results = query.paginate(
+            page=search_dto.page, per_page=SEARCH_PAGE_SIZE, error_out=True
+        )
+
+        return map_ids, paginated_results
+
+    @staticmethod
+    def _create_filter_query(search_dto: ProjectSearchDTO, user):
+        """Builds the query of the projects matching the criteria provided by user"""
 
         query = ProjectSearchService.create_search_query(user)
 
@@ -300,33 +523,15 @@ class ProjectSearchService:
                 query = query.filter(Project.mapping_types.overlap(mapping_type_array))
 
         if search_dto.text_search:
-            # We construct an OR search, so any projects that contain or more of the search terms should be returned
-            invalid_ts_chars = "@|&!><\\():"
-            search_text = "".join(
-                char for char in search_dto.text_search if char not in invalid_ts_chars
+            text_filter, relevance = ProjectSearchService.get_text_search_expressions(
+                search_dto.text_search
             )
-            or_search = " | ".join([x for x in search_text.split(" ") if x != ""])
-            opts = [
-                ProjectInfo.text_searchable.match(
-                    or_search, postgresql_regconfig="english"
-                ),
-                ProjectInfo.name.ilike(f"%{or_search}%"),
-            ]
-            try:
-                opts.append(Project.id == int(search_dto.text_search))
-            except ValueError:
-                pass
-
-            query = query.filter(or_(*opts))
+            query = query.filter(text_filter)
 
         if search_dto.country:
-            # Unnest country column array.
-            sq = Project.query.with_entities(
-                Project.id, func.unnest(Project.country).label("country")
-            ).subquery()
-            query = query.filter(
-                func.lower(sq.c.country) == search_dto.country.lower()
-            ).filter(Project.id == sq.c.id)
+            query = query.join(
+                project_countries, project_countries.c.project_id == Project.id
+            ).filter(project_countries.c.country_key == search_dto.country.lower())
 
         if search_dto.last_updated_gte:
             last_updated_gte = validate_date_input(search_dto.last_updated_gte)
@@ -344,11 +549,17 @@ class ProjectSearchService:
             created_lte = validate_date_input(search_dto.created_lte)
             query = query.filter(Project.created <= created_lte)
 
-        order_by = search_dto.order_by
-        if search_dto.order_by_type == "DESC":
-            order_by = desc(search_dto.order_by)
+        if search_dto.order_by == "relevance":
+            if not search_dto.text_search:
+                raise ValueError("Ordering by relevance requires a text search")
+            # Rows are already unique per project, the best matching locale ranks the project
+            query = query.order_by(desc(func.max(relevance)), Project.id)
+        else:
+            order_by = search_dto.order_by
+            if search_dto.order_by_type == "DESC":
+                order_by = desc(search_dto.order_by)
 
-        query = query.order_by(order_by).distinct(search_dto.order_by, Project.id)
+            query = query.order_by(order_by).distinct(search_dto.order_by, Project.id)
 
         if search_dto.managed_by and user.role != UserRole.ADMIN.value:
             # Get all the projects associated with the user and team.
@@ -373,22 +584,36 @@ class ProjectSearchService:
             ids = tuple(set(orgs_projects_ids))
             query = query.filter(Project.id.in_(ids))
 
-        all_results = []
-        if not search_dto.omit_map_results:
-            query_result = query
-            query_result.column_descriptions.clear()
-            query_result.add_columns(
-                Project.id,
-                Project.centroid.ST_AsGeoJSON().label("centroid"),
-                Project.priority,
-            )
-            all_results = query_result.all()
+        return query
 
-        paginated_results = query.paginate(
-            page=search_dto.page, per_page=14, error_out=True
-        )
+    @staticmethod
+    def get_text_search_expressions(text_search: str):
+        """
+        Returns the filter matching the search terms and the relevance of each project info row.
+        Any of the terms can match the weighted name/description document, the name can contain the
+        text or be close to it to tolerate typos, and a numeric search also matches the project id.
+        """
+        # We construct an OR search, so any projects that contain or more of the search terms should be returned
+        invalid_ts_chars = "@|&!><\\():"
+        search_text = "".join(
+            char for char in text_search if char not in invalid_ts_chars
+        ).strip()
+        or_search = " or ".join([x for x in search_text.split(" ") if x != ""])
+        ts_query = func.websearch_to_tsquery("english", or_search)
+        opts = [
+            ProjectInfo.text_searchable.op("@@")(ts_query),
+            ProjectInfo.name.ilike(f"%{search_text}%"),
+            literal(search_text).op("<%")(ProjectInfo.name),
+        ]
+        try:
+            opts.append(Project.id == int(text_search))
+        except ValueError:
+            pass
 
-        return all_results, paginated_results
+        relevance = func.coalesce(
+            func.ts_rank_cd(ProjectInfo.text_searchable, ts_query), 0
+        ) + func.coalesce(func.word_similarity(search_text, ProjectInfo.name), 0)
+        return or_(*opts), relevance
 
     @staticmethod
     def filter_by_user_permission(query, user, permission: str):
@@ -490,24 +715,20 @@ class ProjectSearchService:
 
         # get projects intersecting the polygon for created by the author_id
         intersecting_projects = ProjectSearchService._get_intersecting_projects(
-            polygon, search_bbox_dto.project_author
+            polygon,
+            search_bbox_dto.project_author,
+            search_bbox_dto.preferred_locale,
+            ProjectSearchService._get_simplify_tolerance(polygon),
         )
 
         # allow an empty feature collection to be returned if no intersecting features found, since this is primarily
         # for returning data to show on a map
         features = []
         for project in intersecting_projects:
-            try:
-                localDTO = ProjectInfo.get_dto_for_locale(
-                    project.id, search_bbox_dto.preferred_locale, project.default_locale
-                )
-            except Exception:
-                pass
-
             properties = {
                 "projectId": project.id,
                 "projectStatus": ProjectStatus(project.status).name,
-                "projectName": localDTO.name,
+                "projectName": project.name,
             }
             feature = geojson.Feature(
                 geometry=geojson.loads(project.geometry), properties=properties
@@ -517,25 +738,61 @@ class ProjectSearchService:
         return geojson.FeatureCollection(features)
 
     @staticmethod
-    def _get_intersecting_projects(search_polygon: Polygon, author_id: int):
-        """Executes a database query to get the intersecting projects created by the author if provided"""
-
-        query = db.session.query(
-            Project.id,
-            Project.status,
-            Project.default_locale,
-            Project.geometry.ST_AsGeoJSON().label("geometry"),
-        ).filter(
-            ST_Intersects(
-                Project.geometry,
-                ST_MakeEnvelope(
-                    search_polygon.bounds[0],
-                    search_polygon.bounds[1],
-                    search_polygon.bounds[2],
-                    search_polygon.bounds[3],
-                    4326,
+    def _get_simplify_tolerance(polygon: Polygon) -> float:
+        """Tolerance in degrees simplifying project geometries to about a pixel of a map showing the bbox"""
+        min_x, min_y, max_x, max_y = polygon.bounds
+        return max(max_x - min_x, max_y - min_y) / BBOX_MAP_SIZE_PIXELS
+
+    @staticmethod
+    def _get_intersecting_projects(
+        search_polygon: Polygon,
+        author_id: int,
+        preferred_locale: str = "en",
+        tolerance: float = 0,
+    ):
+        """
+        Executes a database query to get the intersecting projects created by the author if provided,
+        with their simplified geometry and their name in the preferred locale or else the default one
+        """
+        preferred_info = aliased(ProjectInfo)
+        default_info = aliased(ProjectInfo)
+        query = (
+            db.session.query(
+                Project.id,
+                Project.status,
+                func.coalesce(
+                    func.nullif(preferred_info.name, ""), default_info.name
+                ).label("name"),
+                Project.geometry.ST_SimplifyPreserveTopology(tolerance)
+                .ST_AsGeoJSON()
+                .label("geometry"),
+            )
+            .outerjoin(
+                preferred_info,
+                and_(
+                    preferred_info.project_id == Project.id,
+                    preferred_info.locale == preferred_locale,
                 ),
             )
+            .outerjoin(
+                default_info,
+                and_(
+                    default_info.project_id == Project.id,
+                    default_info.locale == Project.default_locale,
+                ),
+            )
+            .filter(
+                ST_Intersects(
+                    Project.geometry,
+                    ST_MakeEnvelope(
+                        search_polygon.bounds[0],
+                        search_polygon.bounds[1],
+                        search_polygon.bounds[2],
+                        search_polygon.bounds[3],
+                        4326,
+                    ),
+                )
+            )
         )
 
         if author_id:
@@ -548,11 +805,10 @@ class ProjectSearchService:
         """make a shapely Polygon in SRID 4326 from bbox and srid"""
         try:
             polygon = box(bbox[0], bbox[1], bbox[2], bbox[3])
-            if not srid == 4326:
-                geometry = shape.from_shape(polygon, srid)
-                with db.engine.connect() as conn:
-                    geom_4326 = conn.execute(ST_Transform(geometry, 4326)).scalar()
-                polygon = shape.to_shape(geom_4326)
+            if srid == 3857:
+                polygon = to_lonlat(polygon)
+            elif not srid == 4326:
+                raise ValueError(f"unsupported SRID {srid}")
         except Exception as e:
             current_app.logger.error(f"InvalidData- error making polygon: {e}")
             raise ProjectSearchServiceError(f"InvalidData- error making polygon: {e}")
@@ -560,11 +816,8 @@ class ProjectSearchService:
 
     @staticmethod
     def _get_area_sqm(polygon: Polygon) -> float:
-        """get the area of the polygon in square metres"""
-        with db.engine.connect() as conn:
-            return conn.execute(
-                ST_Area(ST_Transform(shape.from_shape(polygon, 4326), 3857))
-            ).scalar()
+        """get the area of the polygon in square metres, as measured in EPSG:3857"""
+        return to_mercator(polygon).area
 
     @staticmethod
     def validate_bbox_area(polygon: Polygon) -> bool:
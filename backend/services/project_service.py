@@ -4,6 +4,7 @@ from flask import current_app
 import geojson
 from datetime import datetime, timedelta
 
+from backend import db
 from backend.exceptions import NotFound
 
 from backend.models.dtos.mapping_dto import TaskDTOs
@@ -28,6 +29,7 @@ from backend.models.postgis.statuses import (
     TeamRoles,
     EncouragingEmailType,
     MappingLevel,
+    TaskStatus,
 )
 from backend.models.postgis.task import Task, TaskHistory
 from backend.services.messaging.smtp_service import SMTPService
@@ -35,11 +37,16 @@ from backend.services.users.user_service import UserService
 from backend.services.project_search_service import ProjectSearchService
 from backend.services.project_admin_service import ProjectAdminService
 from backend.services.team_service import TeamService
+from backend.services.task_geometry_cache import task_geometry_cache
+from backend.services.task_event_broker import TaskEventBroker
 from sqlalchemy import func, or_
 from sqlalchemy.sql.expression import true
 
 summary_cache = TTLCache(maxsize=1024, ttl=600)
 
+# Maximum number of tasks returned by a call of the task state change feed
+TASK_CHANGES_PAGE_SIZE = 1000
+
 
 class ProjectServiceError(Exception):
     """Custom Exception to notify callers an error occurred when handling projects"""
@@ -75,7 +82,9 @@ class ProjectService:
 
     @staticmethod
     def auto_unlock_tasks(project_id: int):
-        Task.auto_unlock_tasks(project_id)
+        unlocked_tasks = Task.auto_unlock_tasks(project_id)
+        TaskEventBroker.publish_tasks(db.session, "unlock", unlocked_tasks)
+        db.session.commit()
 
     @staticmethod
     def delete_tasks(project_id: int, tasks_ids):
@@ -91,8 +100,12 @@ class ProjectService:
         if len(not_found) > 0:
             raise NotFound(sub_code="TASK_NOT_FOUND", tasks=not_found)
 
-        # Delete task one by one.
-        [t["obj"].delete() for t in tasks]
+        # History of the deleted tasks goes with them, so it no longer counts in stats
+        TaskHistory.delete_for_tasks(project_id, tasks_ids)
+        for task in tasks:
+            db.session.delete(task["obj"])
+        Project.bump_tasking_version(project_id)
+        db.session.commit()
 
     @staticmethod
     def get_contribs_by_day(project_id: int) -> ProjectContribsDTO:
@@ -196,18 +209,21 @@ class ProjectService:
 
     @staticmethod
     def get_project_dto_for_mapper(
-        project_id, current_user_id, locale="en", abbrev=False
+        project_id, current_user_id, locale="en", abbrev=False, include_tasks=True
     ) -> ProjectDTO:
         """
         Get the project DTO for mappers
         :param project_id: ID of the Project mapper has requested
         :param locale: Locale the mapper has requested
+        :param include_tasks: False to leave the task layer out of the DTO
         :raises ProjectServiceError, NotFound
         """
         project = ProjectService.get_project_by_id(project_id)
         # if project is public and is not draft, we don't need to check permissions
         if not project.private and not project.status == ProjectStatus.DRAFT.value:
-            return project.as_dto_for_mapping(current_user_id, locale, abbrev)
+            return project.as_dto_for_mapping(
+                current_user_id, locale, abbrev, include_tasks
+            )
 
         is_allowed_user = True
         is_team_member = None
@@ -254,7 +270,9 @@ class ProjectService:
                 )
 
         if is_allowed_user or is_manager_permission or is_team_member:
-            return project.as_dto_for_mapping(current_user_id, locale, abbrev)
+            return project.as_dto_for_mapping(
+                current_user_id, locale, abbrev, include_tasks
+            )
         else:
             return None
 
@@ -269,6 +287,64 @@ class ProjectService:
         project = ProjectService.get_project_by_id(project_id)
         return project.tasks_as_geojson(task_ids_str, order_by, order_by_type, status)
 
+    @staticmethod
+    def get_project_tasks_geojson_text(
+        project_id,
+        task_ids_str: str,
+        order_by: str = None,
+        order_by_type: str = "ASC",
+        status: int = None,
+    ) -> str:
+        """Same as get_project_tasks, returned as serialised GeoJSON"""
+        project = ProjectService.get_project_by_id(project_id)
+        if current_app.config["TASK_GEOMETRY_CACHE_MB"] > 0:
+            return task_geometry_cache.get_feature_collection_text(
+                project.id, task_ids_str, order_by, order_by_type, status
+            )
+        return project.tasks_as_geojson_text(
+            task_ids_str, order_by, order_by_type, status
+        )
+
+    @staticmethod
+    def get_task_state_changes(project_id: int, since: str = None) -> dict:
+        """
+        Status, lock and mapper of the project tasks changed after the since cursor, all tasks if no
+        cursor is supplied. Clients pass the returned cursor to the next call, and reload the task
+        geometries when taskingVersion changes.
+        :raises NotFound, ValueError
+        """
+        project = ProjectService.get_project_by_id(project_id)
+        after = None
+        if since:
+            try:
+                change_xid, task_id = since.split("-")
+                after = (int(change_xid), int(task_id))
+            except ValueError:
+                raise ValueError("Invalid cursor")
+
+        tasks = Task.get_state_changes(
+            project_id, after, limit=TASK_CHANGES_PAGE_SIZE + 1
+        )
+        has_more = len(tasks) > TASK_CHANGES_PAGE_SIZE
+        tasks = tasks[:TASK_CHANGES_PAGE_SIZE]
+        if tasks:
+            after = (tasks[-1].change_xid, tasks[-1].id)
+
+        return {
+            "cursor": f"{after[0]}-{after[1]}" if after else None,
+            "hasMore": has_more,
+            "taskingVersion": project.tasking_version,
+            "tasks": [
+                {
+                    "taskId": task.id,
+                    "taskStatus": TaskStatus(task.task_status).name,
+                    "lockedBy": task.locked_by,
+                    "mappedBy": task.mapped_by,
+                }
+                for task in tasks
+            ],
+        }
+
     @staticmethod
     def get_project_aoi(project_id):
         project = ProjectService.get_project_by_id(project_id)
@@ -524,15 +600,10 @@ class ProjectService:
         query = ProjectSearchService.create_search_query()
         projects = query.filter(Project.featured == true()).group_by(Project.id).all()
 
-        # Get total contributors.
-        contrib_counts = ProjectSearchService.get_total_contributions(projects)
-        zip_items = zip(projects, contrib_counts)
-
         dto = ProjectSearchResultsDTO()
-        dto.results = [
-            ProjectSearchService.create_result_dto(p, preferred_locale, t)
-            for p, t in zip_items
-        ]
+        dto.results = ProjectSearchService.create_result_dtos(
+            projects, preferred_locale
+        )
 
         return dto
 
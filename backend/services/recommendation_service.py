@@ -229,25 +229,21 @@ class ProjectRecommendationService:
             Project.total_tasks != Project.tasks_validated + Project.tasks_bad_imagery
         )
 
-        # Set the limit to the number of similar projects if it is less than the limit
-        limit = min(limit, len(similar_projects)) if similar_projects else 0
-
-        count = 0
-        while len(dto.results) < limit:
-            # In case the user is not authorized to view the project and similar projects are less than the limit
-            # then we need to break the loop and return the results
-            try:
-                project_id = similar_projects[count]
-            except IndexError:
-                break
-            project = query.filter(Project.id == project_id).all()
-            if project:
-                dto.results.append(
-                    ProjectSearchService.create_result_dto(
-                        project[0],
-                        preferred_locale,
-                        Project.get_project_total_contributions(project[0][0]),
-                    )
-                )
-            count += 1
+        if not similar_projects:
+            return dto
+
+        # Projects the user is not authorized to view are dropped by the search query, so fetch all
+        # candidates at once and keep the most similar ones up to the limit
+        projects_by_id = {
+            project.id: project
+            for project in query.filter(Project.id.in_(similar_projects)).all()
+        }
+        projects = [
+            projects_by_id[project_id]
+            for project_id in similar_projects
+            if project_id in projects_by_id
+        ][:limit]
+        dto.results = ProjectSearchService.create_result_dtos(
+            projects, preferred_locale
+        )
         return dto
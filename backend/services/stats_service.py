@@ -26,7 +26,7 @@ from backend.models.dtos.stats_dto import (
 from backend.models.dtos.project_dto import ProjectSearchResultsDTO
 from backend.models.postgis.campaign import Campaign, campaign_projects
 from backend.models.postgis.organisation import Organisation
-from backend.models.postgis.project import Project
+from backend.models.postgis.project import Project, project_countries
 from backend.models.postgis.statuses import TaskStatus, MappingLevel, UserGender
 from backend.models.postgis.task import TaskHistory, User, Task, TaskAction
 from backend.models.postgis.utils import timestamp  # noqa: F401
@@ -71,6 +71,30 @@ class StatsService:
         # Transaction will be saved when task is saved
         return project, user
 
+    @staticmethod
+    def update_stats_after_task_state_changes(
+        project_id: int, user_id: int, state_changes: list
+    ):
+        """Same as update_stats_after_task_state_change for many tasks, loading the project and user once"""
+        project = ProjectService.get_project_by_id(project_id)
+        user = UserService.get_user_by_id(user_id)
+        for last_state, new_state in state_changes:
+            if new_state in [
+                TaskStatus.LOCKED_FOR_VALIDATION,
+                TaskStatus.LOCKED_FOR_MAPPING,
+            ]:
+                continue  # No stats to record for these states
+            project, user = StatsService._update_tasks_stats(
+                project, user, last_state, new_state
+            )
+
+        if project_id not in (user.projects_mapped or []):
+            user.projects_mapped = (user.projects_mapped or []) + [project_id]
+        project.last_updated = timestamp()
+
+        # Transaction will be saved by the caller
+        return project, user
+
     @staticmethod
     def _update_tasks_stats(
         project: Project,
@@ -186,14 +210,9 @@ class StatsService:
 
         projects_query = ProjectSearchService.create_search_query()
         projects = projects_query.filter(Project.id == query.c.id).all()
-        # Get total contributors.
-        contrib_counts = ProjectSearchService.get_total_contributions(projects)
-        zip_items = zip(projects, contrib_counts)
 
         dto = ProjectSearchResultsDTO()
-        dto.results = [
-            ProjectSearchService.create_result_dto(p, "en", t) for p, t in zip_items
-        ]
+        dto.results = ProjectSearchService.create_result_dtos(projects, "en")
 
         return dto
 
@@ -629,14 +648,10 @@ class StatsService:
         if project_id:
             query = query.filter(TaskHistory.project_id.in_(project_id))
         if country:
-            # Unnest country column array.
-            sq = Project.query.with_entities(
-                Project.id, func.unnest(Project.country).label("country")
-            ).subquery()
-
-            query = query.filter(sq.c.country.ilike("%{}%".format(country))).filter(
-                TaskHistory.project_id == sq.c.id
+            country_projects = db.session.query(project_countries.c.project_id).filter(
+                project_countries.c.country_key == country.lower()
             )
+            query = query.filter(TaskHistory.project_id.in_(country_projects))
 
         query = query.subquery()
 
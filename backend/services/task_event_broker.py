@@ -0,0 +1,210 @@
+import json
+import queue
+import select
+import threading
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.orm.attributes import get_history
+
+from backend import db
+from backend.models.postgis.statuses import TaskStatus
+from backend.models.postgis.task import Task
+
+# Postgres channel carrying task events between workers
+TASK_EVENTS_CHANNEL = "task_events"
+
+# Key used by a session to collect task events until it commits, for the local broker
+PENDING_TASK_EVENTS = "pending_task_events"
+
+# Events a subscriber may fall behind by before it is told to reload the tasks
+SUBSCRIBER_QUEUE_SIZE = 256
+
+# Seconds after which an idle stream sends a keepalive comment
+KEEPALIVE_INTERVAL = 15
+
+
+class TaskEventSubscriber:
+    """Events of a project waiting to be sent to one stream"""
+
+    def __init__(self, project_id: int):
+        self.project_id = project_id
+        self.events = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+
+class TaskEventBroker:
+    """
+    Fans out task lock, unlock, state change and split events of a project to the server-sent events
+    streams of this worker. Events are published once the transaction changing the tasks commits: with
+    the "postgres" broker through NOTIFY, which a listener of each worker receives, with the "local"
+    broker directly to the streams of the worker that committed them.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}
+        self.listener = None
+
+    def subscribe(self, project_id: int) -> TaskEventSubscriber:
+        if current_app.config["TASK_EVENTS_BROKER"] == "postgres":
+            self._start_listener()
+        subscriber = TaskEventSubscriber(project_id)
+        with self.lock:
+            self.subscribers.setdefault(project_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: TaskEventSubscriber):
+        with self.lock:
+            project_subscribers = self.subscribers.get(subscriber.project_id, set())
+            project_subscribers.discard(subscriber)
+            if not project_subscribers:
+                self.subscribers.pop(subscriber.project_id, None)
+
+    def dispatch(self, task_event: dict):
+        """Hands the event to the streams of its project opened on this worker"""
+        with self.lock:
+            project_subscribers = list(
+                self.subscribers.get(task_event["projectId"], ())
+            )
+        for subscriber in project_subscribers:
+            try:
+                subscriber.events.put_nowait(task_event)
+            except queue.Full:
+                # The client is too slow to follow, it has to reload the tasks instead
+                subscriber.overflowed = True
+                self.unsubscribe(subscriber)
+
+    def stream(self, subscriber: TaskEventSubscriber):
+        """Server-sent events of the subscriber, with a comment line sent while the project is idle
+        so that proxies keep the connection open"""
+        try:
+            yield "retry: 5000\n\n"
+            while not subscriber.overflowed:
+                try:
+                    task_event = subscriber.events.get(timeout=KEEPALIVE_INTERVAL)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {task_event['event']}\ndata: {json.dumps(task_event)}\n\n"
+            yield "event: resync\ndata: {}\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    def _start_listener(self):
+        with self.lock:
+            if self.listener is not None and self.listener.is_alive():
+                return
+            self.listener = threading.Thread(
+                target=self._listen,
+                args=(current_app._get_current_object(),),
+                name="task-event-listener",
+                daemon=True,
+            )
+            self.listener.start()
+
+    def _listen(self, app):
+        """Receives the events of all workers. The socket is polled with select so that it only
+        costs a greenlet when running under gevent"""
+        while True:
+            listener = None
+            try:
+                with app.app_context():
+                    connection = db.engine.raw_connection()
+                # The connection is kept for LISTEN only, outside of the pool
+                connection.detach()
+                listener = connection.driver_connection
+                listener.autocommit = True
+                listener.cursor().execute(f"LISTEN {TASK_EVENTS_CHANNEL}")
+                while True:
+                    if select.select([listener], [], [], 60) == ([], [], []):
+                        continue
+                    listener.poll()
+                    while listener.notifies:
+                        notify = listener.notifies.pop(0)
+                        self.dispatch(json.loads(notify.payload))
+            except Exception as e:
+                app.logger.error(f"Task event listener failed: {str(e)}")
+                if listener is not None:
+                    listener.close()
+                time.sleep(5)
+
+    @staticmethod
+    def get_event_type(task: Task):
+        """Classifies the change of the flushed task, None if its lock and status are unchanged"""
+        locked_by = get_history(task, "locked_by")
+        if locked_by.has_changes():
+            return "lock" if task.locked_by is not None else "unlock"
+        if get_history(task, "task_status").has_changes():
+            return "state"
+        return None
+
+    @staticmethod
+    def as_event(task: Task, event_type: str) -> dict:
+        return {
+            "event": event_type,
+            "projectId": task.project_id,
+            "taskId": task.id,
+            "taskStatus": TaskStatus(task.task_status).name,
+            "lockedBy": task.locked_by,
+            "mappedBy": task.mapped_by,
+        }
+
+    @staticmethod
+    def publish(session, task_event: dict, connection=None):
+        """Publishes an event when the transaction of the session commits"""
+        if current_app.config["TASK_EVENTS_BROKER"] == "postgres":
+            (connection or session.connection()).execute(
+                db.select(func.pg_notify(TASK_EVENTS_CHANNEL, json.dumps(task_event)))
+            )
+        else:
+            session.info.setdefault(PENDING_TASK_EVENTS, []).append(task_event)
+
+    @staticmethod
+    def publish_tasks(session, event_type: str, tasks):
+        """Publishes the events of tasks changed by set based updates, which the ORM listener does not see"""
+        for task in tasks:
+            TaskEventBroker.publish(session, TaskEventBroker.as_event(task, event_type))
+
+    @staticmethod
+    def publish_split(project_id: int, task_id: int, new_task_ids):
+        """Publishes the split of a task, committed by the caller"""
+        TaskEventBroker.publish(
+            db.session,
+            {
+                "event": "split",
+                "projectId": project_id,
+                "taskId": task_id,
+                "newTaskIds": list(new_task_ids),
+            },
+        )
+
+
+task_event_broker = TaskEventBroker()
+
+
+@event.listens_for(Task, "after_update")
+def _publish_task_update(mapper, connection, target):
+    session = object_session(target)
+    if session is None or not has_app_context():
+        return
+    event_type = TaskEventBroker.get_event_type(target)
+    if event_type is not None:
+        TaskEventBroker.publish(
+            session, TaskEventBroker.as_event(target, event_type), connection
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_after_commit(session):
+    task_events = session.info.pop(PENDING_TASK_EVENTS, None)
+    if task_events:
+        for task_event in task_events:
+            task_event_broker.dispatch(task_event)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_events(session, previous_transaction):
+    session.info.pop(PENDING_TASK_EVENTS, None)
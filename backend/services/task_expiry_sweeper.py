@@ -0,0 +1,87 @@
+import time
+
+from flask import current_app
+from sqlalchemy import func, select, text
+
+from backend import db
+from backend.models.postgis.task import Task
+from backend.services.task_event_broker import TaskEventBroker
+
+# Key of the Postgres advisory lock held by the elected sweeper
+TASK_EXPIRY_SWEEPER_LOCK_ID = 5_472_019
+
+
+class TaskExpirySweeper:
+    """
+    Unlocks tasks locked for longer than TASK_AUTOUNLOCK_AFTER. Any number of sweeper processes may run
+    on any number of nodes; only the one holding the Postgres advisory lock sweeps, and another one takes
+    over when its connection goes away.
+    """
+
+    def __init__(self):
+        self.leader_connection = None
+        self.sweeps = 0
+        self.tasks_unlocked = 0
+        self.last_sweep_duration = None
+
+    def is_leader(self) -> bool:
+        """Tries to acquire the advisory lock, kept on a dedicated connection for as long as it is alive"""
+        if self.leader_connection is not None:
+            try:
+                self.leader_connection.execute(text("SELECT 1"))
+                self.leader_connection.commit()
+                return True
+            except Exception:
+                # The lock went away with the connection, compete for it again
+                self.leader_connection.invalidate()
+                self.leader_connection = None
+
+        connection = db.engine.connect()
+        acquired = connection.execute(
+            select(func.pg_try_advisory_lock(TASK_EXPIRY_SWEEPER_LOCK_ID))
+        ).scalar()
+        # Session level advisory locks outlive the transaction
+        connection.commit()
+        if acquired:
+            self.leader_connection = connection
+        else:
+            connection.close()
+        return acquired
+
+    def sweep(self) -> int:
+        """Unlocks the expired tasks of all projects in one transaction, returns the number of tasks unlocked"""
+        started = time.monotonic()
+        unlocked_tasks = Task.auto_unlock_tasks()
+        TaskEventBroker.publish_tasks(db.session, "unlock", unlocked_tasks)
+        db.session.commit()
+        unlocked = len(unlocked_tasks)
+        project_ids = {task.project_id for task in unlocked_tasks}
+
+        self.sweeps += 1
+        self.tasks_unlocked += unlocked
+        self.last_sweep_duration = time.monotonic() - started
+        current_app.logger.info(
+            f"Task expiry sweep unlocked {unlocked} tasks of {len(project_ids)} projects "
+            f"in {self.last_sweep_duration:.3f}s ({self.tasks_unlocked} tasks in {self.sweeps} sweeps)"
+        )
+        return unlocked
+
+    def sweep_if_leader(self):
+        try:
+            if self.is_leader():
+                self.sweep()
+        except Exception as e:
+            current_app.logger.critical(f"Task expiry sweep failed: {str(e)}")
+            db.session.rollback()
+        finally:
+            db.session.remove()
+
+    def run_forever(self):
+        """Sweeps every TASK_EXPIRY_SWEEP_INTERVAL seconds while this process is the elected sweeper"""
+        interval = current_app.config["TASK_EXPIRY_SWEEP_INTERVAL"]
+        while True:
+            self.sweep_if_leader()
+            time.sleep(interval)
+
+
+expiry_sweeper = TaskExpirySweeper()
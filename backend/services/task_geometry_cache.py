@@ -0,0 +1,167 @@
+import json
+import threading
+
+from cachetools import LRUCache
+from flask import current_app
+
+from backend import db
+from backend.exceptions import NotFound
+from backend.models.postgis.project import Project
+from backend.models.postgis.statuses import TaskStatus
+from backend.models.postgis.task import Task
+
+# Approximate bytes held by a cached task besides its serialised geometry
+TASK_ENTRY_OVERHEAD = 200
+
+
+class ProjectTaskGeometries:
+    """Serialised task geometries of a project at a tasking version"""
+
+    def __init__(self, version: int, tasks: dict):
+        # task id -> (x, y, zoom, is_square, GeoJSON geometry text)
+        self.version = version
+        self.tasks = tasks
+        self.size = sum(len(task[4]) + TASK_ENTRY_OVERHEAD for task in tasks.values())
+
+
+class SizedLRUCache(LRUCache):
+    """LRU cache bounded by the size of its entries, counting the entries it evicts"""
+
+    def __init__(self, maxsize: int):
+        super().__init__(maxsize=maxsize, getsizeof=lambda entry: entry.size)
+        self.evictions = 0
+
+    def popitem(self):
+        self.evictions += 1
+        return super().popitem()
+
+
+class TaskGeometryCache:
+    """
+    Per-worker cache of the task geometries of projects, serialised once per project tasking version.
+    Task layers are assembled from the cached geometries and an overlay of the current status, lock and
+    mapper of each task, so ST_AsGeoJSON only runs again once a split or task deletion bumps the version.
+    Memory is bounded to TASK_GEOMETRY_CACHE_MB, least recently used projects are evicted first.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.projects = None
+        self.hits = 0
+        self.misses = 0
+
+    def _get_projects(self) -> SizedLRUCache:
+        if self.projects is None:
+            self.projects = SizedLRUCache(
+                current_app.config["TASK_GEOMETRY_CACHE_MB"] * 1024 * 1024
+            )
+        return self.projects
+
+    @staticmethod
+    def _load(project_id: int) -> ProjectTaskGeometries:
+        # The version is read first so geometries changed meanwhile are stored under the older version
+        version = Project.get_tasking_version(project_id)
+        query = db.session.query(
+            Task.id,
+            Task.x,
+            Task.y,
+            Task.zoom,
+            Task.is_square,
+            Task.geometry.ST_AsGeoJSON().label("geojson"),
+        ).filter(Task.project_id == project_id)
+        return ProjectTaskGeometries(
+            version,
+            {
+                task.id: (task.x, task.y, task.zoom, task.is_square, task.geojson)
+                for task in query.all()
+            },
+        )
+
+    def get_geometries(self, project_id: int, task_ids) -> ProjectTaskGeometries:
+        """Returns the geometries of the project, loading them if the cached ones are outdated"""
+        version = Project.get_tasking_version(project_id)
+        if version is None:
+            raise NotFound(sub_code="PROJECT_NOT_FOUND", project_id=project_id)
+
+        with self.lock:
+            projects = self._get_projects()
+            entry = projects.get(project_id)
+            if (
+                entry is not None
+                and entry.version == version
+                and all(task_id in entry.tasks for task_id in task_ids)
+            ):
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        entry = TaskGeometryCache._load(project_id)
+        with self.lock:
+            try:
+                projects[project_id] = entry
+            except ValueError:
+                # Geometries of the project alone exceed the cache size
+                projects.pop(project_id, None)
+        return entry
+
+    @staticmethod
+    def as_feature_collection_text(geometries: ProjectTaskGeometries, tasks) -> str:
+        """Serialises the supplied task overlay rows as a FeatureCollection using the cached geometries"""
+        features = []
+        for task in tasks:
+            if task.id not in geometries.tasks:
+                # Deleted after the overlay was read
+                continue
+            x, y, zoom, is_square, geometry = geometries.tasks[task.id]
+            properties = json.dumps(
+                dict(
+                    taskId=task.id,
+                    taskX=x,
+                    taskY=y,
+                    taskZoom=zoom,
+                    taskIsSquare=is_square,
+                    taskStatus=TaskStatus(task.task_status).name,
+                    lockedBy=task.locked_by,
+                    mappedBy=task.mapped_by,
+                )
+            )
+            features.append(
+                f'{{"type": "Feature", "geometry": {geometry}, "properties": {properties}}}'
+            )
+        return f'{{"type": "FeatureCollection", "features": [{", ".join(features)}]}}'
+
+    def get_feature_collection_text(
+        self,
+        project_id: int,
+        task_ids_str: str = None,
+        order_by: str = None,
+        order_by_type: str = "ASC",
+        status: int = None,
+    ) -> str:
+        """Same output as Task.get_tasks_as_geojson_text, with geometries served from the cache"""
+        tasks = Task.filter_tasks_for_geojson(
+            db.session.query(Task.id, Task.task_status, Task.locked_by, Task.mapped_by),
+            project_id,
+            task_ids_str,
+            order_by,
+            order_by_type,
+            status,
+        ).all()
+        geometries = self.get_geometries(project_id, [task.id for task in tasks])
+        return TaskGeometryCache.as_feature_collection_text(geometries, tasks)
+
+    def info(self) -> dict:
+        """Hit and miss counts and memory use of this worker's cache"""
+        with self.lock:
+            projects = self._get_projects()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": projects.evictions,
+                "projects": len(projects),
+                "sizeBytes": projects.currsize,
+                "maxSizeBytes": projects.maxsize,
+            }
+
+
+task_geometry_cache = TaskGeometryCache()
@@ -0,0 +1,193 @@
+import bleach
+from sqlalchemy import insert, select, update
+
+from backend import db
+from backend.models.postgis.project import Project
+from backend.models.postgis.statuses import TaskStatus
+from backend.models.postgis.task import (
+    Task,
+    TaskAction,
+    TaskHistory,
+    TaskInvalidationHistory,
+)
+from backend.models.postgis.utils import timestamp
+from backend.services.task_event_broker import TaskEventBroker
+
+LOCKED_STATUSES = [
+    TaskStatus.LOCKED_FOR_MAPPING.value,
+    TaskStatus.LOCKED_FOR_VALIDATION.value,
+]
+COUNTERS = {
+    TaskStatus.MAPPED: "tasks_mapped",
+    TaskStatus.VALIDATED: "tasks_validated",
+    TaskStatus.BADIMAGERY: "tasks_bad_imagery",
+}
+
+
+class TaskTransitionService:
+    """
+    Applies a state change to every task of a project in a set of statuses with a handful of set based
+    statements in one transaction, recording the same history as locking and unlocking each task would.
+    """
+
+    @staticmethod
+    def transition_tasks(
+        project: Project,
+        user_id: int,
+        from_statuses: list,
+        new_state: TaskStatus,
+        lock_action: TaskAction = None,
+        comment: str = None,
+        values: dict = None,
+    ) -> list:
+        """
+        Moves the tasks of the project in one of the supplied statuses to the new state and commits
+        :param project: Project in scope
+        :param user_id: ID of user performing the transition
+        :param from_statuses: Statuses of the tasks in scope
+        :param new_state: New state of the tasks
+        :param lock_action: Lock recorded, and closed at once, for the tasks not locked yet. Open locks of
+            locked tasks are closed with their duration. If None, open locks are recorded as auto unlocked
+        :param comment: Comment recorded on each task
+        :param values: Other columns of the tasks to set, may be SQL expressions of the current row
+        :return: project_id, id, task_status, locked_by and mapped_by of the changed tasks
+        """
+        action_date = timestamp()
+        tasks = db.session.execute(
+            select(Task.id, Task.task_status, Task.last_status)
+            .where(
+                Task.project_id == project.id,
+                Task.task_status.in_([status.value for status in from_statuses]),
+            )
+            .with_for_update()
+        ).all()
+        task_ids = [task.id for task in tasks]
+        changed_tasks = []
+        if task_ids:
+            TaskTransitionService._record_history(
+                project.id,
+                user_id,
+                tasks,
+                new_state,
+                lock_action,
+                comment,
+                action_date,
+            )
+            changed_tasks = db.session.execute(
+                update(Task)
+                .where(Task.project_id == project.id, Task.id.in_(task_ids))
+                .values(task_status=new_state.value, locked_by=None, **(values or {}))
+                .returning(
+                    Task.project_id,
+                    Task.id,
+                    Task.task_status,
+                    Task.locked_by,
+                    Task.mapped_by,
+                )
+                .execution_options(synchronize_session=False)
+            ).all()
+            TaskEventBroker.publish_tasks(db.session, "state", changed_tasks)
+            TaskTransitionService._update_counters(project, tasks, new_state)
+
+        project.save()
+        return changed_tasks
+
+    @staticmethod
+    def _record_history(
+        project_id: int,
+        user_id: int,
+        tasks,
+        new_state: TaskStatus,
+        lock_action: TaskAction,
+        comment: str,
+        action_date,
+    ):
+        locked_ids = [task.id for task in tasks if task.task_status in LOCKED_STATUSES]
+        if locked_ids:
+            if lock_action is None:
+                # Same as reset_task, locks are recorded as expired
+                TaskHistory.close_open_lock_actions(
+                    project_id,
+                    locked_ids,
+                    action_date,
+                    auto_unlock_after=Task.auto_unlock_delta(),
+                )
+            else:
+                TaskHistory.close_open_lock_actions(project_id, locked_ids, action_date)
+
+        history = []
+        if comment:
+            clean_comment = bleach.clean(comment)
+            history += [
+                dict(
+                    action=TaskAction.COMMENT.name,
+                    action_text=clean_comment,
+                    task_id=task.id,
+                )
+                for task in tasks
+            ]
+        if lock_action is not None:
+            history += [
+                dict(
+                    action=lock_action.name,
+                    action_text="00:00:00",
+                    duration_seconds=0,
+                    task_id=task.id,
+                )
+                for task in tasks
+                if task.task_status not in LOCKED_STATUSES
+            ]
+        for row in history:
+            row.update(project_id=project_id, user_id=user_id, action_date=action_date)
+        if history:
+            db.session.execute(insert(TaskHistory), history)
+
+        state_changes = db.session.execute(
+            insert(TaskHistory).returning(
+                TaskHistory.id, TaskHistory.task_id, TaskHistory.action_date
+            ),
+            [
+                dict(
+                    project_id=project_id,
+                    task_id=task.id,
+                    action=TaskAction.STATE_CHANGE.name,
+                    action_text=new_state.name,
+                    action_date=action_date,
+                    user_id=user_id,
+                )
+                for task in tasks
+            ],
+        ).all()
+        if new_state == TaskStatus.VALIDATED:
+            TaskInvalidationHistory.record_validations(
+                project_id, user_id, state_changes
+            )
+        elif new_state == TaskStatus.INVALIDATED:
+            TaskInvalidationHistory.record_invalidations(
+                project_id, user_id, state_changes
+            )
+
+    @staticmethod
+    def _update_counters(project: Project, tasks, new_state: TaskStatus):
+        """
+        Moves each task from the counter of its last state to the one of the new state, as
+        StatsService._update_tasks_stats does. Locked tasks are counted under their last state change
+        """
+        for task in tasks:
+            if task.task_status in LOCKED_STATUSES:
+                # Same as TaskHistory.get_last_status, READY if the task never changed state
+                last_state = (
+                    TaskStatus[task.last_status]
+                    if task.last_status
+                    else TaskStatus.READY
+                )
+            else:
+                last_state = TaskStatus(task.task_status)
+            if last_state == new_state:
+                continue
+            if last_state in COUNTERS:
+                counter = COUNTERS[last_state]
+                setattr(project, counter, getattr(project, counter) - 1)
+            if new_state in COUNTERS:
+                counter = COUNTERS[new_state]
+                setattr(project, counter, getattr(project, counter) + 1)
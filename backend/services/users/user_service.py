@@ -2,7 +2,7 @@ from cachetools import TTLCache, cached
 from flask import current_app
 import datetime
 from sqlalchemy.sql.expression import literal
-from sqlalchemy import func, or_, desc, and_, distinct, cast, Time, column
+from sqlalchemy import func, or_, desc, and_, distinct, column
 
 from backend.exceptions import NotFound
 from backend import db
@@ -22,7 +22,7 @@ from backend.models.dtos.user_dto import (
 from backend.models.dtos.interests_dto import InterestsListDTO, InterestDTO
 from backend.models.postgis.interests import Interest, project_interests
 from backend.models.postgis.message import Message, MessageType
-from backend.models.postgis.project import Project
+from backend.models.postgis.project import Project, project_countries
 from backend.models.postgis.user import User, UserRole, MappingLevel, UserEmail
 from backend.models.postgis.task import TaskHistory, TaskAction, Task
 from backend.models.dtos.user_dto import UserTaskDTOs
@@ -426,27 +426,21 @@ class UserService:
         query = (
             TaskHistory.query.with_entities(
                 func.date_trunc("minute", TaskHistory.action_date).label("trn"),
-                func.max(TaskHistory.action_text).label("tm"),
+                func.max(TaskHistory.duration_seconds).label("tm"),
             )
             .filter(TaskHistory.user_id == user.id)
             .filter(TaskHistory.action == "LOCKED_FOR_VALIDATION")
             .group_by("trn")
             .subquery()
         )
-        total_validation_time = db.session.query(
-            func.sum(cast(func.to_timestamp(query.c.tm, "HH24:MI:SS"), Time))
-        ).scalar()
+        total_validation_time = db.session.query(func.sum(query.c.tm)).scalar()
 
         if total_validation_time:
-            stats_dto.time_spent_validating = total_validation_time.total_seconds()
+            stats_dto.time_spent_validating = total_validation_time
             stats_dto.total_time_spent += stats_dto.time_spent_validating
 
         total_mapping_time = (
-            db.session.query(
-                func.sum(
-                    cast(func.to_timestamp(TaskHistory.action_text, "HH24:MI:SS"), Time)
-                )
-            )
+            db.session.query(func.sum(TaskHistory.duration_seconds))
             .filter(
                 or_(
                     TaskHistory.action == TaskAction.LOCKED_FOR_MAPPING.name,
@@ -458,7 +452,7 @@ class UserService:
         )
 
         if total_mapping_time:
-            stats_dto.time_spent_mapping = total_mapping_time.total_seconds()
+            stats_dto.time_spent_mapping = total_mapping_time
             stats_dto.total_time_spent += stats_dto.time_spent_mapping
 
         stats_dto.contributions_interest = UserService.get_interests_stats(user.id)
@@ -550,7 +544,7 @@ class UserService:
     def get_countries_contributed(user_id: int):
         query = (
             TaskHistory.query.with_entities(
-                func.unnest(Project.country).label("country"),
+                project_countries.c.country.label("country"),
                 TaskHistory.action_text,
                 func.count(TaskHistory.action_text).label("count"),
             )
@@ -565,7 +559,10 @@ class UserService:
                 )
             )
             .group_by("country", TaskHistory.action_text)
-            .outerjoin(Project, Project.id == TaskHistory.project_id)
+            .join(
+                project_countries,
+                project_countries.c.project_id == TaskHistory.project_id,
+            )
             .all()
         )
         countries = list(set([q.country for q in query]))
@@ -658,15 +655,7 @@ class UserService:
             projs.extend(remaining_projs)
 
         dto = ProjectSearchResultsDTO()
-
-        # Get all total contributions for each paginated project.
-        contrib_counts = ProjectSearchService.get_total_contributions(projs)
-
-        zip_items = zip(projs, contrib_counts)
-
-        dto.results = [
-            ProjectSearchService.create_result_dto(p, "en", t) for p, t in zip_items
-        ]
+        dto.results = ProjectSearchService.create_result_dtos(projs, "en")
 
         return dto
 
@@ -1,12 +1,9 @@
 from flask import current_app
-from sqlalchemy import text
-from multiprocessing.dummy import Pool as ThreadPool
-from sqlalchemy.orm import scoped_session, sessionmaker
-import os
+from sqlalchemy import func, text
 
 from backend import db
 from backend.exceptions import NotFound
-from backend.models.dtos.mapping_dto import TaskDTOs
+from backend.models.dtos.mapping_dto import TaskDTO, TaskDTOs
 from backend.models.dtos.stats_dto import Pagination
 from backend.models.dtos.validator_dto import (
     LockForValidationDTO,
@@ -20,11 +17,13 @@ from backend.models.dtos.validator_dto import (
 from backend.models.postgis.statuses import ValidatingNotAllowed
 from backend.models.postgis.task import (
     Task,
+    TaskAction,
     TaskStatus,
     TaskHistory,
     TaskInvalidationHistory,
     TaskMappingIssue,
 )
+from backend.models.postgis.user import User
 from backend.models.postgis.utils import UserLicenseError, timestamp
 from backend.models.postgis.project_info import ProjectInfo
 from backend.services.messaging.message_service import MessageService
@@ -32,6 +31,7 @@ from backend.services.project_service import ProjectService, ProjectAdminService
 from backend.services.stats_service import StatsService
 from backend.services.users.user_service import UserService
 from backend.services.mapping_service import MappingService
+from backend.services.task_transition_service import TaskTransitionService
 
 
 class ValidatorServiceError(Exception):
@@ -83,8 +83,60 @@ class ValidatorService:
 
             tasks_to_lock.append(task)
 
+        ValidatorService._check_user_can_validate(
+            validation_dto.project_id, validation_dto.user_id, validation_dto.task_ids
+        )
+
+        # Lock all tasks for validation, unless another user got to one of them first
+        tasks_to_lock = Task.lock_tasks(
+            validation_dto.project_id,
+            tasks_to_lock,
+            validation_dto.user_id,
+            TaskAction.LOCKED_FOR_VALIDATION,
+        )
+        dtos = [
+            task.as_dto_with_instructions(validation_dto.preferred_locale)
+            for task in tasks_to_lock
+        ]
+
+        task_dtos = TaskDTOs()
+        task_dtos.tasks = dtos
+
+        return task_dtos
+
+    @staticmethod
+    def lock_next_task_for_validation(
+        project_id: int,
+        user_id: int,
+        preferred_locale: str = "en",
+        prefer_priority_areas: bool = False,
+    ) -> TaskDTO:
+        """
+        Locks a task picked at random among the tasks the user can validate
+        :raises ValidatorServiceError, NotFound
+        """
+        ValidatorService._check_user_can_validate(project_id, user_id, [])
+        # Users cannot validate their own tasks unless they are an admin
+        excluded_mapper = None if UserService.is_user_an_admin(user_id) else user_id
+        task = Task.lock_next(
+            project_id,
+            user_id,
+            TaskAction.LOCKED_FOR_VALIDATION,
+            excluded_mapper=excluded_mapper,
+            prefer_priority_areas=prefer_priority_areas,
+        )
+        if task is None:
+            raise NotFound(sub_code="AVAILABLE_TASK_NOT_FOUND", project_id=project_id)
+        return task.as_dto_with_instructions(preferred_locale)
+
+    @staticmethod
+    def _check_user_can_validate(project_id: int, user_id: int, task_ids: list):
+        """
+        Raises an error explaining why the user is not permitted to validate on the project, if not permitted.
+        Tasks the user already has locked are fine if they are the supplied tasks
+        """
         user_can_validate, error_reason = ProjectService.is_user_permitted_to_validate(
-            validation_dto.project_id, validation_dto.user_id
+            project_id, user_id
         )
 
         if not user_can_validate:
@@ -99,8 +151,8 @@ class ValidatorService:
                     "ProjectNotPublished- Validation not allowed because: Project not published"
                 )
             elif error_reason == ValidatingNotAllowed.USER_ALREADY_HAS_TASK_LOCKED:
-                user_tasks = Task.get_locked_tasks_for_user(validation_dto.user_id)
-                if set(user_tasks.locked_tasks) != set(validation_dto.task_ids):
+                user_tasks = Task.get_locked_tasks_for_user(user_id)
+                if set(user_tasks.locked_tasks) != set(task_ids):
                     raise ValidatorServiceError(
                         "UserAlreadyHasTaskLocked- User already has a task locked"
                     )
@@ -109,17 +161,6 @@ class ValidatorService:
                     f"ValidtionNotAllowed- Validation not allowed because: {error_reason}"
                 )
 
-        # Lock all tasks for validation
-        dtos = []
-        for task in tasks_to_lock:
-            task.lock_task_for_validating(validation_dto.user_id)
-            dtos.append(task.as_dto_with_instructions(validation_dto.preferred_locale))
-
-        task_dtos = TaskDTOs()
-        task_dtos.tasks = dtos
-
-        return task_dtos
-
     @staticmethod
     def _user_can_validate_task(user_id: int, mapped_by: int) -> bool:
         """
@@ -138,84 +179,12 @@ class ValidatorService:
                 return True
             return False
 
-    @staticmethod
-    def _process_tasks(args):
-        (
-            app_context,
-            task_to_unlock,
-            project_id,
-            validated_dto,
-            message_sent_to,
-            dtos,
-        ) = args
-        with app_context:
-            Session = scoped_session(sessionmaker(bind=db.engine))
-            local_session = Session()
-            task = task_to_unlock["task"]
-            task = (
-                local_session.query(Task)
-                .filter_by(id=task.id, project_id=project_id)
-                .one()
-            )
-
-            if task_to_unlock["comment"]:
-                # Parses comment to see if any users have been @'d
-                MessageService.send_message_after_comment(
-                    validated_dto.user_id,
-                    task_to_unlock["comment"],
-                    task.id,
-                    validated_dto.project_id,
-                )
-            if (
-                task_to_unlock["new_state"] == TaskStatus.VALIDATED
-                or task_to_unlock["new_state"] == TaskStatus.INVALIDATED
-            ):
-                # All mappers get a notification if their task has been validated or invalidated.
-                # Only once if multiple tasks mapped
-                if task.mapped_by not in message_sent_to:
-                    MessageService.send_message_after_validation(
-                        task_to_unlock["new_state"],
-                        validated_dto.user_id,
-                        task.mapped_by,
-                        task.id,
-                        validated_dto.project_id,
-                    )
-                    message_sent_to.append(task.mapped_by)
-
-                if task_to_unlock["new_state"] == TaskStatus.VALIDATED:
-                    # Set last_validation_date for the mapper to current date
-                    task.mapper.last_validation_date = timestamp()
-
-            # Update stats if user setting task to a different state from previous state
-            prev_status = TaskHistory.get_last_status(project_id, task.id)
-            if prev_status != task_to_unlock["new_state"]:
-                StatsService.update_stats_after_task_state_change(
-                    validated_dto.project_id,
-                    validated_dto.user_id,
-                    prev_status,
-                    task_to_unlock["new_state"],
-                    local_session=local_session,
-                )
-            task_mapping_issues = ValidatorService.get_task_mapping_issues(
-                task_to_unlock
-            )
-            task.unlock_task(
-                validated_dto.user_id,
-                task_to_unlock["new_state"],
-                task_to_unlock["comment"],
-                issues=task_mapping_issues,
-                local_session=local_session,
-            )
-            dtos.append(task.as_dto_with_instructions(validated_dto.preferred_locale))
-            local_session.commit()
-            Session.remove()
-
     @staticmethod
     def unlock_tasks_after_validation(
         validated_dto: UnlockAfterValidationDTO,
     ) -> TaskDTOs:
         """
-        Unlocks supplied tasks after validation
+        Unlocks supplied tasks after validation in one transaction, notifications are sent once it is saved
         :raises ValidatorServiceError
         """
         validated_tasks = validated_dto.validated_tasks
@@ -224,29 +193,91 @@ class ValidatorService:
         tasks_to_unlock = ValidatorService.get_tasks_locked_by_user(
             project_id, validated_tasks, user_id
         )
+        task_ids = [task_to_unlock["task"].id for task_to_unlock in tasks_to_unlock]
 
-        # Unlock all tasks
-        dtos = []
-        message_sent_to = []
-        args_list = []
+        # Statuses the tasks were set to before they were locked, read once for all tasks
+        last_statuses = TaskHistory.get_last_statuses(project_id, task_ids)
+        TaskHistory.close_open_lock_actions(project_id, task_ids, timestamp())
+
+        state_changes = []
+        validations = []
+        invalidations = []
+        validated_mappers = set()
+        validation_messages = {}
         for task_to_unlock in tasks_to_unlock:
-            args = (
-                current_app.app_context(),
-                task_to_unlock,
-                project_id,
-                validated_dto,
-                message_sent_to,
-                dtos,
+            task = task_to_unlock["task"]
+            new_state = task_to_unlock["new_state"]
+            task_mapping_issues = ValidatorService.get_task_mapping_issues(
+                task_to_unlock
+            )
+            if task_to_unlock["comment"]:
+                task.set_task_history(
+                    action=TaskAction.COMMENT,
+                    comment=task_to_unlock["comment"],
+                    user_id=user_id,
+                    mapping_issues=task_mapping_issues,
+                )
+            history = task.set_task_history(
+                action=TaskAction.STATE_CHANGE,
+                new_state=new_state,
+                user_id=user_id,
+                mapping_issues=task_mapping_issues,
             )
-            args_list.append(args)
 
-        # Create a pool and Process the tasks in parallel
-        pool = ThreadPool(os.cpu_count())
-        pool.map(ValidatorService._process_tasks, args_list)
+            # All mappers get a notification if their task has been validated or invalidated.
+            # Only once if multiple tasks mapped
+            if task.mapped_by is not None:
+                validation_messages.setdefault(task.mapped_by, (new_state, task.id))
+            if new_state == TaskStatus.VALIDATED:
+                validations.append(history)
+                validated_mappers.add(task.mapped_by)
+                task.validated_by = user_id
+            else:
+                invalidations.append(history)
+                task.mapped_by = None
+                task.validated_by = None
 
-        # Close the pool and wait for the threads to finish
-        pool.close()
-        pool.join()
+            # Update stats if user setting task to a different state from previous state
+            if last_statuses[task.id] != new_state:
+                state_changes.append((last_statuses[task.id], new_state))
+            task.task_status = new_state.value
+            task.locked_by = None
+
+        # Flushed for the ids of the state changes referenced by the invalidation history
+        db.session.flush()
+        TaskInvalidationHistory.record_validations(project_id, user_id, validations)
+        TaskInvalidationHistory.record_invalidations(project_id, user_id, invalidations)
+        # Set last_validation_date for the mappers to current date
+        validated_mappers.discard(None)
+        if validated_mappers:
+            User.query.filter(User.id.in_(validated_mappers)).update(
+                {User.last_validation_date: timestamp()}, synchronize_session=False
+            )
+        if state_changes:
+            StatsService.update_stats_after_task_state_changes(
+                project_id, user_id, state_changes
+            )
+        dtos = [
+            task_to_unlock["task"].as_dto_with_instructions(
+                validated_dto.preferred_locale
+            )
+            for task_to_unlock in tasks_to_unlock
+        ]
+        db.session.commit()
+
+        for task_to_unlock in tasks_to_unlock:
+            if task_to_unlock["comment"]:
+                # Parses comment to see if any users have been @'d
+                MessageService.send_message_after_comment(
+                    user_id,
+                    task_to_unlock["comment"],
+                    task_to_unlock["task"].id,
+                    project_id,
+                )
+        for mapped_by, (new_state, task_id) in validation_messages.items():
+            MessageService.send_message_after_validation(
+                new_state, user_id, mapped_by, task_id, project_id
+            )
 
         # Send email on project progress
         ProjectService.send_email_on_project_progress(validated_dto.project_id)
@@ -399,43 +430,31 @@ class ValidatorService:
     @staticmethod
     def invalidate_all_tasks(project_id: int, user_id: int):
         """Invalidates all validated tasks on a project"""
-        validated_tasks = Task.query.filter(
-            Task.project_id == project_id,
-            Task.task_status == TaskStatus.VALIDATED.value,
-        ).all()
-        for task in validated_tasks:
-            task.lock_task_for_validating(user_id)
-            task.unlock_task(user_id, new_state=TaskStatus.INVALIDATED)
-
-        # Reset counters
         project = ProjectService.get_project_by_id(project_id)
-        project.tasks_validated = 0
-        project.save()
+        TaskTransitionService.transition_tasks(
+            project,
+            user_id,
+            [TaskStatus.VALIDATED],
+            TaskStatus.INVALIDATED,
+            lock_action=TaskAction.LOCKED_FOR_VALIDATION,
+            values=dict(mapped_by=None, validated_by=None),
+        )
 
     @staticmethod
     def validate_all_tasks(project_id: int, user_id: int):
         """Validates all mapped tasks on a project"""
-        tasks_to_validate = Task.query.filter(
-            Task.project_id == project_id,
-            Task.task_status == TaskStatus.MAPPED.value,
-        ).all()
-
-        for task in tasks_to_validate:
-            task.mapped_by = task.mapped_by or user_id  # Ensure we set mapped by value
-            if TaskStatus(task.task_status) not in [
-                TaskStatus.LOCKED_FOR_MAPPING,
-                TaskStatus.LOCKED_FOR_VALIDATION,
-            ]:
-                # Only lock tasks that are not already locked to avoid double lock issue
-                task.lock_task_for_validating(user_id)
-
-            task.unlock_task(user_id, new_state=TaskStatus.VALIDATED)
-
-        # Set counters to fully mapped and validated
         project = ProjectService.get_project_by_id(project_id)
-        project.tasks_validated += project.tasks_mapped
-        project.tasks_mapped = 0
-        project.save()
+        TaskTransitionService.transition_tasks(
+            project,
+            user_id,
+            [TaskStatus.MAPPED],
+            TaskStatus.VALIDATED,
+            lock_action=TaskAction.LOCKED_FOR_VALIDATION,
+            # Ensure we set mapped by value
+            values=dict(
+                mapped_by=func.coalesce(Task.mapped_by, user_id), validated_by=user_id
+            ),
+        )
 
     @staticmethod
     def get_task_mapping_issues(task_to_unlock: dict):
@@ -2,7 +2,6 @@ import os
 import warnings
 import base64
 import csv
-import datetime
 import click
 from flask_migrate import Migrate
 from dotenv import load_dotenv
@@ -12,11 +11,7 @@ from backend.services.users.authentication_service import AuthenticationService
 from backend.services.users.user_service import UserService
 from backend.services.stats_service import StatsService
 from backend.services.interests_service import InterestService
-from backend.models.postgis.task import Task, TaskHistory
-
-from sqlalchemy import func
-import atexit
-from apscheduler.schedulers.background import BackgroundScheduler
+from backend.services.task_expiry_sweeper import expiry_sweeper
 
 
 # Load configuration from file into environment
@@ -51,35 +46,17 @@ except Exception:
 migrate = Migrate(application, db)
 
 
-# Job runs once every 2 hours
 @application.cli.command("auto_unlock_tasks")
 def auto_unlock_tasks():
-    with application.app_context():
-        # Identify distinct project IDs that were touched in the last 2 hours
-        query = (
-            TaskHistory.query.with_entities(TaskHistory.project_id)
-            .filter(
-                func.DATE(TaskHistory.action_date)
-                > datetime.datetime.utcnow() - datetime.timedelta(minutes=130)
-            )
-            .distinct()
-        )
-        projects = query.all()
-        # For each project update task history for tasks that were not manually unlocked
-        for project in projects:
-            project_id = project[0]
-            Task.auto_unlock_tasks(project_id)
-
-
-# Setup a background cron job
-cron = BackgroundScheduler(daemon=True)
-# Initiate the background thread
-cron.add_job(auto_unlock_tasks, "interval", hours=2)
-cron.start()
-application.logger.debug("Initiated background thread to auto unlock tasks")
-
-# Shutdown your cron thread when the application is stopped
-atexit.register(lambda: cron.shutdown(wait=False))
+    """Unlocks expired tasks once, unless another sweeper is running"""
+    expiry_sweeper.sweep_if_leader()
+
+
+@application.cli.command("task_expiry_sweeper")
+def task_expiry_sweeper():
+    """Unlocks expired tasks every TM_TASK_EXPIRY_SWEEP_INTERVAL seconds. Can run on several nodes,
+    a single process sweeps at a time"""
+    expiry_sweeper.run_forever()
 
 
 @application.cli.command("gen_token")
@@ -0,0 +1,49 @@
+"""Normalised project countries
+
+Revision ID: 0f44630c6010
+Revises: 2e437f769909
+Create Date: 2026-10-18 12:21:40.917263
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0f44630c6010"
+down_revision = "2e437f769909"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "project_countries",
+        sa.Column("project_id", sa.Integer(), nullable=False),
+        sa.Column("country", sa.String(), nullable=False),
+        sa.Column("country_key", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["project_id"], ["projects.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("project_id", "country"),
+    )
+    op.create_index(
+        op.f("ix_project_countries_country_key"),
+        "project_countries",
+        ["country_key"],
+        unique=False,
+    )
+    # Backfill from the country array of existing projects
+    op.execute(
+        """
+        INSERT INTO project_countries (project_id, country, country_key)
+        SELECT DISTINCT projects.id, country, lower(country)
+        FROM projects, unnest(projects.country) AS country
+        WHERE country IS NOT NULL AND country <> ''
+        """
+    )
+
+
+def downgrade():
+    op.drop_index(
+        op.f("ix_project_countries_country_key"), table_name="project_countries"
+    )
+    op.drop_table("project_countries")
@@ -0,0 +1,68 @@
+"""Weighted project text search and trigram index on project names
+
+Revision ID: 2e437f769909
+Revises: 42c45e74752b
+Create Date: 2026-10-18 12:05:13.482117
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "2e437f769909"
+down_revision = "42c45e74752b"
+branch_labels = None
+depends_on = None
+
+weighted_document = """
+    setweight(to_tsvector('pg_catalog.english', coalesce({prefix}name, '')), 'A') ||
+    setweight(to_tsvector('pg_catalog.english', coalesce({prefix}project_id_str, '')), 'A') ||
+    setweight(to_tsvector('pg_catalog.english', coalesce({prefix}short_description, '')), 'B') ||
+    setweight(to_tsvector('pg_catalog.english', coalesce({prefix}description, '')), 'C')
+"""
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # Names were not part of the search document, and all fields had the same weight
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION project_info_text_searchable_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.text_searchable := {weighted_document.format(prefix="NEW.")};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+
+        DROP TRIGGER IF EXISTS tsvectorupdate ON project_info;
+        CREATE TRIGGER tsvectorupdate BEFORE INSERT OR UPDATE ON project_info FOR EACH ROW EXECUTE PROCEDURE
+        project_info_text_searchable_update();
+        """
+    )
+    op.execute(
+        f"UPDATE project_info SET text_searchable = {weighted_document.format(prefix='')}"
+    )
+
+    # Build the index without locking project_info against writes
+    with op.get_context().autocommit_block():
+        op.execute(
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_project_info_name_trgm
+            ON project_info USING gin (name gin_trgm_ops)
+            """
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_project_info_name_trgm")
+
+    op.execute(
+        """
+        DROP TRIGGER IF EXISTS tsvectorupdate ON project_info;
+        CREATE TRIGGER tsvectorupdate BEFORE INSERT OR UPDATE ON project_info FOR EACH ROW EXECUTE PROCEDURE
+        tsvector_update_trigger(text_searchable, "pg_catalog.english", project_id_str, short_description, description);
+        DROP FUNCTION IF EXISTS project_info_text_searchable_update();
+        """
+    )
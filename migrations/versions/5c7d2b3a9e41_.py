@@ -0,0 +1,27 @@
+"""Project tasking version
+
+Revision ID: 5c7d2b3a9e41
+Revises: 0f44630c6010
+Create Date: 2026-10-18 12:40:02.113874
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5c7d2b3a9e41"
+down_revision = "0f44630c6010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "projects",
+        sa.Column("tasking_version", sa.Integer(), server_default="0", nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_column("projects", "tasking_version")
@@ -0,0 +1,59 @@
+"""Task change transaction ids for the task state change feed
+
+Revision ID: 8a1e6f0c3d52
+Revises: 5c7d2b3a9e41
+Create Date: 2026-10-18 13:02:47.550921
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "8a1e6f0c3d52"
+down_revision = "5c7d2b3a9e41"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing tasks keep 0, so the first read of the feed returns all of them
+    op.add_column(
+        "tasks",
+        sa.Column("change_xid", sa.BigInteger(), server_default="0", nullable=False),
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION tasks_change_xid_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.change_xid := pg_current_xact_id()::text::bigint;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER tasks_change_xid BEFORE INSERT OR UPDATE OF task_status, locked_by, mapped_by
+        ON tasks FOR EACH ROW EXECUTE FUNCTION tasks_change_xid_update();
+        """
+    )
+
+    # Build the index without locking tasks against writes
+    with op.get_context().autocommit_block():
+        op.execute(
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_project_id_change_xid
+            ON tasks (project_id, change_xid, id)
+            """
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_tasks_project_id_change_xid")
+
+    op.execute(
+        """
+        DROP TRIGGER IF EXISTS tasks_change_xid ON tasks;
+        DROP FUNCTION IF EXISTS tasks_change_xid_update();
+        """
+    )
+    op.drop_column("tasks", "change_xid")
@@ -0,0 +1,37 @@
+"""Partial index on open task lock actions
+
+Revision ID: b3f49d7e2a18
+Revises: 8a1e6f0c3d52
+Create Date: 2026-10-18 13:31:09.204337
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "b3f49d7e2a18"
+down_revision = "8a1e6f0c3d52"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Build the index without locking task_history against writes
+    with op.get_context().autocommit_block():
+        op.execute(
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_task_history_open_locks
+            ON task_history (action_date, project_id, task_id)
+            WHERE action_text IS NULL AND action IN (
+                'LOCKED_FOR_MAPPING',
+                'LOCKED_FOR_VALIDATION',
+                'EXTENDED_FOR_MAPPING',
+                'EXTENDED_FOR_VALIDATION'
+            )
+            """
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_task_history_open_locks")
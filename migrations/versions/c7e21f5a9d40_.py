@@ -0,0 +1,44 @@
+"""Partial indexes on the tasks available for mapping and validation
+
+Revision ID: c7e21f5a9d40
+Revises: b3f49d7e2a18
+Create Date: 2026-10-18 14:02:51.381620
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "c7e21f5a9d40"
+down_revision = "b3f49d7e2a18"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Build the indexes without locking tasks against writes
+    with op.get_context().autocommit_block():
+        # READY and INVALIDATED
+        op.execute(
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_available_for_mapping
+            ON tasks (project_id, id)
+            WHERE task_status IN (0, 5)
+            """
+        )
+        # MAPPED and BADIMAGERY
+        op.execute(
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_available_for_validation
+            ON tasks (project_id, id)
+            WHERE task_status IN (2, 6)
+            """
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute(
+            "DROP INDEX CONCURRENTLY IF EXISTS idx_tasks_available_for_validation"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_tasks_available_for_mapping")
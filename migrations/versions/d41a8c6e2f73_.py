@@ -0,0 +1,156 @@
+"""Task history heads on tasks, kept up to date by triggers on task_history
+
+Revision ID: d41a8c6e2f73
+Revises: c7e21f5a9d40
+Create Date: 2026-10-18 14:37:12.904117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d41a8c6e2f73"
+down_revision = "c7e21f5a9d40"
+branch_labels = None
+depends_on = None
+
+HEADS = """
+    (array_agg(id ORDER BY action_date DESC, id DESC))[1] AS last_history_id,
+    max(action_date) AS last_action_date,
+    count(*) FILTER (WHERE action = 'STATE_CHANGE') AS state_changes,
+    (array_agg(action_text ORDER BY action_date DESC, id DESC)
+        FILTER (WHERE action = 'STATE_CHANGE'))[1] AS last_status,
+    (array_agg(action_text ORDER BY action_date DESC, id DESC)
+        FILTER (WHERE action = 'STATE_CHANGE'))[2] AS previous_status,
+    max(id) FILTER (
+        WHERE action_text IS NULL AND action IN (
+            'LOCKED_FOR_MAPPING', 'LOCKED_FOR_VALIDATION', 'EXTENDED_FOR_MAPPING', 'EXTENDED_FOR_VALIDATION'
+        )
+    ) AS open_lock_history_id,
+    (array_agg(id ORDER BY action_date DESC, id DESC)
+        FILTER (WHERE action = 'STATE_CHANGE' AND action_text IN ('MAPPED', 'BADIMAGERY')))[1]
+        AS last_mapped_history_id
+"""
+
+HEAD_COLUMNS = [
+    sa.Column("last_history_id", sa.Integer(), nullable=True),
+    sa.Column("last_action_date", sa.DateTime(), nullable=True),
+    sa.Column("last_status", sa.String(), nullable=True),
+    sa.Column("previous_status", sa.String(), nullable=True),
+    sa.Column("open_lock_history_id", sa.Integer(), nullable=True),
+    sa.Column("last_mapped_history_id", sa.Integer(), nullable=True),
+]
+
+
+def upgrade():
+    for column in HEAD_COLUMNS:
+        op.add_column("tasks", column)
+
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION task_history_heads_insert() RETURNS trigger AS $$
+        BEGIN
+            UPDATE tasks SET
+                last_history_id = heads.last_history_id,
+                last_action_date = heads.last_action_date,
+                last_status = COALESCE(heads.last_status, tasks.last_status),
+                previous_status = CASE heads.state_changes
+                    WHEN 0 THEN tasks.previous_status
+                    WHEN 1 THEN tasks.last_status
+                    ELSE heads.previous_status
+                END,
+                open_lock_history_id = COALESCE(heads.open_lock_history_id, tasks.open_lock_history_id),
+                last_mapped_history_id = COALESCE(heads.last_mapped_history_id, tasks.last_mapped_history_id)
+            FROM (
+                SELECT project_id, task_id, {HEADS}
+                FROM inserted_history
+                GROUP BY project_id, task_id
+            ) heads
+            WHERE tasks.project_id = heads.project_id AND tasks.id = heads.task_id;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE FUNCTION task_history_heads_update() RETURNS trigger AS $$
+        BEGIN
+            -- Lock actions are closed by setting their action text
+            UPDATE tasks SET open_lock_history_id = NULL
+            FROM updated_history
+            WHERE tasks.project_id = updated_history.project_id
+                AND tasks.id = updated_history.task_id
+                AND tasks.open_lock_history_id = updated_history.id
+                AND updated_history.action_text IS NOT NULL;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE FUNCTION task_history_heads_delete() RETURNS trigger AS $$
+        BEGIN
+            -- Deleting history is rare, the heads of the tasks are aggregated again
+            UPDATE tasks SET
+                last_history_id = heads.last_history_id,
+                last_action_date = heads.last_action_date,
+                last_status = heads.last_status,
+                previous_status = heads.previous_status,
+                open_lock_history_id = heads.open_lock_history_id,
+                last_mapped_history_id = heads.last_mapped_history_id
+            FROM (
+                SELECT affected.project_id, affected.task_id, {HEADS}
+                FROM (SELECT DISTINCT project_id, task_id FROM deleted_history) affected
+                LEFT JOIN task_history
+                    ON task_history.project_id = affected.project_id AND task_history.task_id = affected.task_id
+                GROUP BY affected.project_id, affected.task_id
+            ) heads
+            WHERE tasks.project_id = heads.project_id AND tasks.id = heads.task_id;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER task_history_heads_insert AFTER INSERT ON task_history
+        REFERENCING NEW TABLE AS inserted_history
+        FOR EACH STATEMENT EXECUTE FUNCTION task_history_heads_insert();
+
+        CREATE TRIGGER task_history_heads_update AFTER UPDATE ON task_history
+        REFERENCING NEW TABLE AS updated_history
+        FOR EACH STATEMENT EXECUTE FUNCTION task_history_heads_update();
+
+        CREATE TRIGGER task_history_heads_delete AFTER DELETE ON task_history
+        REFERENCING OLD TABLE AS deleted_history
+        FOR EACH STATEMENT EXECUTE FUNCTION task_history_heads_delete();
+        """
+    )
+
+    # Tasks without history keep empty heads
+    op.execute(
+        f"""
+        UPDATE tasks SET
+            last_history_id = heads.last_history_id,
+            last_action_date = heads.last_action_date,
+            last_status = heads.last_status,
+            previous_status = heads.previous_status,
+            open_lock_history_id = heads.open_lock_history_id,
+            last_mapped_history_id = heads.last_mapped_history_id
+        FROM (
+            SELECT project_id, task_id, {HEADS}
+            FROM task_history
+            GROUP BY project_id, task_id
+        ) heads
+        WHERE tasks.project_id = heads.project_id AND tasks.id = heads.task_id
+        """
+    )
+
+
+def downgrade():
+    op.execute(
+        """
+        DROP TRIGGER IF EXISTS task_history_heads_insert ON task_history;
+        DROP TRIGGER IF EXISTS task_history_heads_update ON task_history;
+        DROP TRIGGER IF EXISTS task_history_heads_delete ON task_history;
+        DROP FUNCTION IF EXISTS task_history_heads_insert();
+        DROP FUNCTION IF EXISTS task_history_heads_update();
+        DROP FUNCTION IF EXISTS task_history_heads_delete();
+        """
+    )
+    for column in reversed(HEAD_COLUMNS):
+        op.drop_column("tasks", column.name)
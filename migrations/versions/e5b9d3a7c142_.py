@@ -0,0 +1,56 @@
+"""Lock durations of task history in whole seconds
+
+Revision ID: e5b9d3a7c142
+Revises: d41a8c6e2f73
+Create Date: 2026-10-18 15:12:40.318265
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e5b9d3a7c142"
+down_revision = "d41a8c6e2f73"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "task_history", sa.Column("duration_seconds", sa.Integer(), nullable=True)
+    )
+    # Closed lock actions have their duration as action text, HH:MM:SS with optional fractional seconds
+    op.execute(
+        """
+        UPDATE task_history
+        SET duration_seconds = floor(extract(epoch FROM action_text::interval))
+        WHERE action IN (
+            'LOCKED_FOR_MAPPING',
+            'LOCKED_FOR_VALIDATION',
+            'AUTO_UNLOCKED_FOR_MAPPING',
+            'AUTO_UNLOCKED_FOR_VALIDATION',
+            'EXTENDED_FOR_MAPPING',
+            'EXTENDED_FOR_VALIDATION'
+        )
+        AND action_text ~ '^[0-9]+[:][0-9]{2}[:][0-9]{2}([.][0-9]+)?$'
+        """
+    )
+
+    # Build the index without locking task_history against writes
+    with op.get_context().autocommit_block():
+        op.execute(
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_task_history_lock_durations
+            ON task_history (project_id, action, user_id)
+            INCLUDE (duration_seconds)
+            WHERE duration_seconds IS NOT NULL
+            """
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_task_history_lock_durations")
+
+    op.drop_column("task_history", "duration_seconds")
@@ -0,0 +1,37 @@
+"""Lineage of split tasks, whose history is no longer copied
+
+Revision ID: f2c86b4d1e97
+Revises: e5b9d3a7c142
+Create Date: 2026-10-18 17:41:09.552134
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "f2c86b4d1e97"
+down_revision = "e5b9d3a7c142"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "tasks",
+        sa.Column("lineage", postgresql.ARRAY(sa.Integer()), nullable=True),
+    )
+    # The history of a split task is kept after the task is deleted
+    op.drop_constraint("fk_tasks", "task_history", type_="foreignkey")
+
+
+def downgrade():
+    # History of split tasks has no task left to refer to, so the constraint only applies to new rows
+    op.execute(
+        """
+        ALTER TABLE task_history ADD CONSTRAINT fk_tasks
+        FOREIGN KEY (task_id, project_id) REFERENCES tasks (id, project_id) NOT VALID
+        """
+    )
+    op.drop_column("tasks", "lineage")
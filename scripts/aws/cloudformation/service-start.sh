@@ -1,4 +1,5 @@
 #!/usr/bin/env bash
 
 /bin/systemctl start tasking-manager.service
+/bin/systemctl start tasking-manager-sweeper.service
 /bin/sleep 10
@@ -1,4 +1,5 @@
 #!/usr/bin/env bash
 
 /bin/systemctl stop tasking-manager.service
+/bin/systemctl stop tasking-manager-sweeper.service
 /bin/sleep 10
@@ -481,6 +481,7 @@ const Resources = {
           cf.sub('export OHSOME_STATS_TOKEN="${OhsomeStatsToken}"'),
           'export NEW_RELIC_ENVIRONMENT=$TM_ENVIRONMENT',
           cf.sub('NEW_RELIC_CONFIG_FILE=./scripts/aws/cloudformation/newrelic.ini newrelic-admin run-program gunicorn -b 0.0.0.0:8000 --worker-class gevent --workers 5 --timeout 179 --access-logfile ${TaskingManagerLogDirectory}/gunicorn-access.log --access-logformat \'%(h)s %(l)s %(u)s %(t)s \"%(r)s\" %(s)s %(b)s %(T)s \"%(f)s\" \"%(a)s\"\' manage:application &'),
+          cf.sub('python manage.py task_expiry_sweeper >> ${TaskingManagerLogDirectory}/task-expiry-sweeper.log 2>&1 &'),
           cf.sub('sudo /usr/local/bin/cfn-init -v --stack ${AWS::StackName} --resource TaskingManagerLaunchTemplate --region ${AWS::Region} --configsets default'),
           cf.sub('/usr/local/bin/cfn-signal --exit-code $? --region ${AWS::Region} --resource TaskingManagerASG --stack ${AWS::StackName}')
         ]),
@@ -0,0 +1,93 @@
+"""
+Times GridService.trim_grid_to_aoi trimming a square task grid to a coastline AOI, the coast and islands
+of Greece, the way the grid sent by the frontend when creating a project is trimmed.
+
+Run from the project directory:
+    python scripts/profiler/grid_benchmark.py [--zoom 14] [--tiles 50000] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from backend.models.dtos.grid_dto import GridDTO  # noqa: E402
+from backend.services.grid.grid_service import GridService  # noqa: E402
+from backend.services.grid.web_mercator import tile_range, tile_rings  # noqa: E402
+
+WORLD_DIR = os.path.join(os.path.dirname(__file__), "..", "world")
+
+
+def coastline_aoi() -> dict:
+    with open(os.path.join(WORLD_DIR, "Europe.json"), encoding="utf-8") as countries:
+        greece = next(
+            country
+            for country in json.load(countries)["Europe"]
+            if country["properties"]["NAME"] == "Greece"
+        )
+    return {"type": "FeatureCollection", "features": [greece]}
+
+
+def bounding_box_grid(aoi: dict, zoom: int, tiles: int) -> dict:
+    """Task squares of the bounding box of the aoi, as generated by the frontend, the ones nearest to
+    the centre of the bounding box if there are more than requested"""
+    coordinates = [
+        point
+        for polygon in aoi["features"][0]["geometry"]["coordinates"]
+        for ring in polygon
+        for point in ring
+    ]
+    lons, lats = zip(*coordinates)
+    x_min, y_min, x_max, y_max = tile_range(
+        min(lons), min(lats), max(lons), max(lats), zoom
+    )
+    centre_x, centre_y = (x_min + x_max) / 2, (y_min + y_max) / 2
+    xs, ys = zip(
+        *sorted(
+            [(x, y) for x in range(x_min, x_max + 1) for y in range(y_min, y_max + 1)],
+            key=lambda tile: (tile[0] - centre_x) ** 2 + (tile[1] - centre_y) ** 2,
+        )[:tiles]
+    )
+    rings = tile_rings(xs, ys, zoom)
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "geometry": {"type": "MultiPolygon", "coordinates": [[ring.tolist()]]},
+                "properties": {"x": x, "y": y, "zoom": zoom, "isSquare": True},
+            }
+            for x, y, ring in zip(xs, ys, rings)
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--zoom", type=int, default=14)
+    parser.add_argument("--tiles", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    aoi = coastline_aoi()
+    grid = bounding_box_grid(aoi, args.zoom, args.tiles)
+    print(f"{len(grid['features'])} task squares at zoom {args.zoom}")
+    for clip_to_aoi in (False, True):
+        timings = []
+        for _ in range(args.repeat):
+            grid_dto = GridDTO(
+                {"areaOfInterest": aoi, "grid": grid, "clipToAoi": clip_to_aoi}
+            )
+            started = time.perf_counter()
+            trimmed = GridService.trim_grid_to_aoi(grid_dto)
+            timings.append(time.perf_counter() - started)
+        print(
+            f"clipToAoi={clip_to_aoi}: {len(trimmed['features'])} tasks, "
+            f"best of {args.repeat} {min(timings):.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -115,6 +115,71 @@ class TestProjectActionsIntersectingTilesAPI(BaseTestCase):
         self.assertEqual(response.json["SubCode"], "SelfIntersectingAOI")
 
 
+class TestProjectActionsSquareGridAPI(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = "/api/v2/projects/actions/square-grid/"
+        self.test_user = create_canned_user()
+        self.test_user_access_token = generate_encoded_token(self.test_user.id)
+        self.area_of_interest = geojson.FeatureCollection(
+            [
+                geojson.Feature(
+                    geometry=geojson.Polygon(
+                        [
+                            [
+                                (5.10, 7.20),
+                                (5.40, 7.25),
+                                (5.30, 7.50),
+                                (5.15, 7.45),
+                                (5.10, 7.20),
+                            ]
+                        ]
+                    )
+                )
+            ]
+        )
+
+    def test_returns_401_if_not_authenticated(self):
+        """Test that the endpoint returns 401 if the user is not authenticated"""
+        # Act
+        response = self.client.post(self.url)
+        # Assert
+        self.assertEqual(response.status_code, 401)
+
+    def test_returns_400_if_no_zoom_or_task_area(self):
+        """Test that the endpoint returns 400 if neither a zoom nor a task area is supplied"""
+        # Act
+        response = self.client.post(
+            self.url,
+            json={"areaOfInterest": self.area_of_interest},
+            headers={"Authorization": self.test_user_access_token},
+        )
+        # Assert
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json["SubCode"], "MissingGridSize")
+
+    def test_returns_grid_of_the_aoi(self):
+        """Test that the endpoint returns the task squares of the zoom level intersecting the aoi"""
+        # Act
+        response = self.client.post(
+            self.url,
+            json={
+                "areaOfInterest": self.area_of_interest,
+                "zoom": 15,
+                "clipToAoi": True,
+            },
+            headers={"Authorization": self.test_user_access_token},
+        )
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        features = response.json["features"]
+        self.assertEqual(len(features), 538)
+        self.assertEqual({feature["properties"]["zoom"] for feature in features}, {15})
+        self.assertTrue(
+            any(not feature["properties"]["isSquare"] for feature in features)
+        )
+
+
 class TestProjectsActionsMessageContributorsAPI(BaseTestCase):
     def setUp(self):
         super().setUp()
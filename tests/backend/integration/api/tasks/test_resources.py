@@ -627,3 +627,50 @@ class TestTasksQueriesMappedAPI(BaseTestCase):
         self.assertEqual(response.json["mappedTasks"][1]["mappedTaskCount"], 1)
         self.assertEqual(response.json["mappedTasks"][0]["tasksMapped"], [1])
         self.assertEqual(response.json["mappedTasks"][1]["tasksMapped"], [2])
+
+
+class TestTasksQueriesChangesAPI(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.test_project, self.test_author = create_canned_project()
+        self.url = f"/api/v2/projects/{self.test_project.id}/tasks/changes/"
+
+    def test_returns_404_if_project_does_not_exist(self):
+        # Act
+        response = self.client.get("/api/v2/projects/11111/tasks/changes/")
+        # Assert
+        self.assertEqual(response.status_code, 404)
+
+    def test_returns_400_if_cursor_is_invalid(self):
+        # Act
+        response = self.client.get(self.url + "?since=invalid")
+        # Assert
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json["SubCode"], "InvalidCursor")
+
+    def test_returns_only_tasks_changed_since_cursor(self):
+        # Arrange
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.json["tasks"]), 4)
+        cursor = response.json["cursor"]
+        task = Task.get(2, self.test_project.id)
+        # Act
+        task.lock_task_for_mapping(self.test_author.id)
+        response = self.client.get(self.url + f"?since={cursor}")
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json["tasks"],
+            [
+                {
+                    "taskId": 2,
+                    "taskStatus": TaskStatus.LOCKED_FOR_MAPPING.name,
+                    "lockedBy": self.test_author.id,
+                    "mappedBy": None,
+                }
+            ],
+        )
+        self.assertFalse(response.json["hasMore"])
+        # Nothing changed since the last cursor
+        response = self.client.get(self.url + f"?since={response.json['cursor']}")
+        self.assertEqual(response.json["tasks"], [])
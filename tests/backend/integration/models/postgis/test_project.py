@@ -42,6 +42,19 @@ class TestProject(BaseTestCase):
             self.test_project.total_tasks, len(feature_collection.features)
         )
 
+    def test_task_geojson_text_matches_feature_collection(self):
+        self.test_project, self.test_user = create_canned_project()
+        # Act
+        geojson_text = Task.get_tasks_as_geojson_text(self.test_project.id, None)
+        feature_collection = Task.get_tasks_as_geojson_feature_collection(
+            self.test_project.id, None
+        )
+        # Assert
+        self.assertEqual(
+            geojson.loads(geojson_text),
+            geojson.loads(geojson.dumps(feature_collection)),
+        )
+
     def test_project_can_be_generated_as_dto(self):
         self.test_project, self.test_user = create_canned_project()
         # Arrange
@@ -128,3 +141,15 @@ class TestProject(BaseTestCase):
         self.assertEqual(
             test_project.project_info[0].name, test_project_dto.project_info.name
         )
+
+    def test_project_countries_follow_country_array(self):
+        # Arrange
+        self.test_project, self.test_user = create_canned_project()
+        # Act
+        self.test_project.country = ["Nepal", "India", "Nepal"]
+        self.test_project.save()
+        # Assert
+        self.assertEqual(Project.get_all_countries().tags, ["India", "Nepal"])
+        self.test_project.country = ["Bhutan"]
+        self.test_project.save()
+        self.assertEqual(Project.get_all_countries().tags, ["Bhutan"])
@@ -0,0 +1,225 @@
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from backend import db
+from backend.exceptions import Conflict
+from backend.models.postgis.task import Task, TaskAction, TaskHistory, TaskStatus
+from tests.backend.base import BaseTestCase
+from tests.backend.helpers.test_helpers import create_canned_project, return_canned_user
+
+# Users racing for the same tasks
+CONCURRENT_LOCKERS = 16
+
+
+class TestTaskLocking(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.test_project, self.test_user = create_canned_project()
+        self.project_id = self.test_project.id
+        self.locker_ids = []
+        for index in range(CONCURRENT_LOCKERS):
+            locker = return_canned_user(f"locker_{index}", 1000 + index)
+            locker.create()
+            self.locker_ids.append(locker.id)
+
+    def lock_tasks(self, barrier, user_id, task_ids):
+        """Checks the tasks like the services do, then races the other lockers to lock them"""
+        with self.app.app_context():
+            try:
+                tasks = [Task.get(task_id, self.project_id) for task_id in task_ids]
+                barrier.wait()
+                Task.lock_tasks(
+                    self.project_id, tasks, user_id, TaskAction.LOCKED_FOR_MAPPING
+                )
+                return user_id
+            except Conflict as e:
+                self.assertTrue(set(e.kwargs["task_ids"]) <= set(task_ids))
+                return None
+            finally:
+                db.session.remove()
+
+    def race(self, batches):
+        barrier = threading.Barrier(len(batches))
+        with ThreadPoolExecutor(max_workers=len(batches)) as executor:
+            results = executor.map(
+                lambda args: self.lock_tasks(barrier, *args),
+                zip(self.locker_ids, batches),
+            )
+            return [user_id for user_id in results if user_id is not None]
+
+    def test_only_one_concurrent_locker_gets_the_task(self):
+        # Act
+        winners = self.race([[2]] * CONCURRENT_LOCKERS)
+        # Assert
+        self.assertEqual(len(winners), 1)
+        task = Task.get(2, self.project_id)
+        self.assertEqual(task.locked_by, winners[0])
+        self.assertEqual(task.task_status, TaskStatus.LOCKED_FOR_MAPPING.value)
+        self.assertEqual(
+            TaskHistory.query.filter_by(
+                project_id=self.project_id,
+                task_id=2,
+                action=TaskAction.LOCKED_FOR_MAPPING.name,
+            ).count(),
+            1,
+        )
+
+    def test_batches_are_locked_all_or_nothing(self):
+        # Arrange
+        batches = [[1, 2] if index % 2 else [2] for index in range(CONCURRENT_LOCKERS)]
+        # Act
+        winners = self.race(batches)
+        # Assert
+        self.assertEqual(len(winners), 1)
+        winner_batch = batches[self.locker_ids.index(winners[0])]
+        task_1 = Task.get(1, self.project_id)
+        if winner_batch == [1, 2]:
+            self.assertEqual(task_1.locked_by, winners[0])
+        else:
+            self.assertIsNone(task_1.locked_by)
+            self.assertEqual(task_1.task_status, TaskStatus.MAPPED.value)
+        self.assertEqual(Task.get(2, self.project_id).locked_by, winners[0])
+
+    def lock_next(self, barrier, user_id):
+        with self.app.app_context():
+            try:
+                barrier.wait()
+                task = Task.lock_next(
+                    self.project_id, user_id, TaskAction.LOCKED_FOR_MAPPING
+                )
+                return None if task is None else (user_id, task.id)
+            finally:
+                db.session.remove()
+
+    def test_concurrent_lock_next_hands_out_distinct_tasks(self):
+        # Arrange
+        Task.query.filter_by(project_id=self.project_id).update(
+            {"task_status": TaskStatus.READY.value}
+        )
+        db.session.commit()
+        barrier = threading.Barrier(CONCURRENT_LOCKERS)
+        # Act
+        with ThreadPoolExecutor(max_workers=CONCURRENT_LOCKERS) as executor:
+            results = list(
+                executor.map(
+                    lambda user_id: self.lock_next(barrier, user_id), self.locker_ids
+                )
+            )
+        # Assert
+        allocations = [result for result in results if result is not None]
+        self.assertEqual(len(allocations), 4)
+        self.assertEqual({task_id for _, task_id in allocations}, {1, 2, 3, 4})
+        for user_id, task_id in allocations:
+            self.assertEqual(Task.get(task_id, self.project_id).locked_by, user_id)
+
+    def test_lock_next_skips_tasks_mapped_by_the_validator(self):
+        # Act
+        task = Task.lock_next(
+            self.project_id,
+            self.test_user.id,
+            TaskAction.LOCKED_FOR_VALIDATION,
+            excluded_mapper=self.test_user.id,
+        )
+        # Assert
+        self.assertIsNone(task)
+        # Act
+        task = Task.lock_next(
+            self.project_id, self.locker_ids[0], TaskAction.LOCKED_FOR_VALIDATION
+        )
+        # Assert
+        self.assertIn(task.id, [1, 3])
+        self.assertEqual(task.task_status, TaskStatus.LOCKED_FOR_VALIDATION.value)
+        self.assertEqual(task.locked_by, self.locker_ids[0])
+
+
+class TestTaskHistoryHeads(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.test_project, self.test_user = create_canned_project()
+        self.project_id = self.test_project.id
+
+    def test_heads_follow_lock_and_unlock(self):
+        # Arrange
+        task = Task.get(2, self.project_id)
+        task.lock_task_for_mapping(self.test_user.id)
+        open_lock = TaskHistory.get_last_locked_action(self.project_id, 2)
+        open_lock_text = open_lock.action_text
+        # Act
+        task.unlock_task(self.test_user.id, TaskStatus.MAPPED)
+        # Assert
+        self.assertIsNone(open_lock_text)
+        self.assertIsNone(task.open_lock_history_id)
+        self.assertEqual(
+            TaskHistory.get_last_status(self.project_id, 2), TaskStatus.MAPPED
+        )
+        self.assertEqual(
+            TaskHistory.get_last_status(self.project_id, 2, for_undo=True),
+            TaskStatus.READY,
+        )
+        last_action = TaskHistory.get_last_action(self.project_id, 2)
+        self.assertEqual(last_action.action, TaskAction.STATE_CHANGE.name)
+        self.assertEqual(task.last_action_date, last_action.action_date)
+        self.assertEqual(
+            TaskHistory.get_last_mapped_action(self.project_id, 2).id, last_action.id
+        )
+        # The closed lock is returned once no lock is open
+        self.assertEqual(
+            TaskHistory.get_last_locked_action(self.project_id, 2).id, open_lock.id
+        )
+
+    def test_previous_status_is_kept_for_undo(self):
+        # Arrange
+        task = Task.get(2, self.project_id)
+        task.lock_task_for_mapping(self.test_user.id)
+        task.unlock_task(self.test_user.id, TaskStatus.MAPPED)
+        task.lock_task_for_validating(self.test_user.id)
+        # Act
+        task.unlock_task(self.test_user.id, TaskStatus.VALIDATED)
+        # Assert
+        self.assertEqual(
+            TaskHistory.get_last_status(self.project_id, 2, for_undo=True),
+            TaskStatus.MAPPED,
+        )
+        self.assertEqual(
+            TaskHistory.get_last_statuses(self.project_id, [2, 3]),
+            {2: TaskStatus.VALIDATED, 3: TaskStatus.READY},
+        )
+
+    def test_heads_are_aggregated_again_when_history_is_deleted(self):
+        # Arrange
+        task = Task.get(2, self.project_id)
+        task.lock_task_for_mapping(self.test_user.id)
+        # Act
+        task.clear_task_lock()
+        # Assert
+        self.assertEqual(task.task_status, TaskStatus.READY.value)
+        self.assertIsNone(task.open_lock_history_id)
+        self.assertIsNone(task.last_history_id)
+        self.assertIsNone(TaskHistory.get_last_action(self.project_id, 2))
+
+
+class TestLockDurations(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.test_project, self.test_user = create_canned_project()
+        self.project_id = self.test_project.id
+
+    def test_locks_longer_than_a_day_are_counted_in_full(self):
+        # Arrange
+        task = Task.get(2, self.project_id)
+        task.lock_task_for_mapping(self.test_user.id)
+        TaskHistory.query.filter_by(project_id=self.project_id, task_id=2).update(
+            {"action_date": datetime.datetime.utcnow() - datetime.timedelta(hours=25)}
+        )
+        db.session.commit()
+        # Act
+        task.unlock_task(self.test_user.id, TaskStatus.MAPPED)
+        # Assert
+        lock = TaskHistory.get_last_locked_action(self.project_id, 2)
+        self.assertEqual(lock.duration_seconds, 25 * 3600)
+        self.assertEqual(lock.action_text, "25:00:00")
+        user_stats = self.test_project.get_project_user_stats(self.test_user.id)
+        self.assertEqual(user_stats.time_spent_mapping, 25 * 3600)
+        project_stats = self.test_project.get_project_stats()
+        self.assertEqual(project_stats.average_mapping_time, 25 * 3600)
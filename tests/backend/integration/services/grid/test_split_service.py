@@ -7,8 +7,10 @@ import geojson
 
 from backend.models.dtos.grid_dto import SplitTaskDTO
 from backend.models.postgis.project import Project
-from backend.models.postgis.task import Task
+from backend.models.postgis.task import Task, TaskAction, TaskHistory, TaskStatus
 from backend.services.grid.split_service import SplitService, SplitServiceError
+from backend.services.project_search_cache import search_cache
+from backend.services.project_service import ProjectService
 from tests.backend.base import BaseTestCase
 from tests.backend.helpers.test_helpers import get_canned_json
 from tests.backend.helpers.test_helpers import create_canned_project
@@ -44,22 +46,16 @@ class TestSplitService(BaseTestCase):
             SplitService._create_split_tasks("foo", "bar", "dum", task_stub)
 
     @patch.object(Task, "get_per_task_instructions")
-    @patch.object(Project, "tasks")
-    @patch.object(Project, "save")
-    @patch.object(Project, "get")
-    @patch.object(Task, "delete")
-    @patch.object(Task, "create")
+    @patch.object(Project, "record_split")
+    @patch.object(Task, "split_into")
     @patch.object(Task, "get_max_task_id_for_project")
     @patch.object(Task, "get")
     def test_split_task_helper(
         self,
         mock_task_get,
         mock_task_get_max_task_id_for_project,
-        mock_task_create,
-        mock_task_delete,
-        mock_project_get,
-        mock_project_save,
-        mock_project_tasks,
+        mock_task_split_into,
+        mock_project_record_split,
         mock_instructions,
     ):
         # arrange
@@ -86,8 +82,7 @@ class TestSplitService(BaseTestCase):
         )
         mock_task_get.return_value = task_stub
         mock_task_get_max_task_id_for_project.return_value = 1
-        mock_project_get.return_value = Project()
-        mock_project_tasks.return_value = [task_stub]
+        mock_task_split_into.side_effect = lambda new_tasks, user_id: new_tasks
         split_tast_dto = SplitTaskDTO()
         split_tast_dto.user_id = 1234
         split_tast_dto.project_id = 1
@@ -98,6 +93,109 @@ class TestSplitService(BaseTestCase):
 
         # assert
         self.assertEqual(4, len(result.tasks))
+        mock_project_record_split.assert_called_with(1, 4)
+
+    def test_split_task_keeps_history_in_lineage(self):
+        # arrange
+        task = Task.get(1, self.test_project.id)
+        task.lock_task_for_mapping(self.test_user.id)
+        history_count = TaskHistory.query.filter_by(
+            project_id=self.test_project.id
+        ).count()
+        total_tasks = self.test_project.total_tasks
+        generation = search_cache.get_backend().get_generation()
+        split_task_dto = SplitTaskDTO()
+        split_task_dto.user_id = self.test_user.id
+        split_task_dto.project_id = self.test_project.id
+        split_task_dto.task_id = 1
+
+        # act
+        result = SplitService.split_task(split_task_dto)
+
+        # assert
+        self.assertIsNone(Task.get(1, self.test_project.id))
+        self.assertEqual(self.test_project.total_tasks, total_tasks + 3)
+        # The new task count is not served from cached searches
+        self.assertGreater(search_cache.get_backend().get_generation(), generation)
+        # Only the split and ready state changes of the new tasks are recorded
+        self.assertEqual(
+            TaskHistory.query.filter_by(project_id=self.test_project.id).count(),
+            history_count + 8,
+        )
+        lock = TaskHistory.query.filter_by(
+            project_id=self.test_project.id,
+            task_id=1,
+            action=TaskAction.LOCKED_FOR_MAPPING.name,
+        ).one()
+        self.assertIsNotNone(lock.duration_seconds)
+        for task_dto in result.tasks:
+            new_task = Task.get(task_dto.task_id, self.test_project.id)
+            self.assertEqual(new_task.lineage, [1])
+            self.assertEqual(new_task.task_status, TaskStatus.READY.value)
+            self.assertEqual(
+                [
+                    (history.action, history.action_text)
+                    for history in task_dto.task_history
+                ][:3],
+                [
+                    (TaskAction.STATE_CHANGE.name, TaskStatus.READY.name),
+                    (TaskAction.STATE_CHANGE.name, TaskStatus.SPLIT.name),
+                    (TaskAction.LOCKED_FOR_MAPPING.name, lock.action_text),
+                ],
+            )
+
+    def test_project_with_split_tasks_can_be_deleted(self):
+        # arrange
+        task = Task.get(1, self.test_project.id)
+        task.lock_task_for_mapping(self.test_user.id)
+        split_task_dto = SplitTaskDTO()
+        split_task_dto.user_id = self.test_user.id
+        split_task_dto.project_id = self.test_project.id
+        split_task_dto.task_id = 1
+        SplitService.split_task(split_task_dto)
+        project_id = self.test_project.id
+
+        # act
+        self.test_project.delete()
+
+        # assert
+        self.assertIsNone(Project.get(project_id))
+        self.assertEqual(TaskHistory.query.filter_by(project_id=project_id).count(), 0)
+
+    def split(self, task_id):
+        Task.get(task_id, self.test_project.id).lock_task_for_mapping(self.test_user.id)
+        split_task_dto = SplitTaskDTO()
+        split_task_dto.user_id = self.test_user.id
+        split_task_dto.project_id = self.test_project.id
+        split_task_dto.task_id = task_id
+        return [task.task_id for task in SplitService.split_task(split_task_dto).tasks]
+
+    def test_deleted_tasks_history_is_not_taken_over_by_new_tasks(self):
+        # arrange
+        split_task_ids = self.split(4)
+
+        # act
+        ProjectService.delete_tasks(self.test_project.id, split_task_ids)
+        new_task_ids = self.split(3)
+
+        # assert
+        self.assertEqual(split_task_ids, [5, 6, 7, 8])
+        # The id of the split task is not reused, the deleted tasks left no history behind
+        self.assertEqual(new_task_ids, [5, 6, 7, 8])
+        self.assertEqual(
+            TaskHistory.query.filter(
+                TaskHistory.project_id == self.test_project.id,
+                TaskHistory.task_id.in_(new_task_ids),
+                TaskHistory.action == TaskAction.LOCKED_FOR_MAPPING.name,
+            ).count(),
+            0,
+        )
+        self.assertGreater(
+            TaskHistory.query.filter_by(
+                project_id=self.test_project.id, task_id=4
+            ).count(),
+            0,
+        )
 
     @patch.object(Task, "get_tasks")
     def test_split_non_square_task(self, mock_task):
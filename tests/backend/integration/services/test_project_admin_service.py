@@ -1,9 +1,12 @@
 from unittest.mock import patch, MagicMock
 import json
 from flask import current_app
+from geoalchemy2.shape import to_shape
+from shapely.geometry import shape
 
 from backend.models.postgis.project import Project, User, NotFound, ProjectPriority
-from backend.models.postgis.statuses import UserRole, ProjectDifficulty
+from backend.models.postgis.statuses import UserRole, ProjectDifficulty, TaskStatus
+from backend.models.postgis.task import Task
 from backend.services.messaging.message_service import MessageService
 from backend.services.team_service import TeamService
 from tests.backend.base import BaseTestCase
@@ -28,6 +31,7 @@ from tests.backend.helpers.test_helpers import (
     return_canned_user,
     create_canned_organisation,
     create_canned_user,
+    get_canned_json,
 )
 
 
@@ -142,21 +146,52 @@ class TestProjectAdminService(BaseTestCase):
             '{"features": [{"geometry": {"coordinates": [[[[-4.0237, 56.0904],'
             '[-3.9111, 56.1715], [-3.8122, 56.098], [-4.0237, 56.0904]]]], "type":'
             '"MultiPolygon"}, "properties": {"x": 2402, "y": 1736, "zoom": 12, "isSquare": true}, "type":'
-            '"Feature"}], "type": "FeatureCollection"}'
+            '"Feature"}, {"geometry": {"coordinates": [[[[-4.0237, 56.0904],'
+            '[-3.9111, 56.1715], [-3.8122, 56.098], [-4.0237, 56.0904]]]], "type":'
+            '"MultiPolygon"}, "properties": {"x": null, "y": null, "zoom": null, "isSquare": false,'
+            '"extra_properties": {"name": "tab\\there\\nand \\\\ back"}}, "type": "Feature"}],'
+            '"type": "FeatureCollection"}'
         )
-
+        test_user = create_canned_user()
+        draft_project_dto = DraftProjectDTO()
+        draft_project_dto.project_name = "Bulk tasks"
+        draft_project_dto.user_id = test_user.id
+        draft_project_dto.area_of_interest = get_canned_json("test_aoi.json")
         test_project = Project()
+        test_project.create_draft_project(draft_project_dto)
+        test_project.set_project_aoi(draft_project_dto)
 
         # Act
         ProjectAdminService._attach_tasks_to_project(
             test_project, valid_feature_collection
         )
+        test_project.create()
 
         # Assert
         self.assertEqual(
-            1,
+            2,
             test_project.tasks.count(),
-            "One task should have been attached to project",
+            "Two tasks should have been attached to project",
+        )
+        self.assertEqual(test_project.total_tasks, 2)
+        square_task, arbitrary_task = test_project.tasks.order_by(Task.id).all()
+        self.assertEqual(
+            (square_task.id, square_task.x, square_task.y, square_task.zoom),
+            (1, 2402, 1736, 12),
+        )
+        self.assertTrue(square_task.is_square)
+        self.assertEqual(square_task.task_status, TaskStatus.READY.value)
+        self.assertTrue(
+            to_shape(square_task.geometry).equals(
+                shape(valid_feature_collection["features"][0]["geometry"])
+            )
+        )
+        self.assertEqual(arbitrary_task.id, 2)
+        self.assertIsNone(arbitrary_task.x)
+        self.assertFalse(arbitrary_task.is_square)
+        self.assertEqual(
+            json.loads(arbitrary_task.extra_properties),
+            {"name": "tab\there\nand \\ back"},
         )
 
     @patch.object(UserService, "is_user_the_project_author")
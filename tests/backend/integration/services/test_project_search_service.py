@@ -7,7 +7,12 @@ from unittest.mock import patch
 from backend.models.dtos.project_dto import ProjectSearchBBoxDTO
 from backend.models.postgis.user import User
 from tests.backend.base import BaseTestCase
-from tests.backend.helpers.test_helpers import get_canned_json
+from tests.backend.helpers.test_helpers import (
+    get_canned_json,
+    create_canned_project,
+    create_canned_campaign,
+    update_project_with_info,
+)
 
 
 class TestProjectSearchService(BaseTestCase):
@@ -109,3 +114,33 @@ class TestProjectSearchService(BaseTestCase):
 
         # assert
         self.assertAlmostEqual(expected, 28276407740.2797, places=3)
+
+    def test_create_result_dtos_hydrates_whole_page(self):
+        # arrange
+        test_project, test_user = create_canned_project()
+        update_project_with_info(test_project)
+        test_project_2, _ = create_canned_project(name="Second Project")
+        test_campaign = create_canned_campaign()
+        test_project.campaign = [test_campaign]
+        test_project.save()
+        projects = (
+            ProjectSearchService.create_search_query(test_user)
+            .order_by(Project.id)
+            .all()
+        )
+
+        # act
+        results = ProjectSearchService.create_result_dtos(projects, "en")
+
+        # assert
+        self.assertEqual(
+            [r.project_id for r in results], [test_project.id, test_project_2.id]
+        )
+        self.assertEqual(results[0].name, "Thinkwhere Test")
+        self.assertEqual(results[0].short_description, "Short description")
+        self.assertEqual(results[1].name, "Second Project")
+        self.assertEqual([c.name for c in results[0].campaigns], [test_campaign.name])
+        self.assertEqual(results[1].campaigns, [])
+        self.assertEqual(results[0].active_mappers, 0)
+        self.assertEqual(results[0].total_contributors, 0)
+        self.assertEqual(results[0].percent_mapped, 66)
@@ -0,0 +1,92 @@
+import datetime
+
+from backend import db
+from backend.models.postgis.task import Task, TaskAction, TaskHistory, TaskStatus
+from backend.services.task_expiry_sweeper import TaskExpirySweeper
+from tests.backend.base import BaseTestCase
+from tests.backend.helpers.test_helpers import create_canned_project
+
+
+class TestTaskExpirySweeper(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.test_project, self.test_user = create_canned_project()
+        self.sweepers = []
+
+    def tearDown(self):
+        for sweeper in self.sweepers:
+            if sweeper.leader_connection is not None:
+                sweeper.leader_connection.invalidate()
+        super().tearDown()
+
+    def get_sweeper(self):
+        sweeper = TaskExpirySweeper()
+        self.sweepers.append(sweeper)
+        return sweeper
+
+    def test_only_one_sweeper_is_leader(self):
+        # Arrange
+        leader = self.get_sweeper()
+        follower = self.get_sweeper()
+        # Act/Assert
+        self.assertTrue(leader.is_leader())
+        self.assertFalse(follower.is_leader())
+        self.assertTrue(leader.is_leader())
+        # Another sweeper takes over once the leader is gone
+        leader.leader_connection.invalidate()
+        leader.leader_connection = None
+        self.assertTrue(follower.is_leader())
+
+    def test_sweep_unlocks_expired_tasks(self):
+        # Arrange
+        expired_task = Task.get(2, self.test_project.id)
+        expired_task.lock_task_for_mapping(self.test_user.id)
+        TaskHistory.query.filter_by(project_id=self.test_project.id, task_id=1).update(
+            {"action_date": datetime.datetime.utcnow() - datetime.timedelta(days=1)}
+        )
+        db.session.commit()
+        Task.get(1, self.test_project.id).lock_task_for_validating(self.test_user.id)
+        sweeper = self.get_sweeper()
+        # Act
+        unlocked = sweeper.sweep()
+        # Assert
+        self.assertEqual(unlocked, 1)
+        self.assertEqual(sweeper.tasks_unlocked, 1)
+        self.assertEqual(
+            Task.get(2, self.test_project.id).task_status, TaskStatus.READY.value
+        )
+        self.assertEqual(
+            Task.get(1, self.test_project.id).task_status,
+            TaskStatus.LOCKED_FOR_VALIDATION.value,
+        )
+
+    def test_sweep_restores_last_status_and_closes_lock_action(self):
+        # Arrange
+        task = Task.get(2, self.test_project.id)
+        task.set_task_history(
+            TaskAction.STATE_CHANGE, self.test_user.id, None, TaskStatus.MAPPED
+        )
+        task.task_status = TaskStatus.MAPPED.value
+        task.update()
+        task.lock_task_for_validating(self.test_user.id)
+        TaskHistory.query.filter_by(
+            project_id=self.test_project.id,
+            task_id=2,
+            action=TaskAction.LOCKED_FOR_VALIDATION.name,
+        ).update(
+            {"action_date": datetime.datetime.utcnow() - datetime.timedelta(days=1)}
+        )
+        db.session.commit()
+        # Act
+        self.get_sweeper().sweep()
+        # Assert
+        task = Task.get(2, self.test_project.id)
+        self.assertEqual(task.task_status, TaskStatus.MAPPED.value)
+        self.assertIsNone(task.locked_by)
+        last_action = TaskHistory.get_last_locked_or_auto_unlocked_action(
+            self.test_project.id, 2
+        )
+        self.assertEqual(
+            last_action.action, TaskAction.AUTO_UNLOCKED_FOR_VALIDATION.name
+        )
+        self.assertIsNotNone(last_action.action_text)
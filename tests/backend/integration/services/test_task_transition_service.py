@@ -0,0 +1,170 @@
+from backend.models.dtos.validator_dto import UnlockAfterValidationDTO, ValidatedTask
+from backend.models.postgis.task import (
+    Task,
+    TaskAction,
+    TaskHistory,
+    TaskInvalidationHistory,
+    TaskStatus,
+)
+from backend.services.task_transition_service import TaskTransitionService
+from backend.services.validator_service import ValidatorService
+from tests.backend.base import BaseTestCase
+from tests.backend.helpers.test_helpers import create_canned_project
+
+
+class TestTaskTransitionService(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.test_project, self.test_user = create_canned_project()
+
+    def get_actions(self, task_id):
+        return [
+            (history.action, history.action_text)
+            for history in TaskHistory.query.filter_by(
+                project_id=self.test_project.id, task_id=task_id
+            ).order_by(TaskHistory.id)
+        ]
+
+    def test_transition_records_lock_and_state_change(self):
+        # Act
+        changed_tasks = TaskTransitionService.transition_tasks(
+            self.test_project,
+            self.test_user.id,
+            [TaskStatus.MAPPED],
+            TaskStatus.VALIDATED,
+            lock_action=TaskAction.LOCKED_FOR_VALIDATION,
+            values=dict(validated_by=self.test_user.id),
+        )
+        # Assert
+        self.assertEqual([task.id for task in changed_tasks], [1])
+        task = Task.get(1, self.test_project.id)
+        self.assertEqual(task.task_status, TaskStatus.VALIDATED.value)
+        self.assertEqual(task.validated_by, self.test_user.id)
+        self.assertIsNone(task.locked_by)
+        self.assertEqual(
+            self.get_actions(1)[-2:],
+            [
+                (TaskAction.LOCKED_FOR_VALIDATION.name, "00:00:00"),
+                (TaskAction.STATE_CHANGE.name, TaskStatus.VALIDATED.name),
+            ],
+        )
+        self.assertEqual(self.test_project.tasks_mapped, 0)
+        self.assertEqual(self.test_project.tasks_validated, 2)
+
+    def test_locked_tasks_stay_counted_under_their_last_state(self):
+        # Arrange
+        TaskTransitionService.transition_tasks(
+            self.test_project,
+            self.test_user.id,
+            [TaskStatus.READY],
+            TaskStatus.MAPPED,
+            lock_action=TaskAction.LOCKED_FOR_MAPPING,
+        )
+        Task.get(2, self.test_project.id).lock_task_for_validating(self.test_user.id)
+        # Act
+        ValidatorService.invalidate_all_tasks(self.test_project.id, self.test_user.id)
+        # Assert
+        self.assertEqual(self.test_project.tasks_mapped, 2)
+        self.assertEqual(self.test_project.tasks_validated, 0)
+        # Act
+        validated_task = ValidatedTask()
+        validated_task.task_id = 2
+        validated_task.status = "VALIDATED"
+        unlock_dto = UnlockAfterValidationDTO()
+        unlock_dto.project_id = self.test_project.id
+        unlock_dto.user_id = self.test_user.id
+        unlock_dto.validated_tasks = [validated_task]
+        ValidatorService.unlock_tasks_after_validation(unlock_dto)
+        # Assert
+        self.assertEqual(self.test_project.tasks_mapped, 1)
+        self.assertEqual(self.test_project.tasks_validated, 1)
+
+    def test_transition_closes_open_locks(self):
+        # Arrange
+        Task.get(2, self.test_project.id).lock_task_for_mapping(self.test_user.id)
+        # Act
+        TaskTransitionService.transition_tasks(
+            self.test_project,
+            self.test_user.id,
+            [TaskStatus.LOCKED_FOR_MAPPING],
+            TaskStatus.MAPPED,
+            lock_action=TaskAction.LOCKED_FOR_MAPPING,
+        )
+        # Assert
+        actions = self.get_actions(2)
+        self.assertEqual(len(actions), 2)
+        self.assertEqual(actions[0][0], TaskAction.LOCKED_FOR_MAPPING.name)
+        self.assertIsNotNone(actions[0][1])
+        self.assertEqual(
+            actions[1], (TaskAction.STATE_CHANGE.name, TaskStatus.MAPPED.name)
+        )
+
+    def test_reset_records_locks_as_auto_unlocked(self):
+        # Arrange
+        Task.get(2, self.test_project.id).lock_task_for_mapping(self.test_user.id)
+        # Act
+        TaskTransitionService.transition_tasks(
+            self.test_project,
+            self.test_user.id,
+            [status for status in TaskStatus if status != TaskStatus.READY],
+            TaskStatus.READY,
+            comment="Task reset",
+        )
+        # Assert
+        self.assertEqual(
+            [action for action, _ in self.get_actions(2)],
+            [
+                TaskAction.AUTO_UNLOCKED_FOR_MAPPING.name,
+                TaskAction.COMMENT.name,
+                TaskAction.STATE_CHANGE.name,
+            ],
+        )
+        self.assertEqual(
+            Task.query.filter(
+                Task.project_id == self.test_project.id,
+                Task.task_status != TaskStatus.READY.value,
+            ).count(),
+            0,
+        )
+        self.assertEqual(self.test_project.tasks_bad_imagery, 0)
+
+    def test_invalidation_and_validation_history_are_recorded(self):
+        # Arrange
+        TaskTransitionService.transition_tasks(
+            self.test_project,
+            self.test_user.id,
+            [TaskStatus.READY],
+            TaskStatus.MAPPED,
+            lock_action=TaskAction.LOCKED_FOR_MAPPING,
+        )
+        TaskTransitionService.transition_tasks(
+            self.test_project,
+            self.test_user.id,
+            [TaskStatus.MAPPED],
+            TaskStatus.VALIDATED,
+            lock_action=TaskAction.LOCKED_FOR_VALIDATION,
+        )
+        # Act
+        TaskTransitionService.transition_tasks(
+            self.test_project,
+            self.test_user.id,
+            [TaskStatus.VALIDATED],
+            TaskStatus.INVALIDATED,
+            lock_action=TaskAction.LOCKED_FOR_VALIDATION,
+        )
+        # Assert
+        entry = TaskInvalidationHistory.get_open_for_task(self.test_project.id, 2)
+        self.assertEqual(entry.mapper_id, self.test_user.id)
+        self.assertEqual(entry.invalidator_id, self.test_user.id)
+        # Act
+        TaskTransitionService.transition_tasks(
+            self.test_project,
+            self.test_user.id,
+            [TaskStatus.INVALIDATED],
+            TaskStatus.VALIDATED,
+            lock_action=TaskAction.LOCKED_FOR_VALIDATION,
+        )
+        # Assert
+        self.assertIsNone(
+            TaskInvalidationHistory.get_open_for_task(self.test_project.id, 2)
+        )
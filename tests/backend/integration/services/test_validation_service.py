@@ -4,7 +4,12 @@ from backend.services.validator_service import (
     TaskStatus,
     Task,
 )
-from backend.models.dtos.validator_dto import RevertUserTasksDTO
+from backend.models.dtos.validator_dto import (
+    RevertUserTasksDTO,
+    UnlockAfterValidationDTO,
+    ValidatedTask,
+)
+from backend.models.postgis.task import TaskHistory, TaskInvalidationHistory
 from tests.backend.base import BaseTestCase
 from tests.backend.helpers.test_helpers import create_canned_project, return_canned_user
 
@@ -136,3 +141,50 @@ class TestValidationService(BaseTestCase):
         self.assertEqual(task_1.task_status, TaskStatus.READY.value)
         # task_2 is set as bad imagery by test_author so it should not be reverted to ready status
         self.assertEqual(task_2.task_status, TaskStatus.BADIMAGERY.value)
+
+    def test_unlock_tasks_after_validation_saves_all_tasks(self):
+        # Arrange
+        task_2 = Task.get(2, self.test_project.id)
+        task_2.lock_task_for_mapping(self.test_author.id)
+        task_2.unlock_task(self.test_author.id, new_state=TaskStatus.MAPPED)
+        validated_tasks = []
+        for task_id, status in [(1, "VALIDATED"), (2, "INVALIDATED")]:
+            Task.get(task_id, self.test_project.id).lock_task_for_validating(
+                self.test_user.id
+            )
+            validated_task = ValidatedTask()
+            validated_task.task_id = task_id
+            validated_task.status = status
+            validated_task.comment = "Checked"
+            validated_tasks.append(validated_task)
+        unlock_dto = UnlockAfterValidationDTO()
+        unlock_dto.project_id = self.test_project.id
+        unlock_dto.user_id = self.test_user.id
+        unlock_dto.validated_tasks = validated_tasks
+        # Act
+        task_dtos = ValidatorService.unlock_tasks_after_validation(unlock_dto)
+        # Assert
+        self.assertEqual(len(task_dtos.tasks), 2)
+        task_1 = Task.get(1, self.test_project.id)
+        task_2 = Task.get(2, self.test_project.id)
+        self.assertEqual(task_1.task_status, TaskStatus.VALIDATED.value)
+        self.assertEqual(task_1.validated_by, self.test_user.id)
+        self.assertIsNone(task_1.locked_by)
+        self.assertEqual(task_2.task_status, TaskStatus.INVALIDATED.value)
+        self.assertIsNone(task_2.mapped_by)
+        self.assertEqual(
+            TaskHistory.get_last_status(self.test_project.id, 2),
+            TaskStatus.INVALIDATED,
+        )
+        # The lock is closed with its duration
+        self.assertIsNotNone(
+            TaskHistory.get_last_locked_action(self.test_project.id, 2).action_text
+        )
+        entry = TaskInvalidationHistory.get_open_for_task(self.test_project.id, 2)
+        self.assertEqual(entry.mapper_id, self.test_author.id)
+        self.assertEqual(entry.invalidator_id, self.test_user.id)
+        # Task 1 has no earlier state change so it counts as validated from ready
+        self.assertEqual(self.test_project.tasks_validated, 2)
+        self.assertEqual(self.test_project.tasks_mapped, 0)
+        self.assertEqual(self.test_user.tasks_validated, 1)
+        self.assertEqual(self.test_user.tasks_invalidated, 1)
@@ -7,6 +7,7 @@ from backend.models.postgis.task import (
     TaskHistory,
 )
 from backend.models.postgis.statuses import TaskStatus
+from backend.models.postgis.utils import CopyStream
 from unittest.mock import patch, MagicMock
 
 from tests.backend.base import BaseTestCase
@@ -194,3 +195,60 @@ class TestTask(BaseTestCase):
         self.assertEqual(mock_history.action_text, lock_duration)
         self.assertEqual(test_task.locked_by, None)
         mock_last_action.delete.assert_called()
+
+    def test_copy_row_escapes_text_and_encodes_geometry_as_ewkb(self):
+        # Arrange
+        feature = geojson.loads(
+            '{"geometry": {"coordinates": [[[[-4.0237, 56.0904], [-3.9111, 56.1715],'
+            '[-3.8122, 56.098], [-4.0237, 56.0904]]]], "type": "MultiPolygon"}, "properties":'
+            '{"x": null, "y": null, "zoom": null, "isSquare": false,'
+            '"extra_properties": {"name": "a\\tb"}}, "type": "Feature"}'
+        )
+
+        # Act
+        row = CopyStream(
+            [
+                Task.copy_row(
+                    7,
+                    3,
+                    Task.columns_from_properties(feature["properties"]),
+                    feature["geometry"],
+                )
+            ]
+        ).read(8192)
+
+        # Assert
+        self.assertTrue(row.endswith("\n"))
+        columns = row[:-1].split("\t")
+        self.assertEqual(
+            columns[:8],
+            ["7", "3", "\\N", "\\N", "\\N", "f", '{"name": "a\\\\tb"}', "0"],
+        )
+        # Hex EWKB of a MultiPolygon with SRID 4326
+        self.assertTrue(columns[8].startswith("0106000020E6100000"))
+
+    def test_columns_from_properties_casts_integral_coordinates(self):
+        # Act
+        columns = Task.columns_from_properties(
+            {"x": 2300.0, "y": "2500", "zoom": 12, "isSquare": True}
+        )
+
+        # Assert
+        self.assertEqual(
+            (columns["x"], columns["y"], columns["zoom"]), (2300, 2500, 12)
+        )
+        self.assertIsInstance(columns["x"], int)
+
+    def test_columns_from_properties_rejects_non_integral_coordinates(self):
+        # Act / Assert
+        for value in [12.5, "12.5", "a", [1]]:
+            with self.assertRaises(InvalidData):
+                Task.columns_from_properties(
+                    {"x": 1, "y": 2, "zoom": value, "isSquare": True}
+                )
+
+    def test_lock_duration_text_has_whole_seconds_and_unwrapped_hours(self):
+        # Act / Assert
+        self.assertEqual(TaskHistory.lock_duration_text(0), "00:00:00")
+        self.assertEqual(TaskHistory.lock_duration_text(7384), "02:03:04")
+        self.assertEqual(TaskHistory.lock_duration_text(25 * 3600 + 61), "25:01:01")
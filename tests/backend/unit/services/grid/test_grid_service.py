@@ -1,15 +1,27 @@
 import json
 import geojson
+from shapely.geometry import Polygon, mapping, shape
+from shapely.ops import unary_union
 
 from backend.models.dtos.grid_dto import GridDTO
 from backend.models.dtos.project_dto import DraftProjectDTO
-from backend.models.postgis.utils import InvalidGeoJson
+from backend.models.postgis.utils import InvalidData, InvalidGeoJson
 from backend.services.grid.grid_service import GridService
+from backend.services.grid.web_mercator import tile_range, tile_rings
 from tests.backend.base import BaseTestCase
 from tests.backend.helpers.test_helpers import get_canned_json
 
 
+SQUARE_GRID_AOI = Polygon([(5.10, 7.20), (5.40, 7.25), (5.30, 7.50), (5.15, 7.45)])
+
+
 class TestGridService(BaseTestCase):
+    @staticmethod
+    def square_grid_aoi() -> dict:
+        return geojson.FeatureCollection(
+            [geojson.Feature(geometry=mapping(SQUARE_GRID_AOI))]
+        )
+
     def test_feature_collection_to_multi_polygon_dissolve(self):
         # arrange
         grid_json = get_canned_json("test_grid.json")
@@ -69,6 +81,49 @@ class TestGridService(BaseTestCase):
         # assert
         self.assertDeepAlmostEqual(expected, result)
 
+    def test_trim_grid_to_aoi_keeps_squares_within_aoi(self):
+        # arrange
+        x, y = tile_range(5.25, 7.35, 5.25, 7.35, 15)[:2]
+        square = geojson.Feature(
+            geometry=geojson.MultiPolygon([[tile_rings(x, y, 15)[0].tolist()]]),
+            properties={"x": x, "y": y, "zoom": 15, "isSquare": True},
+        )
+        grid_dto = GridDTO(
+            {
+                "areaOfInterest": self.square_grid_aoi(),
+                "grid": geojson.FeatureCollection([square]),
+                "clipToAoi": True,
+            }
+        )
+
+        # act
+        result = GridService.trim_grid_to_aoi(grid_dto)
+
+        # assert
+        self.assertEqual(len(result["features"]), 1)
+        self.assertTrue(result["features"][0]["properties"]["isSquare"])
+
+    def test_trim_grid_to_aoi_drops_squares_outside_aoi(self):
+        # arrange
+        x, y = tile_range(6.0, 8.0, 6.0, 8.0, 15)[:2]
+        square = geojson.Feature(
+            geometry=geojson.MultiPolygon([[tile_rings(x, y, 15)[0].tolist()]]),
+            properties={"x": x, "y": y, "zoom": 15, "isSquare": True},
+        )
+        grid_dto = GridDTO(
+            {
+                "areaOfInterest": self.square_grid_aoi(),
+                "grid": geojson.FeatureCollection([square]),
+                "clipToAoi": False,
+            }
+        )
+
+        # act
+        result = GridService.trim_grid_to_aoi(grid_dto)
+
+        # assert
+        self.assertEqual(len(result["features"]), 0)
+
     def test_tasks_from_aoi_features(self):
         # arrange
         grid_json = get_canned_json("test_arbitrary.json")
@@ -156,3 +211,92 @@ class TestGridService(BaseTestCase):
         features = GridService._to_shapely_geometries(grid_geojson)
         # Assert
         self.assertNotEqual(0, len(features))
+
+    def test_create_square_grid_covers_aoi(self):
+        # act
+        result = GridService.create_square_grid(self.square_grid_aoi(), zoom=15)
+
+        # assert
+        squares = [shape(feature["geometry"]) for feature in result["features"]]
+        self.assertTrue(
+            all(square.intersection(SQUARE_GRID_AOI).area > 0 for square in squares)
+        )
+        self.assertAlmostEqual(SQUARE_GRID_AOI.difference(unary_union(squares)).area, 0)
+        self.assertTrue(
+            all(feature["properties"]["isSquare"] for feature in result["features"])
+        )
+
+    def test_create_square_grid_matches_trimmed_grid(self):
+        # arrange
+        x_min, y_min, x_max, y_max = tile_range(*SQUARE_GRID_AOI.bounds, 15)
+        grid = [
+            geojson.Feature(
+                geometry=geojson.MultiPolygon([[tile_rings(x, y, 15)[0].tolist()]]),
+                properties={"x": x, "y": y, "zoom": 15, "isSquare": True},
+            )
+            for x in range(x_min, x_max + 1)
+            for y in range(y_min, y_max + 1)
+        ]
+        grid_dto = GridDTO(
+            {
+                "areaOfInterest": self.square_grid_aoi(),
+                "grid": geojson.FeatureCollection(grid),
+                "clipToAoi": True,
+            }
+        )
+        expected = GridService.trim_grid_to_aoi(grid_dto)
+
+        # act
+        result = GridService.create_square_grid(
+            self.square_grid_aoi(), zoom=15, clip_to_aoi=True
+        )
+
+        # assert
+        def by_tile(feature_collection):
+            return {
+                (feature["properties"]["x"], feature["properties"]["y"]): feature
+                for feature in feature_collection["features"]
+            }
+
+        expected_tiles, result_tiles = by_tile(expected), by_tile(result)
+        self.assertEqual(expected_tiles.keys(), result_tiles.keys())
+        for tile, feature in result_tiles.items():
+            self.assertEqual(
+                feature["properties"]["isSquare"],
+                expected_tiles[tile]["properties"]["isSquare"],
+            )
+            self.assertAlmostEqual(
+                shape(feature["geometry"]).area,
+                shape(expected_tiles[tile]["geometry"]).area,
+            )
+
+    def test_create_square_grid_of_aoi_aligned_to_tiles(self):
+        # arrange
+        aoi = geojson.FeatureCollection(
+            [geojson.Feature(geometry=mapping(Polygon(tile_rings(2300, 2500, 12)[0])))]
+        )
+
+        # act
+        result = GridService.create_square_grid(aoi, zoom=12, clip_to_aoi=True)
+
+        # assert
+        self.assertEqual(
+            [feature["properties"] for feature in result["features"]],
+            [{"x": 2300, "y": 2500, "zoom": 12, "isSquare": True}],
+        )
+
+    def test_create_square_grid_from_task_area(self):
+        # act
+        result = GridService.create_square_grid(self.square_grid_aoi(), task_area=1.0)
+
+        # assert
+        self.assertTrue(
+            all(feature["properties"]["zoom"] == 15 for feature in result["features"])
+        )
+
+    def test_create_square_grid_raises_InvalidData_without_size_or_too_many_tiles(self):
+        # Act / Assert
+        with self.assertRaises(InvalidData):
+            GridService.create_square_grid(self.square_grid_aoi())
+        with self.assertRaises(InvalidData):
+            GridService.create_square_grid(self.square_grid_aoi(), zoom=20)
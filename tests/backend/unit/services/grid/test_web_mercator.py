@@ -0,0 +1,110 @@
+from shapely.geometry import box
+
+from backend.services.grid.web_mercator import (
+    lonlat_to_mercator,
+    mercator_to_lonlat,
+    tile_bounds,
+    tile_lonlat_bounds,
+    tile_range,
+    tile_rings,
+    tile_zoom_for_area,
+    to_lonlat,
+    to_mercator,
+)
+from tests.backend.base import BaseTestCase
+
+
+class TestWebMercator(BaseTestCase):
+    def test_projection_round_trip(self):
+        # arrange
+        lon, lat = [-179.5, 0.0, 34.68826225820438], [-85.0, 0.0, -12.59912449955007]
+
+        # act
+        x, y = lonlat_to_mercator(lon, lat)
+        result_lon, result_lat = mercator_to_lonlat(x, y)
+
+        # assert
+        self.assertAlmostEqual(x[1], 0.0)
+        self.assertAlmostEqual(x[2], 3861479.691086842, places=6)
+        for expected, actual in zip(lon + lat, list(result_lon) + list(result_lat)):
+            self.assertAlmostEqual(expected, actual, places=10)
+
+    def test_geometry_transform_matches_postgis(self):
+        # arrange
+        polygon = box(
+            32.50198296132938, -12.59912449955007, 34.68826225820438, -11.57858317689196
+        )
+
+        # act
+        area = to_mercator(polygon).area
+        bounds = to_lonlat(to_mercator(polygon)).bounds
+
+        # assert
+        # Area returned by ST_Area(ST_Transform(geometry, 3857))
+        self.assertAlmostEqual(area, 28276407740.2797, places=3)
+        for expected, actual in zip(polygon.bounds, bounds):
+            self.assertAlmostEqual(expected, actual, places=10)
+
+    def test_tile_rings_match_postgis(self):
+        # arrange
+        x, y, zoom = [2020, 2021], [2798, 2799], 12
+
+        # act
+        rings = tile_rings(x, y, zoom)
+
+        # assert
+        # ST_AsGeoJSON(ST_Transform(square, 4326)) of the tile squares
+        self.assertEqual(
+            rings.tolist(),
+            [
+                [
+                    [-2.4609375, 54.876606647],
+                    [-2.373046875, 54.876606647],
+                    [-2.373046875, 54.927141858],
+                    [-2.4609375, 54.927141858],
+                    [-2.4609375, 54.876606647],
+                ],
+                [
+                    [-2.373046875, 54.927141858],
+                    [-2.28515625, 54.927141858],
+                    [-2.28515625, 54.977613664],
+                    [-2.373046875, 54.977613664],
+                    [-2.373046875, 54.927141858],
+                ],
+            ],
+        )
+
+    def test_tile_bounds_halve_at_each_zoom(self):
+        # act
+        xmin, ymin, xmax, ymax = tile_bounds(0, 0, 0)
+        child_xmin, child_ymin, child_xmax, child_ymax = tile_bounds(1, 1, 1)
+
+        # assert
+        self.assertAlmostEqual(float(xmax - xmin), 2 * float(child_xmax - child_xmin))
+        self.assertAlmostEqual(float(child_xmin), 0.0)
+        self.assertAlmostEqual(float(child_ymin), 0.0)
+
+    def test_tile_range_covers_bounds(self):
+        # arrange
+        lon_min, lat_min, lon_max, lat_max = tile_lonlat_bounds(16856, 17050, 15)
+
+        # act
+        inner = tile_range(
+            lon_min + 1e-9, lat_min + 1e-9, lon_max - 1e-9, lat_max - 1e-9, 15
+        )
+        whole_world = tile_range(-180.0, -90.0, 180.0, 90.0, 2)
+
+        # assert
+        self.assertEqual([int(index) for index in inner], [16856, 17050, 16856, 17050])
+        self.assertEqual([int(index) for index in whole_world], [0, 0, 3, 3])
+
+    def test_tile_zoom_for_area(self):
+        # arrange
+        xmin, ymin, xmax, ymax = tile_bounds(0, 0, 16)
+        equator_area = float(xmax - xmin) ** 2
+
+        # act / assert
+        self.assertEqual(tile_zoom_for_area(equator_area, 0.0), 16)
+        self.assertEqual(tile_zoom_for_area(equator_area * 3, 0.0), 15)
+        # Squares shrink away from the equator, the same area needs a lower zoom
+        self.assertEqual(tile_zoom_for_area(equator_area, 60.0), 15)
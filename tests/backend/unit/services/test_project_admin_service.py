@@ -10,6 +10,7 @@ from backend.services.project_admin_service import (
 )
 from backend.models.dtos.project_dto import ProjectInfoDTO
 from backend.models.postgis.task import Task
+from backend.models.postgis.utils import InvalidData
 from tests.backend.base import BaseTestCase
 
 
@@ -25,28 +26,25 @@ class TestProjectAdminService(BaseTestCase):
         with self.assertRaises(InvalidGeoJson):
             ProjectAdminService._attach_tasks_to_project(MagicMock(), invalid_feature)
 
-    def test_valid_geo_json_attaches_task_to_project(self):
+    @patch.object(Task, "copy_from_geojson_features")
+    def test_invalid_task_is_found_before_tasks_are_copied(self, mock_copy):
         # Arrange
-        valid_feature_collection = json.loads(
+        feature_collection = json.loads(
             '{"features": [{"geometry": {"coordinates": [[[[-4.0237, 56.0904],'
             '[-3.9111, 56.1715], [-3.8122, 56.098], [-4.0237, 56.0904]]]], "type":'
             '"MultiPolygon"}, "properties": {"x": 2402, "y": 1736, "zoom": 12, "isSquare": true}, "type":'
+            '"Feature"}, {"geometry": {"coordinates": [[[[-4.0237, 56.0904],'
+            '[-3.9111, 56.1715], [-3.8122, 56.098], [-4.0237, 56.0904]]]], "type":'
+            '"MultiPolygon"}, "properties": {"x": 2402, "y": 1736, "isSquare": true}, "type":'
             '"Feature"}], "type": "FeatureCollection"}'
         )
 
-        test_project = Project()
-
-        # Act
-        ProjectAdminService._attach_tasks_to_project(
-            test_project, valid_feature_collection
-        )
-
-        # Assert
-        self.assertEqual(
-            1,
-            test_project.tasks.count(),
-            "One task should have been attached to project",
-        )
+        # Act / Assert
+        with self.assertRaises(InvalidData):
+            ProjectAdminService._attach_tasks_to_project(
+                MagicMock(), feature_collection
+            )
+        mock_copy.assert_not_called()
 
     @patch.object(Project, "get")
     def test_get_raises_error_if_not_found(self, mock_project):
@@ -0,0 +1,129 @@
+import datetime
+import time
+
+from backend.models.dtos.project_dto import ProjectSearchDTO
+from backend.models.postgis.statuses import MappingTypes, ProjectStatus
+from backend.services.project_catalogue import (
+    MEMBERSHIPS,
+    ProjectCatalogue,
+    mapping_types_to_bitmask,
+)
+from tests.backend.base import BaseTestCase
+
+
+class TestProjectCatalogue(BaseTestCase):
+    @staticmethod
+    def get_search_dto(**kwargs):
+        search_dto = ProjectSearchDTO(dict(page=1, preferred_locale="en", **kwargs))
+        search_dto.validate()
+        return search_dto
+
+    @staticmethod
+    def get_record(project_id, **kwargs):
+        record = dict(
+            id=project_id,
+            status=ProjectStatus.PUBLISHED.value,
+            difficulty=1,
+            priority=2,
+            author_id=1,
+            organisation_id=-1,
+            private=False,
+            mapping_permission=0,
+            validation_permission=0,
+            mapping_types=mapping_types_to_bitmask([MappingTypes.ROADS.value]),
+            total_tasks=10,
+            tasks_mapped=0,
+            tasks_validated=0,
+            tasks_bad_imagery=0,
+            created=datetime.datetime(2023, 1, 1),
+            last_updated=datetime.datetime(2023, 1, project_id),
+            due_date=None,
+            keys={name: set() for name in MEMBERSHIPS},
+        )
+        record["keys"]["locale"] = {"en"}
+        record.update(kwargs)
+        return record
+
+    def get_catalogue(self):
+        catalogue = ProjectCatalogue()
+        catalogue._build(
+            {
+                1: self.get_record(1, private=True),
+                2: self.get_record(2, status=ProjectStatus.DRAFT.value),
+                3: self.get_record(
+                    3,
+                    mapping_types=mapping_types_to_bitmask(
+                        [MappingTypes.ROADS.value, MappingTypes.BUILDINGS.value]
+                    ),
+                    due_date=datetime.datetime(2024, 1, 1),
+                ),
+                4: self.get_record(4, tasks_mapped=10),
+            }
+        )
+        return catalogue
+
+    def search(self, catalogue, **kwargs):
+        return catalogue._ordered_ids(self.get_search_dto(**kwargs), None).tolist()
+
+    def test_anonymous_search_returns_public_published_projects(self):
+        # Arrange
+        catalogue = self.get_catalogue()
+        # Act/Assert
+        self.assertEqual(self.search(catalogue), [3, 4])
+        self.assertEqual(self.search(catalogue, action="map"), [3])
+        self.assertEqual(
+            self.search(catalogue, mapping_types=["BUILDINGS"]),
+            [3],
+        )
+        self.assertEqual(
+            self.search(catalogue, mapping_types=["ROADS"], mapping_types_exact=True),
+            [4],
+        )
+
+    def test_ordering_matches_postgres_null_ordering(self):
+        # Arrange
+        catalogue = self.get_catalogue()
+        # Act/Assert
+        self.assertEqual(
+            self.search(catalogue, order_by="last_updated", order_by_type="DESC"),
+            [4, 3],
+        )
+        # NULLs come last in ascending order and first in descending order
+        self.assertEqual(
+            self.search(catalogue, order_by="due_date", order_by_type="ASC"), [3, 4]
+        )
+        self.assertEqual(
+            self.search(catalogue, order_by="due_date", order_by_type="DESC"), [4, 3]
+        )
+
+    def test_apply_updates_rows_and_memberships(self):
+        # Arrange
+        catalogue = self.get_catalogue()
+        updated = self.get_record(4, tasks_mapped=0)
+        updated["keys"]["campaign"] = {"Missing Maps"}
+        created = self.get_record(5)
+        # Act
+        catalogue._apply([4], {4: updated})
+        catalogue._apply([5], {5: created})
+        # Assert
+        self.assertEqual(self.search(catalogue, action="map"), [3, 4, 5])
+        self.assertEqual(self.search(catalogue, campaign="Missing Maps"), [4])
+        # Deleted projects are dropped
+        catalogue._apply([3], {})
+        self.assertEqual(self.search(catalogue), [4, 5])
+
+    def test_search_after_cursor(self):
+        # Arrange
+        catalogue = self.get_catalogue()
+        catalogue._apply([5], {5: self.get_record(5)})
+        catalogue.loaded_at = time.monotonic()
+        search_dto = self.get_search_dto(order_by="due_date", order_by_type="DESC")
+        # Act
+        project_ids, start = catalogue.search_after(search_dto, None, (None, 4))
+        # Assert
+        self.assertEqual(project_ids.tolist(), [4, 5, 3])
+        self.assertEqual(project_ids[start:].tolist(), [5, 3])
+        _, start = catalogue.search_after(
+            search_dto, None, (datetime.datetime(2024, 1, 1), 3)
+        )
+        self.assertEqual(start, 3)
@@ -0,0 +1,58 @@
+import time
+
+import numpy as np
+
+from backend.models.postgis.statuses import ProjectPriority
+from backend.services.project_centroid_layer import (
+    PACKED_CENTROID_DTYPE,
+    ProjectCentroidLayer,
+)
+from tests.backend.base import BaseTestCase
+
+
+class TestProjectCentroidLayer(BaseTestCase):
+    def get_layer(self):
+        layer = ProjectCentroidLayer()
+        layer._store(
+            [1, 2],
+            {
+                1: ({"type": "Point", "coordinates": [85.3, 27.7]}, 0),
+                2: ({"type": "Point", "coordinates": [-77.0, 38.9]}, 2),
+            },
+        )
+        # Mark the layer as freshly loaded so it is not reloaded from the database
+        layer.loaded_at = time.monotonic()
+        return layer
+
+    def test_get_feature_collection_keeps_requested_order(self):
+        # Arrange
+        layer = self.get_layer()
+        # Act
+        feature_collection = layer.get_feature_collection([2, 1])
+        # Assert
+        self.assertEqual(feature_collection["type"], "FeatureCollection")
+        self.assertEqual(
+            [f["properties"]["projectId"] for f in feature_collection["features"]],
+            [2, 1],
+        )
+        self.assertEqual(
+            feature_collection["features"][0]["properties"]["priority"],
+            ProjectPriority.MEDIUM.name,
+        )
+        self.assertEqual(
+            feature_collection["features"][1]["geometry"]["coordinates"], [85.3, 27.7]
+        )
+
+    def test_get_packed_points(self):
+        # Arrange
+        layer = self.get_layer()
+        # Act
+        points = np.frombuffer(
+            layer.get_packed_points([1, 2]), dtype=PACKED_CENTROID_DTYPE
+        )
+        # Assert
+        self.assertEqual(PACKED_CENTROID_DTYPE.itemsize, 16)
+        self.assertEqual(points["id"].tolist(), [1, 2])
+        self.assertEqual(points["priority"].tolist(), [0, 2])
+        np.testing.assert_allclose(points["lon"], [85.3, -77.0], rtol=1e-6)
+        np.testing.assert_allclose(points["lat"], [27.7, 38.9], rtol=1e-6)
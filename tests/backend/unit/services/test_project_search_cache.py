@@ -0,0 +1,84 @@
+from backend.models.dtos.project_dto import ProjectSearchDTO
+from backend.models.postgis.statuses import UserRole
+from backend.services.project_search_cache import (
+    LocalSearchCacheBackend,
+    LocalSharedStore,
+    ProjectSearchCache,
+    SharedSearchCacheBackend,
+    search_cache,
+)
+from tests.backend.base import BaseTestCase
+from tests.backend.helpers.test_helpers import (
+    create_canned_project,
+    return_canned_user,
+)
+
+
+class TestProjectSearchCache(BaseTestCase):
+    @staticmethod
+    def get_search_dto(**kwargs):
+        search_dto = ProjectSearchDTO(dict(page=1, **kwargs))
+        search_dto.validate()
+        return search_dto
+
+    def test_filter_signature_ignores_list_order_and_unset_values(self):
+        # Arrange
+        dto_a = self.get_search_dto(mapping_types=["ROADS", "BUILDINGS"])
+        dto_b = self.get_search_dto(mapping_types=["BUILDINGS", "ROADS"], campaign="")
+        dto_c = self.get_search_dto(mapping_types=["ROADS"])
+        # Act/Assert
+        self.assertEqual(
+            ProjectSearchCache.get_filter_signature(dto_a),
+            ProjectSearchCache.get_filter_signature(dto_b),
+        )
+        self.assertNotEqual(
+            ProjectSearchCache.get_filter_signature(dto_a),
+            ProjectSearchCache.get_filter_signature(dto_c),
+        )
+
+    def test_permission_class(self):
+        # Arrange
+        search_dto = self.get_search_dto()
+        mapper = return_canned_user()
+        admin = return_canned_user("admin", 1234)
+        admin.role = UserRole.ADMIN.value
+        # Act/Assert
+        self.assertEqual(
+            ProjectSearchCache.get_permission_class(search_dto, None), "anonymous"
+        )
+        self.assertEqual(
+            ProjectSearchCache.get_permission_class(search_dto, mapper), "mapper"
+        )
+        self.assertEqual(
+            ProjectSearchCache.get_permission_class(search_dto, admin), "admin"
+        )
+
+    def test_backends_drop_entries_when_generation_is_bumped(self):
+        for backend in [
+            LocalSearchCacheBackend(maxsize=8, ttl=60),
+            SharedSearchCacheBackend(LocalSharedStore(), ttl=60),
+        ]:
+            # Arrange
+            cache = ProjectSearchCache()
+            cache.backend = backend
+            search_dto = self.get_search_dto()
+            key = cache.make_key(search_dto, None)
+            cache.set(key, {"results": [1]})
+            # Act/Assert
+            self.assertEqual(
+                cache.get(cache.make_key(search_dto, None)), {"results": [1]}
+            )
+            cache.invalidate()
+            self.assertIsNone(cache.get(cache.make_key(search_dto, None)))
+
+    def test_project_write_invalidates_search_cache(self):
+        # Arrange
+        generation = search_cache.get_backend().get_generation()
+        # Act
+        test_project, _ = create_canned_project()
+        # Assert
+        self.assertGreater(search_cache.get_backend().get_generation(), generation)
+        generation = search_cache.get_backend().get_generation()
+        test_project.tasks_mapped += 1
+        test_project.save()
+        self.assertGreater(search_cache.get_backend().get_generation(), generation)
@@ -1,3 +1,7 @@
+import datetime
+from types import SimpleNamespace
+
+from backend.exceptions import NotFound
 from backend.models.dtos.project_dto import ProjectSearchDTO
 from backend.models.postgis.statuses import (
     ProjectStatus,
@@ -40,3 +44,69 @@ class TestProjectService(BaseTestCase):
         self.assertIsNotNone(
             ProjectSearchService.search_projects(search_dto, test_user)
         )
+
+    def test_cursor_round_trip(self):
+        # Arrange
+        search_dto = ProjectSearchDTO(
+            dict(page=1, order_by="last_updated", order_by_type="DESC")
+        )
+        project = SimpleNamespace(id=12, last_updated=datetime.datetime(2023, 5, 1))
+        # Act
+        search_dto.cursor = ProjectSearchService.encode_cursor(search_dto, project)
+        # Assert
+        self.assertEqual(
+            ProjectSearchService.decode_cursor(search_dto),
+            (datetime.datetime(2023, 5, 1), 12),
+        )
+        # A cursor can't be reused with another ordering
+        search_dto.order_by_type = "ASC"
+        with self.assertRaises(ValueError):
+            ProjectSearchService.decode_cursor(search_dto)
+        search_dto.cursor = "not-a-cursor"
+        with self.assertRaises(ValueError):
+            ProjectSearchService.decode_cursor(search_dto)
+
+    def test_search_projects_with_cursor_pages_through_results(self):
+        # Arrange
+        test_project, test_user = create_canned_project()
+        search_dto = ProjectSearchDTO(
+            dict(
+                page=1,
+                order_by="id",
+                order_by_type="ASC",
+                created_by=test_user.id,
+                keyset_pagination=True,
+            )
+        )
+        search_dto.validate()
+        # Act
+        results = ProjectSearchService.search_projects(search_dto, test_user)
+        # Assert
+        self.assertEqual(results.results[0].project_id, test_project.id)
+        self.assertEqual(results.cursor_pagination.total, 1)
+        self.assertFalse(results.cursor_pagination.has_next)
+        search_dto.cursor = ProjectSearchService.encode_cursor(search_dto, test_project)
+        with self.assertRaises(NotFound):
+            ProjectSearchService.search_projects(search_dto, test_user)
+
+    def test_text_search_tolerates_typos_and_orders_by_relevance(self):
+        # Arrange
+        test_project, test_user = create_canned_project(name="Buildings in Kathmandu")
+        create_canned_project(name="Roads near Kathmandu")
+        search_dto = ProjectSearchDTO(
+            dict(
+                page=1,
+                text_search="Buildngs Kathmandu",
+                order_by="relevance",
+                created_by=test_user.id,
+                omit_map_results=True,
+            )
+        )
+        search_dto.validate()
+        # Act
+        results = ProjectSearchService.search_projects(search_dto, test_user)
+        # Assert
+        self.assertEqual(results.results[0].project_id, test_project.id)
+        search_dto.text_search = None
+        with self.assertRaises(ValueError):
+            ProjectSearchService.search_projects(search_dto, test_user)
@@ -0,0 +1,60 @@
+import json
+
+from backend.services.task_event_broker import (
+    SUBSCRIBER_QUEUE_SIZE,
+    TaskEventBroker,
+    TaskEventSubscriber,
+)
+from tests.backend.base import BaseTestCase
+
+
+class TestTaskEventBroker(BaseTestCase):
+    @staticmethod
+    def get_event(project_id, task_id, event_type="lock"):
+        return {
+            "event": event_type,
+            "projectId": project_id,
+            "taskId": task_id,
+            "taskStatus": "LOCKED_FOR_MAPPING",
+            "lockedBy": 1,
+            "mappedBy": None,
+        }
+
+    def get_broker(self, *subscribers):
+        broker = TaskEventBroker()
+        for subscriber in subscribers:
+            broker.subscribers.setdefault(subscriber.project_id, set()).add(subscriber)
+        return broker
+
+    def test_events_are_streamed_to_subscribers_of_the_project(self):
+        # Arrange
+        subscriber = TaskEventSubscriber(1)
+        other_subscriber = TaskEventSubscriber(2)
+        broker = self.get_broker(subscriber, other_subscriber)
+        stream = broker.stream(subscriber)
+        # Act
+        broker.dispatch(self.get_event(1, 5))
+        # Assert
+        self.assertEqual(next(stream), "retry: 5000\n\n")
+        self.assertEqual(
+            next(stream),
+            f"event: lock\ndata: {json.dumps(self.get_event(1, 5))}\n\n",
+        )
+        self.assertTrue(other_subscriber.events.empty())
+        # Closing the stream unsubscribes it
+        stream.close()
+        self.assertEqual(broker.subscribers, {2: {other_subscriber}})
+
+    def test_slow_subscriber_is_asked_to_resync(self):
+        # Arrange
+        subscriber = TaskEventSubscriber(1)
+        broker = self.get_broker(subscriber)
+        # Act
+        for task_id in range(SUBSCRIBER_QUEUE_SIZE + 1):
+            broker.dispatch(self.get_event(1, task_id))
+        # Assert
+        self.assertTrue(subscriber.overflowed)
+        self.assertEqual(broker.subscribers, {})
+        self.assertEqual(
+            list(broker.stream(subscriber))[-1], "event: resync\ndata: {}\n\n"
+        )
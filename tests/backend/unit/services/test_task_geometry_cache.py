@@ -0,0 +1,77 @@
+import json
+from types import SimpleNamespace
+
+from backend.models.postgis.statuses import TaskStatus
+from backend.services.task_geometry_cache import (
+    ProjectTaskGeometries,
+    SizedLRUCache,
+    TaskGeometryCache,
+)
+from tests.backend.base import BaseTestCase
+
+POINT = '{"type":"Point","coordinates":[1,2]}'
+
+
+class TestTaskGeometryCache(BaseTestCase):
+    def test_feature_collection_overlays_current_task_state(self):
+        # Arrange
+        geometries = ProjectTaskGeometries(
+            3, {1: (10, 20, 5, True, POINT), 2: (11, 20, 5, True, POINT)}
+        )
+        tasks = [
+            SimpleNamespace(
+                id=2,
+                task_status=TaskStatus.LOCKED_FOR_MAPPING.value,
+                locked_by=7,
+                mapped_by=None,
+            ),
+            SimpleNamespace(
+                id=1, task_status=TaskStatus.MAPPED.value, locked_by=None, mapped_by=7
+            ),
+        ]
+        # Act
+        feature_collection = json.loads(
+            TaskGeometryCache.as_feature_collection_text(geometries, tasks)
+        )
+        # Assert
+        self.assertEqual(feature_collection["type"], "FeatureCollection")
+        self.assertEqual(
+            [feature["properties"] for feature in feature_collection["features"]],
+            [
+                dict(
+                    taskId=2,
+                    taskX=11,
+                    taskY=20,
+                    taskZoom=5,
+                    taskIsSquare=True,
+                    taskStatus="LOCKED_FOR_MAPPING",
+                    lockedBy=7,
+                    mappedBy=None,
+                ),
+                dict(
+                    taskId=1,
+                    taskX=10,
+                    taskY=20,
+                    taskZoom=5,
+                    taskIsSquare=True,
+                    taskStatus="MAPPED",
+                    lockedBy=None,
+                    mappedBy=7,
+                ),
+            ],
+        )
+        self.assertEqual(
+            feature_collection["features"][0]["geometry"], json.loads(POINT)
+        )
+
+    def test_cache_size_is_bounded(self):
+        # Arrange
+        cache = SizedLRUCache(1000)
+        entry = ProjectTaskGeometries(0, {1: (0, 0, 0, True, POINT)})
+        # Act
+        for project_id in range(10):
+            cache[project_id] = entry
+        # Assert
+        self.assertLessEqual(cache.currsize, 1000)
+        self.assertEqual(cache.evictions, 10 - len(cache))
+        self.assertIn(9, cache)